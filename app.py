@@ -1,20 +1,95 @@
 from dotenv import load_dotenv
-from flask import Flask, jsonify, make_response, Response, request
-from team_tracker.utils.sql_utils import initialize_database
-import requests
+from flask import Flask, g, jsonify, make_response, Response, request
+from team_tracker.utils.sql_utils import (
+    begin_unit_of_work, end_unit_of_work, initialize_database, outside_unit_of_work
+)
 
 # from flask_cors import CORS
 
+from team_tracker.clients.espn import get_espn_client
+from team_tracker.utils.circuit_breaker import CircuitOpenError
 from team_tracker.models import locker_model
+from team_tracker.models import schedule_model
+from team_tracker.models import standings_model
 # from team_tracker.game_model import GameModel
-from team_tracker.utils.sql_utils import check_database_connection, check_table_exists
+from team_tracker.utils.sql_utils import get_pool, get_read_pool
+from team_tracker.utils.sql_utils import BackupScheduler, BACKUP_ENABLED, sql_tracer
 from team_tracker.models import user_model
+from team_tracker.utils.disk_cache import get_disk_cache
+from team_tracker.utils.fanout import fan_out_blocking
+from team_tracker.utils.response_cache import CACHE_ROSTER_TTL, CACHE_SCHEDULE_TTL
+from team_tracker.utils.scheduler import REFRESH_ENABLED
+from team_tracker.web_common import (
+    authorize,
+    bool_arg,
+    build_health,
+    build_refresher,
+    page_args,
+    parse_team_ids,
+    response_cache,
+    with_staleness
+)
 
 # Load environment variables from .env file
 load_dotenv()
 
 app = Flask(__name__)
 initialize_database()
+response_cache.warm_load()
+
+def cached_schedule(nfl_id: int) -> dict:
+    return response_cache.get_or_load(
+        "schedule", nfl_id, lambda: schedule_model.load_schedule(nfl_id, CACHE_SCHEDULE_TTL))
+
+def cached_roster(nfl_id: int) -> dict:
+    return response_cache.get_or_load(
+        "roster", nfl_id, lambda: schedule_model.load_roster(nfl_id, CACHE_ROSTER_TTL))
+
+# This entry point's own background services; Flask has no startup hook, so they start here
+refresher = build_refresher()
+if REFRESH_ENABLED:
+    refresher.start()
+
+# Snapshot the database in the background with the online backup API
+backups = BackupScheduler()
+if BACKUP_ENABLED:
+    backups.start()
+
+# Readiness is read from a snapshot refreshed in the background, so probes cost no I/O
+health = build_health(lambda: [get_espn_client()])
+health.start()
+
+def writes_database(view):
+    """Mark a GET route that writes, e.g. to store what it fetched from ESPN."""
+    view.writes_database = True
+    return view
+
+def reads_database(view):
+    """Mark a POST route that only reads, e.g. to check credentials."""
+    view.reads_database = True
+    return view
+
+# Every request gets one unit of work: model calls share a single connection and
+# transaction, committed when the request ends, or rolled back if it failed.
+# GET requests read through read-only connections so they never wait on writers.
+@app.before_request
+def open_unit_of_work() -> None:
+    view = app.view_functions.get(request.endpoint)
+    read_only = getattr(view, 'reads_database', False) or (
+        request.method in ('GET', 'HEAD') and not getattr(view, 'writes_database', False))
+    g.unit_of_work = begin_unit_of_work(read_only=read_only)
+
+@app.after_request
+def fail_unit_of_work_on_error(response: Response) -> Response:
+    if response.status_code >= 500 and 'unit_of_work' in g:
+        g.unit_of_work.rollback_only = True
+    return response
+
+@app.teardown_request
+def close_unit_of_work(error=None) -> None:
+    uow = g.pop('unit_of_work', None)
+    if uow is not None:
+        end_unit_of_work(uow, error)
 
 
 
@@ -36,34 +111,108 @@ initialize_database()
 @app.route('/api/health', methods=['GET'])
 def healthcheck() -> Response:
     """
-    Health check route to verify the service is running.
+    Liveness probe: answers as long as the process serves requests, without
+    touching any dependency.
 
     Returns:
         JSON response indicating the health status of the service.
     """
-    app.logger.info('Health check')
     return make_response(jsonify({'status': 'healthy'}), 200)
 
+@app.route('/api/ready', methods=['GET'])
+def readiness() -> Response:
+    """
+    Readiness probe, answered from the last background health snapshot.
+
+    Query Parameters:
+        - deep (bool): Run every check now, including a database integrity
+          check and a request to ESPN, instead of reading the snapshot.
+
+    Returns:
+        JSON response with the status of each dependency: 200 if ready, 503 if not.
+    Raises:
+        400 error if deep is not true or false.
+    """
+    try:
+        deep = bool_arg(request.args, 'deep')
+    except ValueError as e:
+        return make_response(jsonify({'error': str(e)}), 400)
+    status = health.deep_check() if deep else health.snapshot()
+    return make_response(jsonify(status), 200 if status['ready'] else 503)
+
 @app.route('/api/db-check', methods=['GET'])
 def db_check() -> Response:
     """
-    Route to check if the database connection and teams table are functional.
+    Route to check if the database is functional, from the last background
+    health snapshot.
 
     Returns:
         JSON response indicating the database health status.
     Raises:
         404 error if there is an issue with the database.
     """
-    try:
-        app.logger.info("Checking database connection...")
-        check_database_connection()
-        app.logger.info("Database connection is OK.")
-        app.logger.info("Checking if teams table exists...")
-        check_table_exists("teams")
-        app.logger.info("teams table exists.")
+    database = health.snapshot()['checks'].get('database', {})
+    if database.get('ok'):
         return make_response(jsonify({'database_status': 'healthy'}), 200)
-    except Exception as e:
-        return make_response(jsonify({'error': str(e)}), 404)
+    return make_response(jsonify({'error': database.get('error', 'Database is not ready')}), 404)
+
+@app.route('/api/metrics', methods=['GET'])
+def metrics() -> Response:
+    """
+    Route to expose internal counters for sizing and tuning.
+
+    Returns:
+        JSON response with the response cache, disk cache, database pool,
+        favorites group commit, teams read cache, upstream coalescing, per-URL unchanged, rate limiter queue wait
+        and database backup statistics.
+    """
+    return make_response(jsonify({
+        'response_cache': response_cache.stats(),
+        'disk_cache': get_disk_cache().stats(),
+        'db_pool': {'write': get_pool().stats(), 'read': get_read_pool().stats()},
+        'favorites_writes': locker_model.favorites_queue.stats(),
+        'user_favorites_writes': locker_model.user_favorites_queue.stats(),
+        'teams_read_cache': locker_model.teams_cache.stats(),
+        'espn_single_flight': get_espn_client().single_flight.stats(),
+        'espn_unchanged': get_espn_client().change_stats(),
+        'espn_rate_limit': get_espn_client().rate_limiter.stats(),
+        'backups': backups.stats(),
+    }), 200)
+
+@app.route('/api/refresh-status', methods=['GET'])
+def refresh_status() -> Response:
+    """
+    Route to show the background refresher's progress.
+
+    Returns:
+        JSON response with the last refresh time and error for every team.
+    """
+    return make_response(jsonify(refresher.status()), 200)
+
+@app.route('/api/espn-status', methods=['GET'])
+def espn_status() -> Response:
+    """
+    Route to show the ESPN circuit breakers.
+
+    Returns:
+        JSON response with the state, recent failure and slow-call rates and
+        recent transitions of the teams, schedule and roster breakers.
+    """
+    return make_response(jsonify({'breakers': get_espn_client().breaker_status()}), 200)
+
+@app.route('/api/sql-stats', methods=['GET'])
+def sql_stats() -> Response:
+    """
+    Route to show how long the SQL statements take.
+
+    Query Parameters:
+        - limit (int): How many statements to list, most total time first (default 50).
+
+    Returns:
+        JSON response with per-statement counts, rows, durations and histograms,
+        and the slow query log.
+    """
+    return make_response(jsonify(sql_tracer.stats(limit=request.args.get('limit', 50, type=int))), 200)
     
 ##########################################################
 #
@@ -86,6 +235,7 @@ def create_account():
         return jsonify({'error': str(e)}), 400
 
 @app.route('/api/login', methods=['POST'])
+@reads_database
 def login():
     """Verify user login."""
     data = request.get_json()
@@ -93,7 +243,8 @@ def login():
     password = data.get('password')
     
     if user_model.verify_user(username, password):
-        return jsonify({'message': 'Login successful'}), 200
+        # The token authorizes the user's own /api/users/<username> routes
+        return jsonify({'message': 'Login successful', 'token': user_model.issue_token(username)}), 200
     return jsonify({'error': 'Invalid credentials'}), 401
 
 @app.route('/api/update-password', methods=['POST'])
@@ -190,29 +341,192 @@ def remove_team_from_fav() -> Response:
         app.logger.error("Failed to remove team: %s", str(e))
         return make_response(jsonify({'error': str(e)}), 500)
 
+@app.route('/api/teams', methods=['GET'])
+def list_teams() -> Response:
+    """
+    Route to list the stored NFL teams, one page at a time.
+
+    Query Parameters:
+        - cursor (str): next_cursor of the previous page; omit for the first page.
+        - limit (int): Page size, at most TEAMS_PAGE_MAX (default TEAMS_PAGE_SIZE).
+        - loc (str): Only teams from this location.
+        - favorite (bool): Only teams marked (true) or not marked (false) as favorite.
+        - sort (str): id, team or nfl_id, optionally prefixed with - for descending.
+
+    Returns:
+        JSON response with the page of teams and the cursor of the next page.
+    Raises:
+        400 error if a parameter or the cursor is invalid.
+    """
+    try:
+        paging = page_args(request.args)
+        favorite = bool_arg(request.args, 'favorite')
+        teams, next_cursor = locker_model.list_teams(
+            loc=request.args.get('loc'), favorite=favorite, **paging)
+        return make_response(jsonify({'status': 'success', 'teams': teams, 'next_cursor': next_cursor}), 200)
+    except ValueError as e:
+        return make_response(jsonify({'error': str(e)}), 400)
+    except Exception as e:
+        app.logger.error("Failed to list teams: %s", str(e))
+        return make_response(jsonify({'error': str(e)}), 500)
+
 @app.route('/api/get-favs', methods=['GET'])
 def get_favorites():
     """
-    Route to get all NFL teams marked as favorite.
+    Route to get the NFL teams marked as favorite, one page at a time.
 
-    Expected JSON Input:
-        none
+    Query Parameters:
+        - cursor (str): next_cursor of the previous page; omit for the first page.
+        - limit (int): Page size, at most TEAMS_PAGE_MAX (default TEAMS_PAGE_SIZE).
+        - sort (str): id, team or nfl_id, optionally prefixed with - for descending.
 
     Returns:
-        JSON response indicating the success of favorites retrieval.
+        JSON response with the page of favorites and the cursor of the next page.
     Raises:
+        400 error if a parameter or the cursor is invalid.
         500 error if there is an issue retrieving teams marked as favorite.
     """
-    app.logger.info("Retrieving all teams marked favorite")
+    app.logger.info("Retrieving teams marked favorite")
     try:
-        fav_data = locker_model.get_favorites()
+        fav_data, next_cursor = locker_model.get_favorites(**page_args(request.args))
+
+        return make_response(jsonify({'status': 'success', 'favorites': fav_data, 'next_cursor': next_cursor}), 200)
+    except ValueError as e:
+        return make_response(jsonify({'error': str(e)}), 400)
+    except Exception as e:
+        app.logger.error("Failed to retrieve favorites: %s", str(e))
+        return make_response(jsonify({'error': str(e)}), 500)
 
+@app.route('/api/standings', methods=['GET'])
+def get_standings() -> Response:
+    """
+    Route to get the standings, from the records kept up to date as schedules sync.
+
+    Query Parameters:
+        - conference (str): Only teams of this conference (AFC or NFC).
+        - division (str): Only teams of this division (East, North, South or West).
+
+    Returns:
+        JSON response with the teams ordered by conference, division, win
+        percentage and point differential.
+    Raises:
+        400 error if the conference or division is unknown.
+        500 error if there is an issue retrieving the standings.
+    """
+    try:
+        standings = standings_model.get_standings(conference=request.args.get('conference'),
+                                                  division=request.args.get('division'))
+        return make_response(jsonify({'status': 'success', 'standings': standings}), 200)
+    except ValueError as e:
+        return make_response(jsonify({'error': str(e)}), 400)
+    except Exception as e:
+        app.logger.error("Failed to retrieve standings: %s", str(e))
+        return make_response(jsonify({'error': str(e)}), 500)
+
+@app.route('/api/users/<username>/favorites', methods=['GET'])
+def get_user_favorites(username: str) -> Response:
+    """
+    Route to get a user's favorite teams.
+
+    Path Parameters:
+        - username (str): The user whose favorites to list.
+
+    Headers:
+        - Authorization: Bearer <token>, the token /api/login returned to that user.
+
+    Returns:
+        JSON response with the user's favorite teams.
+    Raises:
+        401 error if the token is missing, invalid or expired.
+        403 error if the token belongs to another user.
+        404 error if the user does not exist.
+        500 error if there is an issue retrieving the favorites.
+    """
+    denied = authorize(request.headers.get('Authorization'), username)
+    if denied:
+        return make_response(jsonify(denied[0]), denied[1])
+    app.logger.info("Retrieving favorites of user %s", username)
+    try:
+        user_id = user_model.get_user_id(username)
+        fav_data = locker_model.get_user_favorites(user_id)
         return make_response(jsonify({'status': 'success', 'favorites': fav_data}), 200)
+    except ValueError as e:
+        return make_response(jsonify({'error': str(e)}), 404)
     except Exception as e:
         app.logger.error("Failed to retrieve favorites: %s", str(e))
         return make_response(jsonify({'error': str(e)}), 500)
 
+@app.route('/api/users/<username>/favorites', methods=['POST'])
+def add_user_favorite(username: str) -> Response:
+    """
+    Route to add a team to a user's favorites.
+
+    Path Parameters:
+        - username (str): The user whose favorites to change.
+
+    Headers:
+        - Authorization: Bearer <token>, the token /api/login returned to that user.
+
+    Expected JSON Input:
+        - nfl_id (int): The NFL-assigned id of the team.
+
+    Returns:
+        JSON response indicating the success of adding the team.
+    Raises:
+        401 error if the token is missing, invalid or expired.
+        403 error if the token belongs to another user.
+        404 error if the user or team does not exist.
+        500 error if there is an issue adding the team to favorites.
+    """
+    denied = authorize(request.headers.get('Authorization'), username)
+    if denied:
+        return make_response(jsonify(denied[0]), denied[1])
+    try:
+        nfl_id = request.get_json().get('nfl_id')
+        app.logger.info("Adding team %s to favorites of user %s", nfl_id, username)
+        locker_model.add_user_favorite(user_model.get_user_id(username), nfl_id)
+        return make_response(jsonify({'status': 'success'}), 200)
+    except ValueError as e:
+        return make_response(jsonify({'error': str(e)}), 404)
+    except Exception as e:
+        app.logger.error("Failed to add team: %s", str(e))
+        return make_response(jsonify({'error': str(e)}), 500)
+
+@app.route('/api/users/<username>/favorites/<int:nfl_id>', methods=['DELETE'])
+def remove_user_favorite(username: str, nfl_id: int) -> Response:
+    """
+    Route to remove a team from a user's favorites.
+
+    Path Parameters:
+        - username (str): The user whose favorites to change.
+        - nfl_id (int): The NFL-assigned id of the team.
+
+    Headers:
+        - Authorization: Bearer <token>, the token /api/login returned to that user.
+
+    Returns:
+        JSON response indicating the success of removing the team.
+    Raises:
+        401 error if the token is missing, invalid or expired.
+        403 error if the token belongs to another user.
+        404 error if the user or team does not exist.
+        500 error if there is an issue removing the team from favorites.
+    """
+    denied = authorize(request.headers.get('Authorization'), username)
+    if denied:
+        return make_response(jsonify(denied[0]), denied[1])
+    try:
+        app.logger.info("Removing team %d from favorites of user %s", nfl_id, username)
+        locker_model.remove_user_favorite(user_model.get_user_id(username), nfl_id)
+        return make_response(jsonify({'status': 'success'}), 200)
+    except ValueError as e:
+        return make_response(jsonify({'error': str(e)}), 404)
+    except Exception as e:
+        app.logger.error("Failed to remove team: %s", str(e))
+        return make_response(jsonify({'error': str(e)}), 500)
+
 @app.route('/api/get-teams', methods=['GET'])
+@writes_database
 def get_nfl_teams():
     """
     Route to add all NFL teams to the database.
@@ -221,21 +535,30 @@ def get_nfl_teams():
         none
 
     Returns:
-        JSON response indicating the success of the addition of all teams.
+        JSON response with how many teams were inserted, updated or unchanged.
     Raises:
         500 error if there is an issue retrieving NFL teams from external API.
     """
     app.logger.info("Retrieving all NFL teams from ESPN")
     try:
-        url = f"https://site.api.espn.com/apis/site/v2/sports/football/nfl/teams"
-        response = requests.get(url)
-        data = response.json()
-        for t in data["sports"][0]["leagues"][0]["teams"]:
-            nfl_id = t["team"]["id"]
-            team = t["team"]["name"]
-            loc = t["team"]["location"]
-            locker_model.create_team(team, nfl_id, loc)
-        return make_response(jsonify({'status': 'success'}), 200)
+        # Once teams are stored, only re-ingest them if ESPN reports a change
+        only_if_changed = bool(locker_model.get_team_ids())
+        # Don't hold the request's pooled connection while waiting on ESPN
+        with outside_unit_of_work():
+            teams = get_espn_client().teams(only_if_changed=only_if_changed)
+        if teams is None:
+            app.logger.info("NFL teams unchanged since the last sync")
+            return make_response(jsonify({'status': 'success'}), 200)
+        counts = locker_model.bulk_upsert_teams(teams)
+        if counts['inserted']:
+            # Their games seen before they were stored can be recorded now
+            standings_model.record_pending_results()
+            # Warm the new teams now rather than on the next cycle
+            refresher.wake()
+        return make_response(jsonify({'status': 'success', **counts}), 200)
+    except CircuitOpenError as e:
+        app.logger.warning("Skipping NFL team sync: %s", str(e))
+        return make_response(jsonify({'error': str(e)}), 503)
     except Exception as e:
         app.logger.error("Failed to retrieve NFL teams from ESPN: %s", str(e))
         return make_response(jsonify({'error': str(e)}), 500)
@@ -245,6 +568,8 @@ def team_schedule(nfl_id: int) -> Response:
     """
     Route to retrieve team schedule by NFL team id.
 
+    Served from the local store, synced from ESPN when missing or stale.
+
     Expected JSON Input:
         - nfl_id (int): The NFL-assigned id of the team.
 
@@ -253,18 +578,19 @@ def team_schedule(nfl_id: int) -> Response:
     Raises:
         500 error if there is an issue retrieving team schedule from external API.
     """
-    app.logger.info("Retrieving the team schedule from ESPN")
+    app.logger.info("Retrieving the team schedule")
     try:
-        url = f"https://site.api.espn.com/apis/site/v2/sports/football/nfl/teams/{nfl_id}/schedule"
-        response = requests.get(url)
-        data = response.json()
-        events = {"events": []}
-        for e in data["events"]:
-            event = {"week": e["week"]["text"], "date": e["date"], "name": e["name"]}
-            events["events"].append(event)
+        schedule = cached_schedule(nfl_id)
+        events = with_staleness({"events": schedule["events"]}, schedule["synced_at"], CACHE_SCHEDULE_TTL)
         return make_response(jsonify(events), 200)
+    except ValueError as e:
+        app.logger.error("Unknown team for schedule: %s", str(e))
+        return make_response(jsonify({'error': str(e)}), 404)
+    except CircuitOpenError as e:
+        app.logger.warning("No stored schedule to serve: %s", str(e))
+        return make_response(jsonify({'error': str(e)}), 503)
     except Exception as e:
-        app.logger.error("Failed to retrieve the team schedule from ESPN: %s", str(e))
+        app.logger.error("Failed to retrieve the team schedule: %s", str(e))
         return make_response(jsonify({'error': str(e)}), 500)
 
 @app.route('/team-roster/<int:nfl_id>', methods=['GET'])
@@ -272,6 +598,8 @@ def team_roster(nfl_id: int) -> Response:
     """
     Route to retrieve team roster by NFL team id.
 
+    Served from the local store, synced from ESPN when missing or stale.
+
     Expected JSON Input:
         - nfl_id (int): The NFL-assigned id of the team.
 
@@ -280,20 +608,77 @@ def team_roster(nfl_id: int) -> Response:
     Raises:
         500 error if there is an issue retrieving team roster from external API.
     """
-    app.logger.info("Retrieving the team roster from ESPN")
+    app.logger.info("Retrieving the team roster")
     try:
-        url = f"https://site.api.espn.com/apis/site/v2/sports/football/nfl/teams/{nfl_id}/roster"
-        response = requests.get(url)
-        data = response.json()
-        roster = {"athletes": []}
-        for p in data["athletes"]:
-            for a in p["items"]:
-                athlete = {"name": a["displayName"], "age": a["age"], "position": p["position"]}
-                roster["athletes"].append(athlete)
+        stored = cached_roster(nfl_id)
+        roster = with_staleness({"athletes": stored["athletes"]}, stored["synced_at"], CACHE_ROSTER_TTL)
         return make_response(jsonify(roster), 200)
+    except ValueError as e:
+        app.logger.error("Unknown team for roster: %s", str(e))
+        return make_response(jsonify({'error': str(e)}), 404)
+    except CircuitOpenError as e:
+        app.logger.warning("No stored roster to serve: %s", str(e))
+        return make_response(jsonify({'error': str(e)}), 503)
     except Exception as e:
-        app.logger.error("Failed to retrieve the team roster from ESPN: %s", str(e))
+        app.logger.error("Failed to retrieve the team roster: %s", str(e))
         return make_response(jsonify({'error': str(e)}), 500)
 
+def _bulk_fetch(key: str, load, ttl: float) -> Response:
+    try:
+        nfl_ids = parse_team_ids(request.args.get('ids', ''))
+    except ValueError as e:
+        return make_response(jsonify({'error': str(e)}), 400)
+
+    # Teams that are not cached are fetched concurrently, so the call takes
+    # about as long as the slowest team rather than the sum of all of them
+    results = fan_out_blocking(nfl_ids, load)
+
+    teams = {}
+    for nfl_id, result in results.items():
+        if isinstance(result, ValueError):
+            teams[str(nfl_id)] = {'status': 404, 'error': str(result)}
+        elif isinstance(result, CircuitOpenError):
+            teams[str(nfl_id)] = {'status': 503, 'error': str(result)}
+        elif isinstance(result, Exception):
+            app.logger.error("Failed to retrieve %s for team %d: %s", key, nfl_id, str(result))
+            teams[str(nfl_id)] = {'status': 500, 'error': str(result)}
+        else:
+            teams[str(nfl_id)] = with_staleness({'status': 200, key: result[key]}, result['synced_at'], ttl)
+    return make_response(jsonify({'teams': teams}), 200)
+
+@app.route('/team-schedules', methods=['GET'])
+def team_schedules() -> Response:
+    """
+    Route to retrieve the schedules of several teams at once.
+
+    Query Parameters:
+        - ids (str): Comma-separated NFL-assigned team ids, e.g. ids=1,2,22.
+
+    Returns:
+        JSON response mapping each team id to its events, or to the error
+        that prevented its retrieval.
+    Raises:
+        400 error if the ids are missing, malformed or too many.
+    """
+    app.logger.info("Retrieving team schedules in bulk")
+    return _bulk_fetch("events", cached_schedule, CACHE_SCHEDULE_TTL)
+
+@app.route('/team-rosters', methods=['GET'])
+def team_rosters() -> Response:
+    """
+    Route to retrieve the rosters of several teams at once.
+
+    Query Parameters:
+        - ids (str): Comma-separated NFL-assigned team ids, e.g. ids=1,2,22.
+
+    Returns:
+        JSON response mapping each team id to its athletes, or to the error
+        that prevented its retrieval.
+    Raises:
+        400 error if the ids are missing, malformed or too many.
+    """
+    app.logger.info("Retrieving team rosters in bulk")
+    return _bulk_fetch("athletes", cached_roster, CACHE_ROSTER_TTL)
+
 if __name__ == '__main__':
     app.run(debug=True, host='0.0.0.0', port=5001)
@@ -0,0 +1,522 @@
+"""
+ASGI entry point: the API of app.py, served by async handlers.
+
+The models, database and caches are shared with app.py through
+team_tracker.web_common; this module builds its own refresher, backups and
+health monitor and starts them on the ASGI lifespan startup event. SQLite
+calls run on a small database thread pool and ESPN calls go through the
+asyncio ESPN client, so a worker can keep many slow upstream requests in
+flight without a thread for each. Run it with any ASGI server that sends
+lifespan events, e.g.
+
+    uvicorn asgi:app --host 0.0.0.0 --port 5001
+"""
+import asyncio
+import json
+import logging
+import re
+from typing import Any, Awaitable, Callable
+from urllib.parse import parse_qs
+
+from team_tracker.clients.espn import get_espn_client
+from team_tracker.clients.espn_async import get_async_espn_client
+from team_tracker.models import locker_model
+from team_tracker.models import schedule_model
+from team_tracker.models import standings_model
+from team_tracker.models import user_model
+from team_tracker.utils.async_db import run_db
+from team_tracker.utils.circuit_breaker import CircuitOpenError
+from team_tracker.utils.disk_cache import get_disk_cache
+from team_tracker.utils.fanout import BULK_CONCURRENCY
+from team_tracker.utils.logger import configure_logger
+from team_tracker.utils.response_cache import CACHE_ROSTER_TTL, CACHE_SCHEDULE_TTL
+from team_tracker.utils.scheduler import REFRESH_ENABLED
+from team_tracker.utils.sql_utils import get_pool, get_read_pool, initialize_database
+from team_tracker.utils.sql_utils import BackupScheduler, BACKUP_ENABLED, sql_tracer
+from team_tracker.web_common import (
+    authorize,
+    bool_arg,
+    build_health,
+    build_refresher,
+    page_args,
+    parse_team_ids,
+    response_cache,
+    with_staleness
+)
+
+
+logger = logging.getLogger(__name__)
+configure_logger(logger)
+
+initialize_database()
+
+# This entry point's own background services, started by _lifespan
+refresher = build_refresher()
+backups = BackupScheduler()
+# Requests here go through the asyncio client, so its breakers count too
+health = build_health(lambda: [get_espn_client(), get_async_espn_client()])
+
+
+class HttpError(Exception):
+    """Raised by a handler to answer with a JSON error and the given status."""
+
+    def __init__(self, status: int, message: str) -> None:
+        super().__init__(message)
+        self.status = status
+
+
+class Request:
+    def __init__(self, method: str, path: str, query: dict[str, list[str]], body: bytes,
+                 headers: dict[str, str]) -> None:
+        self.method = method
+        self.path = path
+        self.query = query
+        self.body = body
+        self.headers = headers  # lower-cased names
+
+    @property
+    def args(self) -> dict[str, str]:
+        """The first value of each query parameter, like Flask's request.args.get."""
+        return {name: values[0] for name, values in self.query.items()}
+
+    def get_json(self) -> Any:
+        try:
+            return json.loads(self.body)
+        except ValueError:
+            raise HttpError(400, "The request body is not valid JSON")
+
+
+Handler = Callable[..., Awaitable[tuple[dict, int]]]
+_routes: list[tuple[str, re.Pattern, set[str], Handler]] = []
+
+
+def route(path: str, method: str = "GET") -> Callable[[Handler], Handler]:
+    """
+    Register a handler for a path like Flask's: <name> segments are passed
+    to it as str keyword arguments, <int:name> segments as int.
+    """
+    pattern = re.compile("^" + re.sub(r"<int:(\w+)>", r"(?P<\1>\\d+)",
+                                      re.sub(r"<(\w+)>", r"(?P<\1>[^/]+)", path)) + "$")
+    ints = set(re.findall(r"<int:(\w+)>", path))
+
+    def register(handler: Handler) -> Handler:
+        _routes.append((method, pattern, ints, handler))
+        return handler
+    return register
+
+
+async def dispatch(request: Request) -> tuple[dict, int]:
+    allowed = False
+    for method, pattern, ints, handler in _routes:
+        match = pattern.match(request.path)
+        if match is None:
+            continue
+        allowed = True
+        if method == request.method or (method == "GET" and request.method == "HEAD"):
+            params = {name: int(value) if name in ints else value
+                      for name, value in match.groupdict().items()}
+            try:
+                return await handler(request, **params)
+            except HttpError as e:
+                return {'error': str(e)}, e.status
+    if allowed:
+        return {'error': 'Method not allowed'}, 405
+    return {'error': 'Not found'}, 404
+
+
+####################################################
+#
+# Healthchecks
+#
+####################################################
+
+
+@route('/api/health')
+async def healthcheck(request: Request) -> tuple[dict, int]:
+    """Liveness probe: answers as long as the process serves requests."""
+    return {'status': 'healthy'}, 200
+
+@route('/api/ready')
+async def readiness(request: Request) -> tuple[dict, int]:
+    """Readiness probe, answered from the last background health snapshot unless deep=true."""
+    try:
+        deep = bool_arg(request.args, 'deep')
+    except ValueError as e:
+        return {'error': str(e)}, 400
+    if deep:
+        status = await asyncio.to_thread(health.deep_check)
+    else:
+        status = health.snapshot()
+    return status, 200 if status['ready'] else 503
+
+@route('/api/db-check')
+async def db_check(request: Request) -> tuple[dict, int]:
+    """Route to check if the database is functional, from the last background health snapshot."""
+    database = health.snapshot()['checks'].get('database', {})
+    if database.get('ok'):
+        return {'database_status': 'healthy'}, 200
+    return {'error': database.get('error', 'Database is not ready')}, 404
+
+@route('/api/metrics')
+async def metrics(request: Request) -> tuple[dict, int]:
+    """Route to expose internal counters for sizing and tuning."""
+    client = get_async_espn_client()
+    return {
+        'response_cache': response_cache.stats(),
+        'disk_cache': get_disk_cache().stats(),
+        'db_pool': {'write': get_pool().stats(), 'read': get_read_pool().stats()},
+        'favorites_writes': locker_model.favorites_queue.stats(),
+        'user_favorites_writes': locker_model.user_favorites_queue.stats(),
+        'teams_read_cache': locker_model.teams_cache.stats(),
+        'espn_single_flight': client.single_flight.stats(),
+        'espn_unchanged': client.change_stats(),
+        'espn_rate_limit': client.rate_limiter.stats(),
+        'backups': backups.stats(),
+    }, 200
+
+@route('/api/refresh-status')
+async def refresh_status(request: Request) -> tuple[dict, int]:
+    """Route to show the background refresher's progress."""
+    return refresher.status(), 200
+
+@route('/api/espn-status')
+async def espn_status(request: Request) -> tuple[dict, int]:
+    """Route to show the ESPN circuit breakers."""
+    return {'breakers': get_async_espn_client().breaker_status()}, 200
+
+@route('/api/sql-stats')
+async def sql_stats(request: Request) -> tuple[dict, int]:
+    """Route to show how long the SQL statements take."""
+    try:
+        limit = int(request.args.get('limit', 50))
+    except ValueError:
+        limit = 50
+    return sql_tracer.stats(limit=limit), 200
+
+##########################################################
+#
+# User Routes
+#
+##########################################################
+
+
+@route('/api/create-account', method='POST')
+async def create_account(request: Request) -> tuple[dict, int]:
+    """Create new user account."""
+    data = request.get_json()
+    try:
+        await run_db(user_model.create_user, data.get('username'), data.get('password'))
+        return {'message': 'Account created'}, 201
+    except ValueError as e:
+        return {'error': str(e)}, 400
+
+@route('/api/login', method='POST')
+async def login(request: Request) -> tuple[dict, int]:
+    """Verify user login."""
+    data = request.get_json()
+    if await run_db(user_model.verify_user, data.get('username'), data.get('password'), read_only=True):
+        return {'message': 'Login successful', 'token': user_model.issue_token(data.get('username'))}, 200
+    return {'error': 'Invalid credentials'}, 401
+
+@route('/api/update-password', method='POST')
+async def update_password(request: Request) -> tuple[dict, int]:
+    """Update user password."""
+    try:
+        data = request.get_json()
+        username = data.get('username')
+        old_password = data.get('old_password')
+        new_password = data.get('new_password')
+
+        if not all([username, old_password, new_password]):
+            return {'error': 'Username, old password, and new password required'}, 400
+
+        if await run_db(user_model.update_password, username, old_password, new_password):
+            return {'message': 'Password updated successfully'}, 200
+        return {'error': 'Invalid username or password'}, 401
+
+    except Exception as e:
+        return {'error': str(e)}, 500
+
+##########################################################
+#
+# Teams
+#
+##########################################################
+
+@route('/api/add-to-fav', method='POST')
+async def add_team_to_fav(request: Request) -> tuple[dict, int]:
+    """Route to add a team to favorites by its NFL-assigned id."""
+    try:
+        nfl_id = request.get_json().get('nfl_id')
+        logger.info('Adding team to favorites: %s', nfl_id)
+        await run_db(locker_model.add_to_favorites, nfl_id)
+        return {'status': 'success'}, 200
+    except Exception as e:
+        logger.error("Failed to add team: %s", str(e))
+        return {'error': str(e)}, 500
+
+@route('/api/remove-from-fav', method='POST')
+async def remove_team_from_fav(request: Request) -> tuple[dict, int]:
+    """Route to remove a team from favorites by its NFL-assigned id."""
+    try:
+        nfl_id = request.get_json().get('nfl_id')
+        logger.info('Removing team from favorites: %s', nfl_id)
+        await run_db(locker_model.remove_from_favorites, nfl_id)
+        return {'status': 'success'}, 200
+    except Exception as e:
+        logger.error("Failed to remove team: %s", str(e))
+        return {'error': str(e)}, 500
+
+@route('/api/teams')
+async def list_teams(request: Request) -> tuple[dict, int]:
+    """Route to list the stored NFL teams, one page at a time."""
+    try:
+        paging = page_args(request.args)
+        favorite = bool_arg(request.args, 'favorite')
+        teams, next_cursor = await run_db(locker_model.list_teams, loc=request.args.get('loc'),
+                                          favorite=favorite, read_only=True, **paging)
+        return {'status': 'success', 'teams': teams, 'next_cursor': next_cursor}, 200
+    except ValueError as e:
+        return {'error': str(e)}, 400
+    except Exception as e:
+        logger.error("Failed to list teams: %s", str(e))
+        return {'error': str(e)}, 500
+
+@route('/api/get-favs')
+async def get_favorites(request: Request) -> tuple[dict, int]:
+    """Route to get the NFL teams marked as favorite, one page at a time."""
+    try:
+        fav_data, next_cursor = await run_db(locker_model.get_favorites, read_only=True,
+                                             **page_args(request.args))
+        return {'status': 'success', 'favorites': fav_data, 'next_cursor': next_cursor}, 200
+    except ValueError as e:
+        return {'error': str(e)}, 400
+    except Exception as e:
+        logger.error("Failed to retrieve favorites: %s", str(e))
+        return {'error': str(e)}, 500
+
+@route('/api/standings')
+async def get_standings(request: Request) -> tuple[dict, int]:
+    """Route to get the standings, from the records kept up to date as schedules sync."""
+    try:
+        standings = await run_db(standings_model.get_standings, read_only=True,
+                                 conference=request.args.get('conference'),
+                                 division=request.args.get('division'))
+        return {'status': 'success', 'standings': standings}, 200
+    except ValueError as e:
+        return {'error': str(e)}, 400
+    except Exception as e:
+        logger.error("Failed to retrieve standings: %s", str(e))
+        return {'error': str(e)}, 500
+
+@route('/api/users/<username>/favorites')
+async def get_user_favorites(request: Request, username: str) -> tuple[dict, int]:
+    """Route to get a user's favorite teams; needs the user's token from /api/login."""
+    denied = authorize(request.headers.get('authorization'), username)
+    if denied:
+        return denied
+    try:
+        user_id = await run_db(user_model.get_user_id, username, read_only=True)
+        fav_data = await run_db(locker_model.get_user_favorites, user_id, read_only=True)
+        return {'status': 'success', 'favorites': fav_data}, 200
+    except ValueError as e:
+        return {'error': str(e)}, 404
+    except Exception as e:
+        logger.error("Failed to retrieve favorites: %s", str(e))
+        return {'error': str(e)}, 500
+
+@route('/api/users/<username>/favorites', method='POST')
+async def add_user_favorite(request: Request, username: str) -> tuple[dict, int]:
+    """Route to add a team to a user's favorites; needs the user's token from /api/login."""
+    denied = authorize(request.headers.get('authorization'), username)
+    if denied:
+        return denied
+    try:
+        nfl_id = request.get_json().get('nfl_id')
+        user_id = await run_db(user_model.get_user_id, username, read_only=True)
+        await run_db(locker_model.add_user_favorite, user_id, nfl_id)
+        return {'status': 'success'}, 200
+    except ValueError as e:
+        return {'error': str(e)}, 404
+    except Exception as e:
+        logger.error("Failed to add team: %s", str(e))
+        return {'error': str(e)}, 500
+
+@route('/api/users/<username>/favorites/<int:nfl_id>', method='DELETE')
+async def remove_user_favorite(request: Request, username: str, nfl_id: int) -> tuple[dict, int]:
+    """Route to remove a team from a user's favorites; needs the user's token from /api/login."""
+    denied = authorize(request.headers.get('authorization'), username)
+    if denied:
+        return denied
+    try:
+        user_id = await run_db(user_model.get_user_id, username, read_only=True)
+        await run_db(locker_model.remove_user_favorite, user_id, nfl_id)
+        return {'status': 'success'}, 200
+    except ValueError as e:
+        return {'error': str(e)}, 404
+    except Exception as e:
+        logger.error("Failed to remove team: %s", str(e))
+        return {'error': str(e)}, 500
+
+@route('/api/get-teams')
+async def get_nfl_teams(request: Request) -> tuple[dict, int]:
+    """Route to add all NFL teams to the database."""
+    logger.info("Retrieving all NFL teams from ESPN")
+    try:
+        # Once teams are stored, only re-ingest them if ESPN reports a change
+        stored = await run_db(locker_model.get_team_ids, read_only=True)
+        teams = await get_async_espn_client().teams(only_if_changed=bool(stored))
+        if teams is None:
+            logger.info("NFL teams unchanged since the last sync")
+            return {'status': 'success'}, 200
+        counts = await run_db(locker_model.bulk_upsert_teams, teams)
+        if counts['inserted']:
+            # Their games seen before they were stored can be recorded now
+            await run_db(standings_model.record_pending_results)
+            # Warm the new teams now rather than on the next cycle
+            refresher.wake()
+        return {'status': 'success', **counts}, 200
+    except CircuitOpenError as e:
+        logger.warning("Skipping NFL team sync: %s", str(e))
+        return {'error': str(e)}, 503
+    except Exception as e:
+        logger.error("Failed to retrieve NFL teams from ESPN: %s", str(e))
+        return {'error': str(e)}, 500
+
+async def cached_schedule(nfl_id: int) -> dict:
+    return await response_cache.get_or_load_async(
+        "schedule", nfl_id, lambda: schedule_model.load_schedule_async(nfl_id, CACHE_SCHEDULE_TTL))
+
+async def cached_roster(nfl_id: int) -> dict:
+    return await response_cache.get_or_load_async(
+        "roster", nfl_id, lambda: schedule_model.load_roster_async(nfl_id, CACHE_ROSTER_TTL))
+
+async def _single_fetch(kind: str, key: str, load: Callable[[int], Awaitable[dict]], ttl: float,
+                        nfl_id: int) -> tuple[dict, int]:
+    try:
+        stored = await load(nfl_id)
+        return with_staleness({key: stored[key]}, stored["synced_at"], ttl), 200
+    except ValueError as e:
+        logger.error("Unknown team for %s: %s", kind, str(e))
+        return {'error': str(e)}, 404
+    except CircuitOpenError as e:
+        logger.warning("No stored %s to serve: %s", kind, str(e))
+        return {'error': str(e)}, 503
+    except Exception as e:
+        logger.error("Failed to retrieve the team %s: %s", kind, str(e))
+        return {'error': str(e)}, 500
+
+@route('/team-schedule/<int:nfl_id>')
+async def team_schedule(request: Request, nfl_id: int) -> tuple[dict, int]:
+    """Route to retrieve team schedule by NFL team id."""
+    return await _single_fetch("schedule", "events", cached_schedule, CACHE_SCHEDULE_TTL, nfl_id)
+
+@route('/team-roster/<int:nfl_id>')
+async def team_roster(request: Request, nfl_id: int) -> tuple[dict, int]:
+    """Route to retrieve team roster by NFL team id."""
+    return await _single_fetch("roster", "athletes", cached_roster, CACHE_ROSTER_TTL, nfl_id)
+
+async def _bulk_fetch(request: Request, key: str, load: Callable[[int], Awaitable[dict]],
+                      ttl: float) -> tuple[dict, int]:
+    try:
+        nfl_ids = parse_team_ids(request.args.get('ids', ''))
+    except ValueError as e:
+        return {'error': str(e)}, 400
+
+    # At most BULK_CONCURRENCY teams are loaded at a time, like the Flask fan-out
+    semaphore = asyncio.Semaphore(BULK_CONCURRENCY)
+
+    async def bounded(nfl_id: int) -> dict:
+        async with semaphore:
+            return await load(nfl_id)
+
+    results = await asyncio.gather(*(bounded(nfl_id) for nfl_id in nfl_ids), return_exceptions=True)
+
+    teams = {}
+    for nfl_id, result in zip(nfl_ids, results):
+        if isinstance(result, ValueError):
+            teams[str(nfl_id)] = {'status': 404, 'error': str(result)}
+        elif isinstance(result, CircuitOpenError):
+            teams[str(nfl_id)] = {'status': 503, 'error': str(result)}
+        elif isinstance(result, Exception):
+            logger.error("Failed to retrieve %s for team %d: %s", key, nfl_id, str(result))
+            teams[str(nfl_id)] = {'status': 500, 'error': str(result)}
+        else:
+            teams[str(nfl_id)] = with_staleness({'status': 200, key: result[key]}, result['synced_at'], ttl)
+    return {'teams': teams}, 200
+
+@route('/team-schedules')
+async def team_schedules(request: Request) -> tuple[dict, int]:
+    """Route to retrieve the schedules of several teams at once (?ids=1,2,22)."""
+    return await _bulk_fetch(request, "events", cached_schedule, CACHE_SCHEDULE_TTL)
+
+@route('/team-rosters')
+async def team_rosters(request: Request) -> tuple[dict, int]:
+    """Route to retrieve the rosters of several teams at once (?ids=1,2,22)."""
+    return await _bulk_fetch(request, "athletes", cached_roster, CACHE_ROSTER_TTL)
+
+##########################################################
+#
+# ASGI
+#
+##########################################################
+
+async def _read_body(receive: Callable[[], Awaitable[dict]]) -> bytes:
+    chunks = []
+    while True:
+        message = await receive()
+        chunks.append(message.get("body", b""))
+        if not message.get("more_body", False):
+            return b"".join(chunks)
+
+async def _lifespan(receive: Callable[[], Awaitable[dict]], send: Callable[[dict], Awaitable[None]]) -> None:
+    while True:
+        message = await receive()
+        if message["type"] == "lifespan.startup":
+            await asyncio.to_thread(response_cache.warm_load)
+            # Takes the first snapshot before the server reports it started
+            await asyncio.to_thread(health.start)
+            if REFRESH_ENABLED:
+                refresher.start()
+            if BACKUP_ENABLED:
+                backups.start()
+            await send({"type": "lifespan.startup.complete"})
+        elif message["type"] == "lifespan.shutdown":
+            if REFRESH_ENABLED:
+                await asyncio.to_thread(refresher.stop)
+            if BACKUP_ENABLED:
+                await asyncio.to_thread(backups.stop)
+            await asyncio.to_thread(health.stop)
+            await get_async_espn_client().close()
+            await send({"type": "lifespan.shutdown.complete"})
+            return
+
+async def app(scope: dict, receive: Callable[[], Awaitable[dict]], send: Callable[[dict], Awaitable[None]]) -> None:
+    """The ASGI application."""
+    if scope["type"] == "lifespan":
+        await _lifespan(receive, send)
+        return
+    if scope["type"] != "http":
+        raise ValueError(f"Unsupported ASGI scope type: {scope['type']}")
+
+    request = Request(
+        method=scope["method"],
+        path=scope["path"],
+        query=parse_qs(scope.get("query_string", b"").decode("latin-1")),
+        body=await _read_body(receive),
+        headers={name.decode("latin-1").lower(): value.decode("latin-1")
+                 for name, value in scope.get("headers", [])},
+    )
+    try:
+        body, status = await dispatch(request)
+    except Exception as e:
+        logger.error("Unhandled error serving %s %s: %s", request.method, request.path, str(e))
+        body, status = {'error': str(e)}, 500
+
+    content = (json.dumps(body) + "\n").encode("utf-8")
+    await send({
+        "type": "http.response.start",
+        "status": status,
+        "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(content)).encode())],
+    })
+    await send({"type": "http.response.body", "body": b"" if request.method == "HEAD" else content})
@@ -0,0 +1,117 @@
+"""
+Throughput and latency of a storm of favorite toggles, committed one by one
+and group-committed.
+
+Toggler threads add and remove random teams from favorites as fast as they
+can, for a fixed duration, against a scratch database in each mode:
+
+  direct   each toggle is its own UPDATE and commit on a pooled connection
+           (how add_to_favorites used to work)
+  grouped  toggles go through the favorites GroupCommitQueue, which commits
+           whatever arrived within the batch window in one transaction
+
+Run from the repository root:
+
+    python -m benchmarks.favorites_toggle_storm --threads 32 --seconds 5
+"""
+import argparse
+import os
+import random
+import sqlite3
+import statistics
+import tempfile
+import threading
+import time
+from typing import Callable
+
+from team_tracker.models import locker_model
+from team_tracker.utils import sql_utils
+from team_tracker.utils.migrations import apply_migrations
+from team_tracker.utils.write_queue import GroupCommitQueue, WRITE_BATCH_WINDOW_MS
+
+
+TEAM_IDS = list(range(1, 33))
+
+
+def _seed(path: str) -> None:
+    conn = sqlite3.connect(path)
+    apply_migrations(conn)
+    conn.executemany("INSERT INTO teams (team, nfl_id, loc) VALUES (?, ?, ?)",
+                     [(f"Team {i}", i, f"City {i}") for i in TEAM_IDS])
+    conn.commit()
+    conn.close()
+
+
+def _direct(nfl_id: int, favorite: bool) -> None:
+    locker_model._write_favorites({nfl_id: favorite})
+
+
+def run(mode: str, threads: int, seconds: float, window_ms: float) -> dict:
+    with tempfile.TemporaryDirectory() as tmp:
+        sql_utils.DB_PATH = os.path.join(tmp, "bench.db")
+        _seed(sql_utils.DB_PATH)
+
+        queue = GroupCommitQueue("favorites", locker_model._write_favorites, window_ms=window_ms)
+        toggle: Callable[[int, bool], None] = _direct if mode == "direct" else queue.submit
+
+        deadline = time.monotonic() + seconds
+        latencies: list[float] = []
+        counts = {"errors": 0}
+        lock = threading.Lock()
+
+        def toggler() -> None:
+            mine = []
+            while time.monotonic() < deadline:
+                started = time.perf_counter()
+                try:
+                    toggle(random.choice(TEAM_IDS), random.random() < 0.5)
+                except sqlite3.OperationalError:
+                    with lock:
+                        counts["errors"] += 1
+                    continue
+                mine.append(time.perf_counter() - started)
+            with lock:
+                latencies.extend(mine)
+
+        workers = [threading.Thread(target=toggler) for _ in range(threads)]
+        for t in workers:
+            t.start()
+        for t in workers:
+            t.join()
+
+        for pool in sql_utils._pools.values():
+            pool.close()
+        sql_utils._pools.clear()
+
+    commits = len(latencies) if mode == "direct" else queue.stats()["commits"]
+    latencies_ms = sorted(latency * 1000 for latency in latencies)
+    quantiles = statistics.quantiles(latencies_ms, n=100) if len(latencies_ms) > 1 else [0.0] * 99
+    return {
+        "mode": mode,
+        "toggles_per_s": len(latencies_ms) / seconds,
+        "commits_per_s": commits / seconds,
+        "p50_ms": quantiles[49],
+        "p99_ms": quantiles[98],
+        "errors": counts["errors"],
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--threads", type=int, default=32)
+    parser.add_argument("--seconds", type=float, default=5.0)
+    parser.add_argument("--window-ms", type=float, default=WRITE_BATCH_WINDOW_MS)
+    parser.add_argument("--modes", nargs="+", default=["direct", "grouped"], choices=["direct", "grouped"])
+    args = parser.parse_args()
+
+    print(f"{args.threads} threads, {args.seconds:g}s per mode, batch window {args.window_ms:g} ms, "
+          f"synchronous={sql_utils.DB_PRAGMAS['synchronous']}")
+    print(f"{'mode':<9}{'toggles/s':>11}{'commits/s':>11}{'p50 ms':>9}{'p99 ms':>9}{'errors':>8}")
+    for mode in args.modes:
+        r = run(mode, args.threads, args.seconds, args.window_ms)
+        print(f"{r['mode']:<9}{r['toggles_per_s']:>11.0f}{r['commits_per_s']:>11.0f}"
+              f"{r['p50_ms']:>9.2f}{r['p99_ms']:>9.2f}{r['errors']:>8}")
+
+
+if __name__ == "__main__":
+    main()
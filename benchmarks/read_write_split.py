@@ -0,0 +1,167 @@
+"""
+Mixed read/write throughput of the database layer, before and after the
+read/write connection split.
+
+Reader threads list favorites (the /api/get-favs query) while writer threads
+toggle favorites (the /api/add-to-fav and /api/remove-from-fav updates), for
+a fixed duration, against a scratch database in each mode:
+
+  legacy  a new read-write connection per call, default rollback journal
+          (how get_db_connection used to work)
+  shared  one pool of read-write WAL connections for readers and writers
+  split   read-only connections from the read pool for readers, the small
+          write pool for writers
+
+Run from the repository root:
+
+    python -m benchmarks.read_write_split --readers 8 --writers 2 --seconds 5
+"""
+import argparse
+from contextlib import contextmanager
+import os
+import random
+import sqlite3
+import statistics
+import tempfile
+import threading
+import time
+from typing import Callable, ContextManager, Iterator
+
+from team_tracker.utils.migrations import apply_migrations
+from team_tracker.utils.sql_utils import ConnectionPool, DB_PRAGMAS, DB_WRITE_POOL_SIZE
+
+
+READ_QUERY = "SELECT id, team, nfl_id, loc FROM teams WHERE favorite = TRUE"
+WRITE_QUERY = "UPDATE teams SET favorite = ? WHERE nfl_id = ?"
+TEAM_IDS = list(range(1, 33))
+
+Connect = Callable[[], ContextManager[sqlite3.Connection]]
+
+
+def _seed(path: str) -> None:
+    conn = sqlite3.connect(path)
+    apply_migrations(conn)
+    conn.executemany("INSERT INTO teams (team, nfl_id, loc) VALUES (?, ?, ?)",
+                     [(f"Team {i}", i, f"City {i}") for i in TEAM_IDS])
+    conn.commit()
+    conn.close()
+
+
+def _pooled(pool: ConnectionPool) -> Connect:
+    @contextmanager
+    def connect() -> Iterator[sqlite3.Connection]:
+        conn = pool.acquire()
+        try:
+            yield conn
+        finally:
+            pool.release(conn)
+    return connect
+
+
+def _legacy(path: str) -> Connect:
+    @contextmanager
+    def connect() -> Iterator[sqlite3.Connection]:
+        conn = sqlite3.connect(path)
+        try:
+            yield conn
+        finally:
+            conn.close()
+    return connect
+
+
+def _connectors(mode: str, path: str, readers: int, writers: int) -> tuple[Connect, Connect]:
+    if mode == "legacy":
+        connect = _legacy(path)
+        return connect, connect
+    if mode == "shared":
+        pool = ConnectionPool(path, size=readers + writers)
+        return _pooled(pool), _pooled(pool)
+    read_pool = ConnectionPool(path, size=readers, read_only=True)
+    write_pool = ConnectionPool(path, size=min(writers, DB_WRITE_POOL_SIZE))
+    return _pooled(read_pool), _pooled(write_pool)
+
+
+def run(mode: str, readers: int, writers: int, seconds: float) -> dict:
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bench.db")
+        _seed(path)
+        if mode == "legacy":
+            conn = sqlite3.connect(path)
+            conn.execute("PRAGMA journal_mode = DELETE;")
+            conn.close()
+        read_connect, write_connect = _connectors(mode, path, readers, writers)
+
+        deadline = time.monotonic() + seconds
+        read_latencies: list[float] = []
+        counts = {"writes": 0, "errors": 0}
+        lock = threading.Lock()
+
+        def reader() -> None:
+            latencies = []
+            while time.monotonic() < deadline:
+                started = time.perf_counter()
+                try:
+                    with read_connect() as conn:
+                        conn.execute(READ_QUERY).fetchall()
+                except sqlite3.OperationalError:
+                    with lock:
+                        counts["errors"] += 1
+                    continue
+                latencies.append(time.perf_counter() - started)
+            with lock:
+                read_latencies.extend(latencies)
+
+        def writer() -> None:
+            done = 0
+            while time.monotonic() < deadline:
+                try:
+                    with write_connect() as conn:
+                        conn.execute(WRITE_QUERY, (random.random() < 0.5, random.choice(TEAM_IDS)))
+                        conn.commit()
+                except sqlite3.OperationalError:
+                    with lock:
+                        counts["errors"] += 1
+                    continue
+                done += 1
+            with lock:
+                counts["writes"] += done
+
+        threads = [threading.Thread(target=reader) for _ in range(readers)]
+        threads += [threading.Thread(target=writer) for _ in range(writers)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+    latencies_ms = sorted(latency * 1000 for latency in read_latencies)
+    quantiles = statistics.quantiles(latencies_ms, n=100) if len(latencies_ms) > 1 else [0.0] * 99
+    return {
+        "mode": mode,
+        "reads_per_s": len(latencies_ms) / seconds,
+        "writes_per_s": counts["writes"] / seconds,
+        "read_p50_ms": quantiles[49],
+        "read_p99_ms": quantiles[98],
+        "errors": counts["errors"],
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--readers", type=int, default=8)
+    parser.add_argument("--writers", type=int, default=2)
+    parser.add_argument("--seconds", type=float, default=5.0)
+    parser.add_argument("--modes", nargs="+", default=["legacy", "shared", "split"],
+                        choices=["legacy", "shared", "split"])
+    args = parser.parse_args()
+
+    print(f"{args.readers} readers, {args.writers} writers, {args.seconds:g}s per mode, "
+          f"synchronous={DB_PRAGMAS['synchronous']}")
+    print(f"{'mode':<8}{'reads/s':>10}{'writes/s':>10}{'read p50 ms':>13}{'read p99 ms':>13}{'errors':>8}")
+    for mode in args.modes:
+        r = run(mode, args.readers, args.writers, args.seconds)
+        print(f"{r['mode']:<8}{r['reads_per_s']:>10.0f}{r['writes_per_s']:>10.0f}"
+              f"{r['read_p50_ms']:>13.2f}{r['read_p99_ms']:>13.2f}{r['errors']:>8}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,14 +1,11 @@
 #!/bin/bash
 
-# Check if the database file already exists
+# Create the database, or migrate an existing one in place. Migrations are
+# forward-only and never drop data, so this is safe on every container start.
 if [ -f "$DB_PATH" ]; then
-    echo "Recreating database at $DB_PATH."
-    # Drop and recreate the tables
-    sqlite3 "$DB_PATH" < /app/sql/create_team_table.sql
-    echo "Database recreated successfully."
+    echo "Migrating database at $DB_PATH."
 else
     echo "Creating database at $DB_PATH."
-    # Create the database for the first time
-    sqlite3 "$DB_PATH" < /app/sql/create_team_table.sql
-    echo "Database created successfully."
 fi
+python -c "from team_tracker.utils.sql_utils import initialize_database; initialize_database()"
+echo "Database is up to date."
@@ -0,0 +1,211 @@
+import asyncio
+from dataclasses import dataclass, field
+import logging
+import ssl
+from typing import Optional
+from urllib.parse import urlsplit
+
+from team_tracker.utils.logger import configure_logger
+
+
+logger = logging.getLogger(__name__)
+configure_logger(logger)
+
+
+RETRY_STATUSES = (500, 502, 503, 504)
+
+
+class HttpError(Exception):
+    """Raised when a request cannot be completed (connection, protocol or timeout)."""
+
+
+class HttpTimeout(HttpError):
+    """Raised when connecting or reading the response takes too long."""
+
+
+class HttpConnectionClosed(HttpError):
+    """Raised when the server reset or closed the connection mid-request."""
+
+
+@dataclass
+class AsyncResponse:
+    status_code: int
+    headers: dict[str, str]  # lower-cased names
+    content: bytes = b""
+
+
+@dataclass
+class _Connection:
+    reader: asyncio.StreamReader
+    writer: asyncio.StreamWriter
+    reused: bool = field(default=False)
+
+    def close(self) -> None:
+        self.writer.close()
+
+
+class AsyncHttpClient:
+    """
+    Minimal non-blocking HTTP/1.1 client for JSON GETs, on asyncio streams.
+
+    It does what the ESPN client needs from requests + urllib3, without a
+    thread per in-flight request: keep-alive connections pooled per host
+    (at most `pool_size` open at once per host, extra callers wait for one),
+    connect and read timeouts, and retries with exponential backoff on
+    connection errors and 5xx responses.
+
+    Connections belong to the event loop that opened them; the pool starts
+    over when used from a different loop.
+    """
+
+    def __init__(self, pool_size: int = 100, connect_timeout: float = 3.05, read_timeout: float = 10,
+                 max_retries: int = 3, backoff: float = 0.3) -> None:
+        self.pool_size = pool_size
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._idle: dict[tuple, list[_Connection]] = {}
+        self._slots: dict[tuple, asyncio.Semaphore] = {}
+
+    def _bind_loop(self) -> None:
+        loop = asyncio.get_running_loop()
+        if loop is not self._loop:
+            self._loop = loop
+            self._idle = {}
+            self._slots = {}
+
+    async def get(self, url: str, headers: Optional[dict] = None) -> AsyncResponse:
+        """
+        GET a URL, retrying connection errors and 5xx responses.
+
+        After the last retry a 5xx response is returned rather than raised.
+
+        Raises:
+            HttpTimeout: If connecting or reading timed out on every attempt.
+            HttpError: If the request failed on every attempt.
+        """
+        self._bind_loop()
+        for attempt in range(self.max_retries + 1):
+            last = attempt == self.max_retries
+            try:
+                response = await self._get_once(url, headers or {})
+            except HttpError:
+                if last:
+                    raise
+            else:
+                if response.status_code not in RETRY_STATUSES or last:
+                    return response
+            await asyncio.sleep(self.backoff * (2 ** attempt))
+        raise AssertionError("unreachable")
+
+    async def _get_once(self, url: str, headers: dict) -> AsyncResponse:
+        parts = urlsplit(url)
+        secure = parts.scheme == "https"
+        port = parts.port or (443 if secure else 80)
+        host_key = (parts.scheme, parts.hostname, port)
+        target = (parts.path or "/") + (f"?{parts.query}" if parts.query else "")
+        host_header = parts.hostname if parts.port is None else f"{parts.hostname}:{port}"
+
+        slots = self._slots.setdefault(host_key, asyncio.Semaphore(self.pool_size))
+        async with slots:
+            conn = await self._checkout(host_key, secure)
+            try:
+                response, keep_alive = await self._exchange_or_close(conn, host_header, target, headers)
+            except HttpConnectionClosed:
+                if not conn.reused:
+                    raise
+                # The server may have closed an idle keep-alive connection; try a fresh one.
+                # Not after a timeout, which a fresh connection would only wait out again.
+                conn = await self._checkout(host_key, secure, fresh=True)
+                response, keep_alive = await self._exchange_or_close(conn, host_header, target, headers)
+            if keep_alive:
+                conn.reused = True
+                self._idle.setdefault(host_key, []).append(conn)
+            else:
+                conn.close()
+            return response
+
+    async def _checkout(self, host_key: tuple, secure: bool, fresh: bool = False) -> _Connection:
+        idle = self._idle.get(host_key)
+        if idle and not fresh:
+            return idle.pop()
+        _, host, port = host_key
+        try:
+            reader, writer = await asyncio.wait_for(
+                asyncio.open_connection(host, port, ssl=ssl.create_default_context() if secure else None),
+                self.connect_timeout,
+            )
+        except asyncio.TimeoutError:
+            raise HttpTimeout(f"Connecting to {host}:{port} timed out")
+        except OSError as e:
+            raise HttpError(f"Connecting to {host}:{port} failed: {e}")
+        return _Connection(reader, writer)
+
+    async def _exchange_or_close(self, conn: _Connection, host: str, target: str,
+                                 headers: dict) -> tuple[AsyncResponse, bool]:
+        try:
+            return await self._exchange(conn, host, target, headers)
+        except BaseException:
+            # Failed or cancelled mid-request, so the connection can't go back to the pool
+            conn.close()
+            raise
+
+    async def _exchange(self, conn: _Connection, host: str, target: str,
+                        headers: dict) -> tuple[AsyncResponse, bool]:
+        lines = [f"GET {target} HTTP/1.1", f"Host: {host}", "Accept: application/json", "Connection: keep-alive"]
+        lines += [f"{name}: {value}" for name, value in headers.items()]
+        try:
+            conn.writer.write(("\r\n".join(lines) + "\r\n\r\n").encode("latin-1"))
+            await conn.writer.drain()
+            return await asyncio.wait_for(self._read_response(conn.reader), self.read_timeout)
+        except asyncio.TimeoutError:
+            raise HttpTimeout(f"Reading from {host} timed out")
+        except (ConnectionError, asyncio.IncompleteReadError) as e:
+            raise HttpConnectionClosed(f"Request to {host} failed: {e!r}")
+        except (OSError, ValueError) as e:
+            raise HttpError(f"Request to {host} failed: {e!r}")
+
+    async def _read_response(self, reader: asyncio.StreamReader) -> tuple[AsyncResponse, bool]:
+        status_line = (await reader.readuntil(b"\r\n")).decode("latin-1").strip()
+        version, status, *_ = status_line.split(" ", 2)
+        headers = {}
+        while True:
+            line = (await reader.readuntil(b"\r\n")).decode("latin-1").strip()
+            if not line:
+                break
+            name, _, value = line.partition(":")
+            headers[name.strip().lower()] = value.strip()
+
+        status_code = int(status)
+        keep_alive = version == "HTTP/1.1" and headers.get("connection", "").lower() != "close"
+        if status_code in (204, 304) or 100 <= status_code < 200:
+            body = b""
+        elif headers.get("transfer-encoding", "").lower() == "chunked":
+            body = await self._read_chunked(reader)
+        elif "content-length" in headers:
+            body = await reader.readexactly(int(headers["content-length"]))
+        else:
+            body = await reader.read()
+            keep_alive = False
+        return AsyncResponse(status_code, headers, body), keep_alive
+
+    @staticmethod
+    async def _read_chunked(reader: asyncio.StreamReader) -> bytes:
+        chunks = []
+        while True:
+            size = int((await reader.readuntil(b"\r\n")).split(b";")[0], 16)
+            if size == 0:
+                # Skip trailers up to the final blank line
+                while (await reader.readuntil(b"\r\n")) != b"\r\n":
+                    pass
+                return b"".join(chunks)
+            chunks.append(await reader.readexactly(size))
+            await reader.readexactly(2)
+
+    async def close(self) -> None:
+        for conns in self._idle.values():
+            for conn in conns:
+                conn.close()
+        self._idle = {}
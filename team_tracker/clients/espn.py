@@ -0,0 +1,338 @@
+from dataclasses import dataclass
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from typing import Any, Callable, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from team_tracker.utils.circuit_breaker import CircuitBreaker
+from team_tracker.utils.disk_cache import DiskCache, RawEntry, get_disk_cache
+from team_tracker.utils.logger import configure_logger
+from team_tracker.utils.rate_limiter import TokenBucket
+from team_tracker.utils.singleflight import SingleFlight
+
+
+logger = logging.getLogger(__name__)
+configure_logger(logger)
+
+
+# load the ESPN settings from the environment with sensible defaults
+ESPN_BASE_URL = os.getenv("ESPN_BASE_URL", "https://site.api.espn.com/apis/site/v2/sports/football/nfl")
+ESPN_CONNECT_TIMEOUT = float(os.getenv("ESPN_CONNECT_TIMEOUT", "3.05"))
+ESPN_READ_TIMEOUT = float(os.getenv("ESPN_READ_TIMEOUT", "10"))
+ESPN_POOL_SIZE = int(os.getenv("ESPN_POOL_SIZE", "10"))
+ESPN_MAX_RETRIES = int(os.getenv("ESPN_MAX_RETRIES", "3"))
+ESPN_RETRY_BACKOFF = float(os.getenv("ESPN_RETRY_BACKOFF", "0.3"))
+
+
+@dataclass
+class Validators:
+    """What we last saw for a URL, used to make the next fetch conditional."""
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+    content_hash: Optional[str] = None
+
+
+def _project_teams(data: dict) -> list[dict]:
+    return [
+        {"nfl_id": t["team"]["id"], "team": t["team"]["name"], "loc": t["team"]["location"]}
+        for t in data["sports"][0]["leagues"][0]["teams"]
+    ]
+
+
+def _project_result(event: dict) -> Optional[dict]:
+    """The final score of a completed game, or None if it hasn't been played."""
+    competitions = event.get("competitions") or []
+    if not competitions or not competitions[0].get("status", {}).get("type", {}).get("completed"):
+        return None
+    sides = {c.get("homeAway"): c for c in competitions[0].get("competitors", [])}
+    if "home" not in sides or "away" not in sides:
+        return None
+    return {
+        "event_id": str(event["id"]),
+        "week": event.get("week", {}).get("number"),
+        "home_id": int(sides["home"]["team"]["id"]),
+        "away_id": int(sides["away"]["team"]["id"]),
+        "home_score": int(sides["home"].get("score", {}).get("value", 0)),
+        "away_score": int(sides["away"].get("score", {}).get("value", 0)),
+    }
+
+
+def _project_schedule(data: dict) -> list[dict]:
+    events = []
+    for e in data["events"]:
+        event = {"week": e["week"]["text"], "date": e["date"], "name": e["name"]}
+        # Completed games carry their result, for the standings
+        result = _project_result(e)
+        if result is not None:
+            event["result"] = result
+        events.append(event)
+    return events
+
+
+def _project_roster(data: dict) -> list[dict]:
+    return [
+        {"name": a["displayName"], "age": a["age"], "position": p["position"]}
+        for p in data["athletes"]
+        for a in p["items"]
+    ]
+
+
+class BaseEspnClient:
+    """
+    What the blocking and asyncio ESPN clients share: circuit breakers,
+    validators for conditional fetches, the disk cache and fetch counters.
+    Subclasses only send the request.
+    """
+
+    def __init__(self, base_url: str, rate_limiter: Optional[TokenBucket] = None,
+                 disk_cache: Optional[DiskCache] = None) -> None:
+        self.base_url = base_url.rstrip("/")
+        self.rate_limiter = rate_limiter
+        self.disk_cache = disk_cache
+
+        # One breaker per endpoint family, so a broken roster feed doesn't block schedules
+        self.breakers = {family: CircuitBreaker(family) for family in ("teams", "schedule", "roster")}
+
+        # Validators and unchanged counters per URL, for conditional fetches
+        self._validators: dict[str, Validators] = {}
+        self._change_counts: dict[str, dict] = {}
+        self._validators_lock = threading.Lock()
+
+    def _url(self, path: str) -> str:
+        return f"{self.base_url}/{path.lstrip('/')}"
+
+    def _breaker(self, path: str) -> CircuitBreaker:
+        return self.breakers[path.rstrip("/").rsplit("/", 1)[-1]]
+
+    def _prepare(self, url: str, only_if_changed: bool) -> tuple[dict, Optional[Validators], Optional[RawEntry]]:
+        """Return the request headers, the validators they came from and the stored body, if any."""
+        with self._validators_lock:
+            previous = self._validators.get(url)
+
+        # The disk cache knows what any worker, before or since a restart, last saw
+        stored = None
+        if self.disk_cache is not None and (previous is None or not only_if_changed):
+            stored = self.disk_cache.get_raw(url)
+            if stored is not None:
+                previous = Validators(stored.etag, stored.last_modified, stored.content_hash)
+
+        headers = {}
+        if previous is not None and (only_if_changed or stored is not None):
+            if previous.etag:
+                headers["If-None-Match"] = previous.etag
+            if previous.last_modified:
+                headers["If-Modified-Since"] = previous.last_modified
+        return headers, previous, stored
+
+    def _process(self, url: str, path: str, only_if_changed: bool, status_code: int, headers: Any,
+                 content: bytes, parse: Callable[[], Any], previous: Optional[Validators],
+                 stored: Optional[RawEntry]) -> Any:
+        """
+        Turn an ESPN response into parsed JSON, or None when unchanged.
+
+        Raises:
+            ValueError: If ESPN does not know the requested resource (400/404).
+            RuntimeError: For any other error status.
+        """
+        if status_code in (400, 404):
+            raise ValueError(f"ESPN resource not found: {path}")
+        if status_code == 304:
+            self._record_fetch(url, unchanged=True)
+            if only_if_changed:
+                return None
+            return json.loads(stored.body)
+        if status_code >= 400:
+            logger.error("Request to ESPN failed: %d for %s", status_code, url)
+            raise RuntimeError(f"Request to ESPN failed: {status_code} for url: {url}")
+
+        # Without validators from ESPN, a hash of the body still tells us nothing changed
+        content_hash = hashlib.sha256(content).hexdigest()
+        unchanged = previous is not None and previous.content_hash == content_hash
+        # Parsed before the validators are kept, so a malformed body isn't reported unchanged next time
+        data = None if only_if_changed and unchanged else parse()
+        with self._validators_lock:
+            self._validators[url] = Validators(
+                etag=headers.get("ETag"),
+                last_modified=headers.get("Last-Modified"),
+                content_hash=content_hash,
+            )
+        self._record_fetch(url, unchanged)
+        if self.disk_cache is not None:
+            self.disk_cache.put_raw(url, RawEntry(
+                body=content,
+                etag=headers.get("ETag"),
+                last_modified=headers.get("Last-Modified"),
+                content_hash=content_hash,
+                fetched_at=time.time(),
+            ))
+        return data
+
+    def _forget(self, path: str) -> None:
+        url = self._url(path)
+        with self._validators_lock:
+            self._validators.pop(url, None)
+        if self.disk_cache is not None:
+            self.disk_cache.delete_raw(url)
+
+    def forget_schedule(self, nfl_id: int) -> None:
+        """
+        Drop the validators of a team's schedule, so its next fetch is not
+        reported unchanged. For callers that failed to store what they
+        fetched, which would otherwise not see it again until ESPN's data
+        changes.
+        """
+        self._forget(f"teams/{nfl_id}/schedule")
+
+    def forget_roster(self, nfl_id: int) -> None:
+        """forget_schedule, for a team's roster."""
+        self._forget(f"teams/{nfl_id}/roster")
+
+    def _record_fetch(self, url: str, unchanged: bool) -> None:
+        with self._validators_lock:
+            counts = self._change_counts.setdefault(url, {"fetches": 0, "unchanged": 0})
+            counts["fetches"] += 1
+            counts["unchanged"] += int(unchanged)
+
+    def breaker_status(self) -> dict:
+        return {family: breaker.status() for family, breaker in self.breakers.items()}
+
+    def change_stats(self) -> dict:
+        """Return, per URL, how many fetches found the resource unchanged."""
+        with self._validators_lock:
+            return {
+                url: dict(c, unchanged_ratio=c["unchanged"] / c["fetches"])
+                for url, c in self._change_counts.items()
+            }
+
+
+class EspnClient(BaseEspnClient):
+    """
+    Thin client for the ESPN NFL API.
+
+    A single requests.Session is shared by every call so TCP/TLS connections to
+    ESPN are kept alive and reused, instead of paying a new handshake per request.
+    If a rate_limiter is given, every request first takes a token from it.
+    If a disk_cache is given, raw responses and their validators are kept in
+    it, so fetches stay conditional across restarts and worker processes.
+    """
+
+    def __init__(self, base_url: str = ESPN_BASE_URL, pool_size: int = ESPN_POOL_SIZE,
+                 connect_timeout: float = ESPN_CONNECT_TIMEOUT, read_timeout: float = ESPN_READ_TIMEOUT,
+                 max_retries: int = ESPN_MAX_RETRIES, backoff: float = ESPN_RETRY_BACKOFF,
+                 rate_limiter: Optional[TokenBucket] = None, disk_cache: Optional[DiskCache] = None) -> None:
+        super().__init__(base_url, rate_limiter, disk_cache)
+        self.timeout = (connect_timeout, read_timeout)
+        self.session = requests.Session()
+
+        # Retry connection errors and 5xx responses with exponential backoff.
+        # Only GETs are retried since they are the only idempotent calls we make.
+        retry = Retry(
+            total=max_retries,
+            connect=max_retries,
+            read=max_retries,
+            status=max_retries,
+            backoff_factor=backoff,
+            status_forcelist=(500, 502, 503, 504),
+            allowed_methods=frozenset(["GET"]),
+            raise_on_status=False,
+        )
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+        # Concurrent callers for the same URL share one upstream request
+        self.single_flight = SingleFlight()
+
+    def _get_json(self, path: str, only_if_changed: bool = False) -> Any:
+        """
+        Fetch a path under the base URL and decode the JSON body.
+
+        Concurrent calls for the same URL are coalesced into a single request,
+        and every caller receives its parsed result or its exception. Requests
+        go through the circuit breaker of the path's endpoint family.
+
+        With only_if_changed, the request carries the ETag/Last-Modified seen
+        on the previous fetch and None is returned, without parsing, when ESPN
+        answers 304 or the body hashes the same as last time. Callers must
+        already hold the previous data to use it. Without only_if_changed,
+        the request is still conditional when the last body is in the disk
+        cache, and a 304 is answered from there.
+
+        Raises:
+            ValueError: If ESPN does not know the requested resource (400/404).
+            CircuitOpenError: If the endpoint family's circuit is open.
+            RuntimeError: If the request times out, is rate limited or fails for
+                any other reason.
+        """
+        url = self._url(path)
+        breaker = self._breaker(path)
+
+        def fetch() -> Any:
+            if self.rate_limiter is not None:
+                self.rate_limiter.acquire()
+            return breaker.call(lambda: self._fetch(url, path, only_if_changed))
+
+        return self.single_flight.do((url, only_if_changed), fetch)
+
+    def _fetch(self, url: str, path: str, only_if_changed: bool) -> Any:
+        try:
+            headers, previous, stored = self._prepare(url, only_if_changed)
+            logger.info("Fetching ESPN resource %s", url)
+            response = self.session.get(url, timeout=self.timeout, headers=headers)
+            return self._process(url, path, only_if_changed, response.status_code, response.headers,
+                                 response.content, response.json, previous, stored)
+
+        except requests.exceptions.Timeout:
+            logger.error("Request to ESPN timed out: %s", url)
+            raise RuntimeError(f"Request to ESPN timed out: {url}")
+
+        except requests.exceptions.RequestException as e:
+            logger.error("Request to ESPN failed: %s", e)
+            raise RuntimeError(f"Request to ESPN failed: {e}")
+
+    def teams(self, only_if_changed: bool = False) -> Optional[list[dict]]:
+        """Return every NFL team as {nfl_id, team, loc}."""
+        data = self._get_json("teams", only_if_changed)
+        return None if data is None else _project_teams(data)
+
+    def schedule(self, nfl_id: int, only_if_changed: bool = False) -> Optional[list[dict]]:
+        """Return a team's schedule as a list of {week, date, name} events."""
+        data = self._get_json(f"teams/{nfl_id}/schedule", only_if_changed)
+        return None if data is None else _project_schedule(data)
+
+    def roster(self, nfl_id: int, only_if_changed: bool = False) -> Optional[list[dict]]:
+        """Return a team's roster as a list of {name, age, position} athletes."""
+        data = self._get_json(f"teams/{nfl_id}/roster", only_if_changed)
+        return None if data is None else _project_roster(data)
+
+    def close(self) -> None:
+        self.session.close()
+
+
+_client: Optional[EspnClient] = None
+_client_pid: Optional[int] = None
+_client_lock = threading.Lock()
+
+
+def get_espn_client() -> EspnClient:
+    """
+    Return the shared ESPN client for this worker process.
+
+    Sessions are not safe to share across a fork, so a new client is built
+    whenever the process id changes.
+    """
+    global _client, _client_pid
+    pid = os.getpid()
+    if _client is None or _client_pid != pid:
+        with _client_lock:
+            if _client is None or _client_pid != pid:
+                _client = EspnClient(rate_limiter=TokenBucket(), disk_cache=get_disk_cache())
+                _client_pid = pid
+    return _client
@@ -0,0 +1,134 @@
+import asyncio
+import json
+import logging
+import os
+import threading
+from typing import Any, Optional
+
+from team_tracker.clients.async_http import AsyncHttpClient, HttpError, HttpTimeout
+from team_tracker.clients.espn import (
+    BaseEspnClient,
+    ESPN_BASE_URL,
+    ESPN_CONNECT_TIMEOUT,
+    ESPN_MAX_RETRIES,
+    ESPN_READ_TIMEOUT,
+    ESPN_RETRY_BACKOFF,
+    _project_roster,
+    _project_schedule,
+    _project_teams
+)
+from team_tracker.utils.disk_cache import DiskCache, get_disk_cache
+from team_tracker.utils.logger import configure_logger
+from team_tracker.utils.rate_limiter import TokenBucket
+from team_tracker.utils.singleflight import AsyncSingleFlight
+
+
+logger = logging.getLogger(__name__)
+configure_logger(logger)
+
+
+# load the async ESPN settings from the environment with sensible defaults;
+# waiting on a socket costs no thread, so far more requests can be in flight
+ESPN_ASYNC_POOL_SIZE = int(os.getenv("ESPN_ASYNC_POOL_SIZE", "100"))
+
+
+class AsyncEspnClient(BaseEspnClient):
+    """
+    asyncio version of EspnClient, for the ASGI entry point.
+
+    Same endpoints, projections, errors, circuit breakers, conditional
+    fetches, disk cache and rate limiting as EspnClient; requests go through
+    a non-blocking keep-alive connection pool, so an in-flight ESPN call
+    holds no thread.
+    """
+
+    def __init__(self, base_url: str = ESPN_BASE_URL, pool_size: int = ESPN_ASYNC_POOL_SIZE,
+                 connect_timeout: float = ESPN_CONNECT_TIMEOUT, read_timeout: float = ESPN_READ_TIMEOUT,
+                 max_retries: int = ESPN_MAX_RETRIES, backoff: float = ESPN_RETRY_BACKOFF,
+                 rate_limiter: Optional[TokenBucket] = None, disk_cache: Optional[DiskCache] = None) -> None:
+        super().__init__(base_url, rate_limiter, disk_cache)
+        self.http = AsyncHttpClient(pool_size, connect_timeout, read_timeout, max_retries, backoff)
+
+        # Concurrent callers for the same URL share one upstream request
+        self.single_flight = AsyncSingleFlight()
+
+    async def _get_json(self, path: str, only_if_changed: bool = False) -> Any:
+        """
+        Fetch a path under the base URL and decode the JSON body.
+
+        See EspnClient._get_json for the behaviour and the errors raised.
+        """
+        url = self._url(path)
+        breaker = self._breaker(path)
+
+        async def fetch() -> Any:
+            if self.rate_limiter is not None:
+                await self.rate_limiter.acquire_async()
+            return await breaker.call_async(lambda: self._fetch(url, path, only_if_changed))
+
+        return await self.single_flight.do((url, only_if_changed), fetch)
+
+    async def _fetch(self, url: str, path: str, only_if_changed: bool) -> Any:
+        def parse() -> Any:
+            try:
+                return json.loads(response.content)
+            except ValueError as e:
+                # Not an unknown team: fail like the blocking client does
+                logger.error("Request to ESPN failed: invalid JSON from %s: %s", url, e)
+                raise RuntimeError(f"Request to ESPN failed: invalid JSON from url: {url}")
+
+        try:
+            # _prepare/_process use the disk cache, SQLite that may wait on another
+            # process's lock, and parse the body, so they run off the event loop
+            headers, previous, stored = await asyncio.to_thread(self._prepare, url, only_if_changed)
+            logger.info("Fetching ESPN resource %s", url)
+            response = await self.http.get(url, headers)
+            validators = {
+                "ETag": response.headers.get("etag"),
+                "Last-Modified": response.headers.get("last-modified"),
+            }
+            return await asyncio.to_thread(self._process, url, path, only_if_changed, response.status_code,
+                                           validators, response.content, parse, previous, stored)
+
+        except HttpTimeout:
+            logger.error("Request to ESPN timed out: %s", url)
+            raise RuntimeError(f"Request to ESPN timed out: {url}")
+
+        except HttpError as e:
+            logger.error("Request to ESPN failed: %s", e)
+            raise RuntimeError(f"Request to ESPN failed: {e}")
+
+    async def teams(self, only_if_changed: bool = False) -> Optional[list[dict]]:
+        """Return every NFL team as {nfl_id, team, loc}."""
+        data = await self._get_json("teams", only_if_changed)
+        return None if data is None else _project_teams(data)
+
+    async def schedule(self, nfl_id: int, only_if_changed: bool = False) -> Optional[list[dict]]:
+        """Return a team's schedule as a list of {week, date, name} events."""
+        data = await self._get_json(f"teams/{nfl_id}/schedule", only_if_changed)
+        return None if data is None else _project_schedule(data)
+
+    async def roster(self, nfl_id: int, only_if_changed: bool = False) -> Optional[list[dict]]:
+        """Return a team's roster as a list of {name, age, position} athletes."""
+        data = await self._get_json(f"teams/{nfl_id}/roster", only_if_changed)
+        return None if data is None else _project_roster(data)
+
+    async def close(self) -> None:
+        await self.http.close()
+
+
+_client: Optional[AsyncEspnClient] = None
+_client_pid: Optional[int] = None
+_client_lock = threading.Lock()
+
+
+def get_async_espn_client() -> AsyncEspnClient:
+    """Return the shared asyncio ESPN client for this worker process."""
+    global _client, _client_pid
+    pid = os.getpid()
+    if _client is None or _client_pid != pid:
+        with _client_lock:
+            if _client is None or _client_pid != pid:
+                _client = AsyncEspnClient(rate_limiter=TokenBucket(), disk_cache=get_disk_cache())
+                _client_pid = pid
+    return _client
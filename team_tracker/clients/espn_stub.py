@@ -0,0 +1,337 @@
+"""
+Local stand-in for the ESPN NFL API, for benchmarks and offline load tests.
+
+Serves teams, schedule and roster payloads for all 32 teams, either recorded
+from ESPN into a fixtures directory or generated deterministically, with
+configurable latency, error rate and ETag/304 behavior. Point the app at it
+with ESPN_BASE_URL:
+
+    python -m team_tracker.clients.espn_stub --port 5055 --latency-ms 80
+    ESPN_BASE_URL=http://127.0.0.1:5055 python app.py
+
+Record real payloads once with --record, then replay them with --fixtures.
+"""
+import argparse
+from dataclasses import dataclass
+from datetime import date, timedelta
+import hashlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import json
+import logging
+import math
+import os
+import random
+import re
+import threading
+import time
+from typing import Any, Optional
+
+import requests
+
+from team_tracker.utils.logger import configure_logger
+
+
+logger = logging.getLogger(__name__)
+configure_logger(logger)
+
+
+# (nfl_id, location, name, abbreviation) as assigned by ESPN
+NFL_TEAMS = [
+    (1, "Atlanta", "Falcons", "ATL"), (2, "Buffalo", "Bills", "BUF"), (3, "Chicago", "Bears", "CHI"),
+    (4, "Cincinnati", "Bengals", "CIN"), (5, "Cleveland", "Browns", "CLE"), (6, "Dallas", "Cowboys", "DAL"),
+    (7, "Denver", "Broncos", "DEN"), (8, "Detroit", "Lions", "DET"), (9, "Green Bay", "Packers", "GB"),
+    (10, "Tennessee", "Titans", "TEN"), (11, "Indianapolis", "Colts", "IND"), (12, "Kansas City", "Chiefs", "KC"),
+    (13, "Las Vegas", "Raiders", "LV"), (14, "Los Angeles", "Rams", "LAR"), (15, "Miami", "Dolphins", "MIA"),
+    (16, "Minnesota", "Vikings", "MIN"), (17, "New England", "Patriots", "NE"), (18, "New Orleans", "Saints", "NO"),
+    (19, "New York", "Giants", "NYG"), (20, "New York", "Jets", "NYJ"), (21, "Philadelphia", "Eagles", "PHI"),
+    (22, "Arizona", "Cardinals", "ARI"), (23, "Pittsburgh", "Steelers", "PIT"), (24, "Los Angeles", "Chargers", "LAC"),
+    (25, "San Francisco", "49ers", "SF"), (26, "Seattle", "Seahawks", "SEA"), (27, "Tampa Bay", "Buccaneers", "TB"),
+    (28, "Washington", "Commanders", "WSH"), (29, "Carolina", "Panthers", "CAR"), (30, "Jacksonville", "Jaguars", "JAX"),
+    (33, "Baltimore", "Ravens", "BAL"), (34, "Houston", "Texans", "HOU"),
+]
+
+SEASON_START = date(2024, 9, 8)
+SEASON_WEEKS = 17
+
+_FIRST_NAMES = ["James", "Isaiah", "Jackson", "Marcus", "Tyler", "Devin", "Jalen", "Chris", "Andre", "Cole",
+                "Malik", "Trey", "Josh", "Derek", "Kyle", "Darius", "Ryan", "Micah", "Aaron", "Brandon"]
+_LAST_NAMES = ["Adams", "Barton", "Carter", "Davis", "Evans", "Foster", "Green", "Harris", "Jackson", "Johnson",
+               "King", "Lewis", "Moore", "Nelson", "Owens", "Parker", "Reed", "Smith", "Thomas", "Walker"]
+_POSITION_GROUPS = [("offense", 25), ("defense", 25), ("specialTeam", 3)]
+
+_PATH = re.compile(r"/teams(?:/(\d+)/(schedule|roster))?/?$")
+
+
+def _team_json(nfl_id: int, loc: str, name: str, abbr: str) -> dict:
+    return {"id": str(nfl_id), "location": loc, "name": name, "abbreviation": abbr,
+            "displayName": f"{loc} {name}"}
+
+
+def generate_payloads(seed: int = 411, completed_weeks: int = 10) -> dict[str, Any]:
+    """
+    Generate ESPN-shaped payloads for the whole league.
+
+    Every team plays every week against a random opponent; games in the first
+    completed_weeks weeks have final scores. Keys are the API paths relative
+    to the base URL ("teams", "teams/22/schedule", "teams/22/roster").
+    """
+    rng = random.Random(seed)
+    teams = {t[0]: _team_json(*t) for t in NFL_TEAMS}
+    payloads: dict[str, Any] = {
+        "teams": {"sports": [{"leagues": [{"teams": [{"team": t} for t in teams.values()]}]}]},
+    }
+
+    events: dict[int, list[dict]] = {nfl_id: [] for nfl_id in teams}
+    for week in range(1, SEASON_WEEKS + 1):
+        ids = list(teams)
+        rng.shuffle(ids)
+        kickoff = (SEASON_START + timedelta(days=7 * (week - 1))).isoformat() + "T17:00Z"
+        for i in range(0, len(ids), 2):
+            home, away = teams[ids[i]], teams[ids[i + 1]]
+            completed = week <= completed_weeks
+            scores = (rng.randint(3, 42), rng.randint(3, 42)) if completed else (0, 0)
+            competitors = [
+                {"homeAway": side, "team": t, "score": {"value": float(score), "displayValue": str(score)},
+                 "winner": completed and score > other}
+                for side, t, score, other in (("home", home, scores[0], scores[1]),
+                                              ("away", away, scores[1], scores[0]))
+            ]
+            event = {
+                "id": f"4016{week:02d}{i // 2:02d}",
+                "date": kickoff,
+                "name": f"{away['displayName']} at {home['displayName']}",
+                "week": {"number": week, "text": f"Week {week}"},
+                "competitions": [{
+                    "competitors": competitors,
+                    "status": {"type": {"completed": completed, "state": "post" if completed else "pre"}},
+                }],
+            }
+            events[ids[i]].append(event)
+            events[ids[i + 1]].append(event)
+
+    for nfl_id, team in teams.items():
+        payloads[f"teams/{nfl_id}/schedule"] = {"team": team, "events": events[nfl_id]}
+        athletes = []
+        for position, size in _POSITION_GROUPS:
+            items = [
+                {"id": f"{nfl_id}{position[:1]}{n}", "age": rng.randint(21, 36),
+                 "displayName": f"{rng.choice(_FIRST_NAMES)} {rng.choice(_LAST_NAMES)}"}
+                for n in range(size)
+            ]
+            athletes.append({"position": position, "items": items})
+        payloads[f"teams/{nfl_id}/roster"] = {"team": team, "athletes": athletes}
+
+    return payloads
+
+
+def _fixture_name(path: str) -> str:
+    return path.replace("/", "_") + ".json"
+
+
+def load_fixtures(fixtures_dir: str) -> dict[str, Any]:
+    """Load recorded payloads, falling back to generated ones for anything missing."""
+    payloads = generate_payloads()
+    for path in list(payloads):
+        fixture = os.path.join(fixtures_dir, _fixture_name(path))
+        if os.path.exists(fixture):
+            with open(fixture) as f:
+                payloads[path] = json.load(f)
+    return payloads
+
+
+def record_fixtures(fixtures_dir: str, base_url: str) -> None:
+    """Record the real ESPN teams, schedule and roster payloads into fixtures_dir."""
+    os.makedirs(fixtures_dir, exist_ok=True)
+    paths = ["teams"] + [f"teams/{t[0]}/{kind}" for t in NFL_TEAMS for kind in ("schedule", "roster")]
+    with requests.Session() as session:
+        for path in paths:
+            response = session.get(f"{base_url.rstrip('/')}/{path}", timeout=(3.05, 10))
+            response.raise_for_status()
+            with open(os.path.join(fixtures_dir, _fixture_name(path)), "w") as f:
+                f.write(response.text)
+            logger.info("Recorded %s", path)
+
+
+@dataclass
+class StubConfig:
+    latency_ms: float = 0.0  # mean added latency per request
+    latency_jitter_ms: float = 0.0  # spread around the mean, see latency_distribution
+    latency_distribution: str = "uniform"  # "uniform", "exponential" or "lognormal"
+    error_rate: float = 0.0  # share of requests answered with a 503
+    validators: bool = True  # send ETag/Last-Modified and honor conditional requests
+    seed: int = 411
+
+
+class _Handler(BaseHTTPRequestHandler):
+    server: "EspnStubServer"
+    protocol_version = "HTTP/1.1"  # keep-alive, like the real API
+    disable_nagle_algorithm = True  # headers and body are written separately
+
+    def do_GET(self) -> None:
+        stub = self.server
+        match = _PATH.search(self.path.split("?", 1)[0])
+        time.sleep(stub.sample_latency())
+
+        if match is None:
+            return self._send(404, {"error": "Not found"})
+        path = "teams" if match.group(1) is None else f"teams/{match.group(1)}/{match.group(2)}"
+        family = match.group(2) or "teams"
+
+        if stub.should_fail():
+            stub.record(family, "errors")
+            return self._send(503, {"error": "Service unavailable"})
+
+        payload = stub.payloads.get(path)
+        if payload is None:
+            stub.record(family, "not_found")
+            return self._send(400, {"code": 400, "message": "Failed to get team"})
+
+        body = stub.bodies[path]
+        etag = '"%s"' % hashlib.md5(body).hexdigest()
+        if stub.config.validators and self.headers.get("If-None-Match") == etag:
+            stub.record(family, "not_modified")
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.end_headers()
+            return
+
+        stub.record(family, "ok")
+        headers = {"ETag": etag, "Last-Modified": stub.last_modified} if stub.config.validators else {}
+        self._send(200, body, headers)
+
+    def _send(self, status: int, body: Any, headers: Optional[dict] = None) -> None:
+        if not isinstance(body, bytes):
+            body = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format: str, *args: Any) -> None:
+        pass
+
+
+class EspnStubServer(ThreadingHTTPServer):
+    """
+    In-process ESPN stand-in.
+
+    Use as a context manager, or call start() and stop(); base_url is what
+    ESPN_BASE_URL (or EspnClient(base_url=...)) should point at.
+    """
+
+    daemon_threads = True
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, config: Optional[StubConfig] = None,
+                 payloads: Optional[dict[str, Any]] = None) -> None:
+        super().__init__((host, port), _Handler)
+        self.config = config or StubConfig()
+        self.set_payloads(payloads if payloads is not None else generate_payloads(self.config.seed))
+        self.last_modified = time.strftime("%a, %d %b %Y %H:%M:%S GMT", time.gmtime())
+        self._rng = random.Random(self.config.seed)
+        self._rng_lock = threading.Lock()
+        self._counts: dict[str, dict[str, int]] = {}
+        self._counts_lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def set_payloads(self, payloads: dict[str, Any]) -> None:
+        """Swap the served payloads, e.g. to simulate ESPN publishing an update."""
+        self.payloads = payloads
+        self.bodies = {path: json.dumps(payload).encode() for path, payload in payloads.items()}
+
+    def sample_latency(self) -> float:
+        c = self.config
+        if c.latency_ms <= 0:
+            return 0.0
+        with self._rng_lock:
+            if c.latency_distribution == "exponential":
+                ms = self._rng.expovariate(1 / c.latency_ms)
+            elif c.latency_distribution == "lognormal":
+                # mean latency_ms, with latency_jitter_ms as the standard deviation
+                sigma2 = math.log(1 + (c.latency_jitter_ms / c.latency_ms) ** 2)
+                mu = math.log(c.latency_ms) - sigma2 / 2
+                ms = self._rng.lognormvariate(mu, sigma2 ** 0.5)
+            else:
+                ms = self._rng.uniform(c.latency_ms - c.latency_jitter_ms, c.latency_ms + c.latency_jitter_ms)
+        return max(ms, 0.0) / 1000
+
+    def should_fail(self) -> bool:
+        with self._rng_lock:
+            return self._rng.random() < self.config.error_rate
+
+    def record(self, family: str, outcome: str) -> None:
+        with self._counts_lock:
+            counts = self._counts.setdefault(family, {})
+            counts[outcome] = counts.get(outcome, 0) + 1
+
+    def stats(self) -> dict:
+        with self._counts_lock:
+            return {family: dict(c) for family, c in self._counts.items()}
+
+    def start(self) -> "EspnStubServer":
+        self._thread = threading.Thread(target=self.serve_forever, kwargs={"poll_interval": 0.05},
+                                        name="espn-stub", daemon=True)
+        self._thread.start()
+        logger.info("ESPN stub serving at %s", self.base_url)
+        return self
+
+    def stop(self) -> None:
+        self.shutdown()
+        self.server_close()
+        if self._thread is not None:
+            self._thread.join()
+
+    def __enter__(self) -> "EspnStubServer":
+        return self.start()
+
+    def __exit__(self, *exc: Any) -> None:
+        self.stop()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Local stand-in for the ESPN NFL API.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=5055)
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    parser.add_argument("--latency-jitter-ms", type=float, default=0.0)
+    parser.add_argument("--latency-distribution", choices=["uniform", "exponential", "lognormal"], default="uniform")
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--no-validators", action="store_true", help="Send no ETag/Last-Modified and never 304")
+    parser.add_argument("--seed", type=int, default=411)
+    parser.add_argument("--fixtures", help="Directory of recorded payloads to serve")
+    parser.add_argument("--record", help="Record real ESPN payloads into this directory and exit")
+    parser.add_argument("--record-from", default="https://site.api.espn.com/apis/site/v2/sports/football/nfl")
+    args = parser.parse_args()
+
+    if args.record:
+        record_fixtures(args.record, args.record_from)
+        return
+
+    config = StubConfig(
+        latency_ms=args.latency_ms,
+        latency_jitter_ms=args.latency_jitter_ms,
+        latency_distribution=args.latency_distribution,
+        error_rate=args.error_rate,
+        validators=not args.no_validators,
+        seed=args.seed,
+    )
+    payloads = load_fixtures(args.fixtures) if args.fixtures else None
+    server = EspnStubServer(args.host, args.port, config, payloads)
+    logger.info("ESPN stub serving at %s", server.base_url)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,17 +1,47 @@
+import base64
 from dataclasses import dataclass
+import json
 import logging
 import os
 import sqlite3
-from typing import Any
+import time
+from typing import Any, Optional
 
-from team_tracker.utils.sql_utils import get_db_connection
+from team_tracker.utils.sql_utils import begin_immediate, get_db_connection
 from team_tracker.utils.logger import configure_logger
+from team_tracker.utils.read_cache import VersionedReadCache
+from team_tracker.utils.write_queue import GroupCommitQueue
 
 
 logger = logging.getLogger(__name__)
 configure_logger(logger)
 
 
+# load the listing settings from the environment with sensible defaults
+TEAMS_PAGE_SIZE = int(os.getenv("TEAMS_PAGE_SIZE", "50"))
+TEAMS_PAGE_MAX = int(os.getenv("TEAMS_PAGE_MAX", "200"))
+
+# Sort keys for list_teams; each is unique and indexed, so it alone is a valid keyset cursor
+TEAM_SORTS = ("id", "team", "nfl_id")
+
+# (conference, division) of every team, by ESPN's nfl_id; stored with the team
+# so it is in the standings from its first sync, before it has played
+NFL_ALIGNMENT = {
+    2: ("AFC", "East"), 15: ("AFC", "East"), 17: ("AFC", "East"), 20: ("AFC", "East"),
+    33: ("AFC", "North"), 4: ("AFC", "North"), 5: ("AFC", "North"), 23: ("AFC", "North"),
+    34: ("AFC", "South"), 11: ("AFC", "South"), 30: ("AFC", "South"), 10: ("AFC", "South"),
+    7: ("AFC", "West"), 12: ("AFC", "West"), 13: ("AFC", "West"), 24: ("AFC", "West"),
+    6: ("NFC", "East"), 19: ("NFC", "East"), 21: ("NFC", "East"), 28: ("NFC", "East"),
+    3: ("NFC", "North"), 8: ("NFC", "North"), 9: ("NFC", "North"), 16: ("NFC", "North"),
+    1: ("NFC", "South"), 29: ("NFC", "South"), 18: ("NFC", "South"), 27: ("NFC", "South"),
+    22: ("NFC", "West"), 14: ("NFC", "West"), 25: ("NFC", "West"), 26: ("NFC", "West"),
+}
+
+# Favorites and team lookups are read far more often than teams change; every
+# write below invalidates it, and writes from other workers are picked up too
+teams_cache = VersionedReadCache("teams")
+
+
 @dataclass
 class Team:
     id: int
@@ -25,10 +55,11 @@ def create_team(team: str, nfl_id: int, loc: str) -> None:
         with get_db_connection() as conn:
             cursor = conn.cursor()
             cursor.execute("""
-                INSERT INTO teams (team, nfl_id, loc)
-                VALUES (?, ?, ?)
-            """, (team, nfl_id, loc))
+                INSERT INTO teams (team, nfl_id, loc, conference, division)
+                VALUES (?, ?, ?, ?, ?)
+            """, (team, nfl_id, loc, *NFL_ALIGNMENT.get(int(nfl_id), (None, None))))
             conn.commit()
+            teams_cache.invalidate()
 
             logger.info("Team successfully added to the database: %s", team)
 
@@ -40,50 +71,270 @@ def create_team(team: str, nfl_id: int, loc: str) -> None:
         logger.error("Database error: %s", str(e))
         raise e
 
-def add_to_favorites(nfl_id: int) -> None:
+def bulk_upsert_teams(teams: list[dict]) -> dict:
+    """
+    Insert or update every team in a single transaction.
+
+    Rows are matched on nfl_id and only rewritten when the name or location
+    changed, so re-syncing the whole league is idempotent and costs one commit.
+    New teams are stored with their conference and division.
+
+    Args:
+        teams: Teams as {nfl_id, team, loc}.
+
+    Returns:
+        dict: Counts of inserted, updated and unchanged teams.
+    """
+    # Last one wins if ESPN lists a team twice
+    rows = {}
+    for t in teams:
+        nfl_id = int(t["nfl_id"])
+        rows[nfl_id] = (t["team"], nfl_id, t["loc"], *NFL_ALIGNMENT.get(nfl_id, (None, None)))
     try:
         with get_db_connection() as conn:
+            # Take the write lock up front so the counts below can't race another sync
+            begin_immediate(conn)
             cursor = conn.cursor()
-            cursor.execute("UPDATE teams SET favorite = TRUE WHERE nfl_id = ?", (nfl_id,))
+            cursor.execute("SELECT COUNT(*) FROM teams")
+            before = cursor.fetchone()[0]
+            cursor.executemany("""
+                INSERT INTO teams (team, nfl_id, loc, conference, division)
+                VALUES (?, ?, ?, ?, ?)
+                ON CONFLICT(nfl_id) DO UPDATE SET team = excluded.team, loc = excluded.loc
+                WHERE teams.team IS NOT excluded.team OR teams.loc IS NOT excluded.loc
+            """, list(rows.values()))
+            written = cursor.rowcount
+            cursor.execute("SELECT COUNT(*) FROM teams")
+            inserted = cursor.fetchone()[0] - before
             conn.commit()
+            teams_cache.invalidate()
+
+            counts = {
+                "inserted": inserted,
+                "updated": written - inserted,
+                "unchanged": len(rows) - written,
+            }
+            logger.info("Teams upserted: %s", counts)
+            return counts
 
-            logger.info("Team successfully added to favorites.")
-    
     except sqlite3.Error as e:
         logger.error("Database error: %s", str(e))
         raise e
-    
-def remove_from_favorites(nfl_id: int) -> None:
+
+def _write_favorites(changes: dict[int, bool]) -> None:
+    """Apply a batch of favorite flags, keyed by nfl_id, in one transaction."""
     try:
         with get_db_connection() as conn:
             cursor = conn.cursor()
-            cursor.execute("UPDATE teams SET favorite = FALSE WHERE nfl_id = ?", (nfl_id,))
+            for nfl_id, favorite in changes.items():
+                if favorite:
+                    cursor.execute("UPDATE teams SET favorite = TRUE WHERE nfl_id = ?", (nfl_id,))
+                else:
+                    cursor.execute("UPDATE teams SET favorite = FALSE WHERE nfl_id = ?", (nfl_id,))
             conn.commit()
+            teams_cache.invalidate()
+
+            logger.info("Favorites updated for %d teams.", len(changes))
+
+    except sqlite3.Error as e:
+        logger.error("Database error: %s", str(e))
+        raise e
+
+# Favorite toggles from every request thread are group-committed by one writer
+favorites_queue = GroupCommitQueue("favorites", _write_favorites)
+
+def add_to_favorites(nfl_id: int) -> None:
+    favorites_queue.submit(nfl_id, True)
+    logger.info("Team successfully added to favorites.")
+
+def remove_from_favorites(nfl_id: int) -> None:
+    favorites_queue.submit(nfl_id, False)
+    logger.info("Team successfully removed from favorites.")
+
+def _encode_cursor(sort: str, value: Any) -> str:
+    return base64.urlsafe_b64encode(json.dumps([sort, value]).encode()).decode()
+
+def _decode_cursor(sort: str, cursor: str) -> Any:
+    try:
+        cursor_sort, value = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except (ValueError, TypeError):
+        raise ValueError("Invalid cursor")
+    if cursor_sort != sort:
+        raise ValueError("The cursor belongs to a different sort order")
+    return value
+
+def list_teams(cursor: Optional[str] = None, limit: int = TEAMS_PAGE_SIZE, loc: Optional[str] = None,
+               favorite: Optional[bool] = None, sort: str = "id") -> tuple[list[dict], Optional[str]]:
+    """
+    Return one page of teams, with keyset (cursor) pagination.
+
+    Rather than skipping OFFSET rows, each page starts right after the sort
+    key the previous one ended on, so every page is an index seek plus
+    `limit` rows however deep into the listing it is.
+
+    Args:
+        cursor: next_cursor from the previous page, or None for the first page.
+        limit: Page size, at most TEAMS_PAGE_MAX.
+        loc: Only teams from this location.
+        favorite: Only teams marked (True) or not marked (False) as favorite.
+        sort: id, team or nfl_id, each unique and indexed; prefix with - to sort descending.
+
+    Returns:
+        tuple: The page's teams and the cursor of the next page, None on the last page.
+
+    Raises:
+        ValueError: If the sort, limit or cursor is invalid.
+    """
+    column = sort.lstrip("-")
+    if column not in TEAM_SORTS:
+        raise ValueError(f"Unknown sort '{sort}', expected one of: {', '.join(TEAM_SORTS)}")
+    if not 1 <= limit <= TEAMS_PAGE_MAX:
+        raise ValueError(f"limit must be between 1 and {TEAMS_PAGE_MAX}")
+    descending = sort.startswith("-")
+
+    conditions, params = [], []
+    if loc is not None:
+        conditions.append("loc = ?")
+        params.append(loc)
+    if favorite is not None:
+        # A literal, not a parameter, so the partial idx_teams_favorite index applies
+        conditions.append("favorite = TRUE" if favorite else "favorite = FALSE")
+    if cursor is not None:
+        conditions.append(f"{column} {'<' if descending else '>'} ?")
+        params.append(_decode_cursor(sort, cursor))
+    where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+
+    try:
+        with get_db_connection(read_only=True) as conn:
+            db_cursor = conn.cursor()
+            # One row past the page tells us whether there is a next page
+            db_cursor.execute(f"""
+                SELECT id, team, nfl_id, loc FROM teams {where}
+                ORDER BY {column} {'DESC' if descending else 'ASC'} LIMIT ?
+            """, (*params, limit + 1))
+
+            # Rows are consumed one at a time; nothing is materialised beyond the page
+            teams = []
+            for row in iter(db_cursor.fetchone, None):
+                if len(teams) == limit:
+                    return teams, _encode_cursor(sort, teams[-1][column])
+                teams.append({'id': row[0], 'team': row[1], 'nfl_id': row[2], 'loc': row[3]})
+            return teams, None
+
+    except sqlite3.Error as e:
+        logger.error("Database error: %s", str(e))
+        raise e
+
+def get_favorites(cursor: Optional[str] = None, limit: int = TEAMS_PAGE_SIZE,
+                  sort: str = "id") -> tuple[list[dict], Optional[str]]:
+    """Return one page of the teams marked as favorite, from the read cache; see list_teams."""
+    favorites, next_cursor = teams_cache.get_or_load(
+        ("favorites", cursor, limit, sort), lambda: list_teams(cursor, limit, favorite=True, sort=sort))
+    logger.info("Favorites retrieved successfully")
+    return favorites, next_cursor
+
+def get_team_ids() -> list[int]:
+    return teams_cache.get_or_load("team_ids", _get_team_ids)
+
+def _get_team_ids() -> list[int]:
+    try:
+        with get_db_connection(read_only=True) as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT nfl_id FROM teams ORDER BY nfl_id")
+            return [row[0] for row in cursor.fetchall()]
 
-            logger.info("Team successfully removed from favorites.")
-    
     except sqlite3.Error as e:
         logger.error("Database error: %s", str(e))
         raise e
-    
-def get_favorites() -> None:
+
+###################################################
+#
+# Per-user favorites, in user_favorites. Toggles are
+# group-committed like the global flag above.
+#
+###################################################
+
+def _team_id(nfl_id: int) -> int:
+    return teams_cache.get_or_load(("team_id", nfl_id), lambda: _load_team_id(nfl_id))
+
+def _load_team_id(nfl_id: int) -> int:
+    try:
+        with get_db_connection(read_only=True) as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT id FROM teams WHERE nfl_id = ?", (nfl_id,))
+            result = cursor.fetchone()
+
+            if not result:
+                raise ValueError(f"Team {nfl_id} not found")
+            return result[0]
+
+    except sqlite3.Error as e:
+        logger.error("Database error: %s", str(e))
+        raise e
+
+def _write_user_favorites(changes: dict[tuple[int, int], bool]) -> None:
+    """Apply a batch of per-user favorites, keyed by (user_id, team_id), in one transaction."""
+    now = time.time()
     try:
         with get_db_connection() as conn:
             cursor = conn.cursor()
-            cursor.execute("SELECT id, team, nfl_id, loc FROM teams WHERE favorite = TRUE")
-            rows = cursor.fetchall()
-
-            favorites = []
-            for row in rows:
-                fav = {
-                    'id': row[0],
-                    'team': row[1],
-                    'nfl_id': row[2],
-                    'loc': row[3]
-                }
-                favorites.append(fav)
-
-            logger.info("Favorites retrieved successfully")
+            for (user_id, team_id), favorite in changes.items():
+                if favorite:
+                    # Re-adding a favorite keeps its original created_at
+                    cursor.execute("""
+                        INSERT OR IGNORE INTO user_favorites (user_id, team_id, created_at)
+                        VALUES (?, ?, ?)
+                    """, (user_id, team_id, now))
+                else:
+                    cursor.execute("DELETE FROM user_favorites WHERE user_id = ? AND team_id = ?",
+                                   (user_id, team_id))
+            conn.commit()
+
+            logger.info("User favorites updated: %d changes.", len(changes))
+
+    except sqlite3.Error as e:
+        logger.error("Database error: %s", str(e))
+        raise e
+
+user_favorites_queue = GroupCommitQueue("user_favorites", _write_user_favorites)
+
+def add_user_favorite(user_id: int, nfl_id: int) -> None:
+    """
+    Add a team to a user's favorites; adding it again is a no-op.
+
+    Raises:
+        ValueError: If there is no team with that nfl_id.
+    """
+    user_favorites_queue.submit((user_id, _team_id(nfl_id)), True)
+    logger.info("Team %s added to favorites of user %s.", nfl_id, user_id)
+
+def remove_user_favorite(user_id: int, nfl_id: int) -> None:
+    """
+    Remove a team from a user's favorites; removing one that isn't there is a no-op.
+
+    Raises:
+        ValueError: If there is no team with that nfl_id.
+    """
+    user_favorites_queue.submit((user_id, _team_id(nfl_id)), False)
+    logger.info("Team %s removed from favorites of user %s.", nfl_id, user_id)
+
+def get_user_favorites(user_id: int) -> list[dict]:
+    """Return a user's favorite teams, in primary key order so no sort is needed."""
+    try:
+        with get_db_connection(read_only=True) as conn:
+            cursor = conn.cursor()
+            cursor.execute("""
+                SELECT t.id, t.team, t.nfl_id, t.loc
+                FROM user_favorites f JOIN teams t ON t.id = f.team_id
+                WHERE f.user_id = ?
+                ORDER BY f.team_id
+            """, (user_id,))
+
+            favorites = [
+                {'id': row[0], 'team': row[1], 'nfl_id': row[2], 'loc': row[3]}
+                for row in cursor.fetchall()
+            ]
+            logger.info("Favorites of user %s retrieved successfully", user_id)
             return favorites
 
     except sqlite3.Error as e:
@@ -0,0 +1,284 @@
+import asyncio
+import logging
+import sqlite3
+import time
+from typing import Awaitable, Callable, Optional
+
+from team_tracker.clients.espn import get_espn_client
+from team_tracker.clients.espn_async import get_async_espn_client
+from team_tracker.models.standings_model import record_results
+from team_tracker.utils.async_db import run_db
+from team_tracker.utils.sql_utils import get_db_connection, outside_unit_of_work, unit_of_work
+from team_tracker.utils.logger import configure_logger
+
+
+logger = logging.getLogger(__name__)
+configure_logger(logger)
+
+
+def save_schedule(nfl_id: int, events: list[dict]) -> None:
+    """Replace a team's stored schedule with events in a single transaction."""
+    try:
+        with get_db_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("""
+                INSERT INTO schedules (nfl_id, synced_at) VALUES (?, ?)
+                ON CONFLICT(nfl_id) DO UPDATE SET synced_at = excluded.synced_at
+            """, (nfl_id, time.time()))
+            cursor.execute("DELETE FROM games WHERE nfl_id = ?", (nfl_id,))
+            cursor.executemany("""
+                INSERT INTO games (nfl_id, week, date, name)
+                VALUES (?, ?, ?, ?)
+            """, [(nfl_id, e["week"], e["date"], e["name"]) for e in events])
+            conn.commit()
+
+            logger.info("Schedule stored for team %s: %d games", nfl_id, len(events))
+
+    except sqlite3.Error as e:
+        logger.error("Database error: %s", str(e))
+        raise e
+
+def save_schedule_and_results(nfl_id: int, events: list[dict]) -> None:
+    """
+    Store a synced schedule and fold its completed games into the standings,
+    in one transaction, so games are never stored without being counted.
+    """
+    with unit_of_work():
+        save_schedule(nfl_id, events)
+        results = [e["result"] for e in events if "result" in e]
+        if results:
+            record_results(results)
+
+def get_schedule(nfl_id: int) -> Optional[dict]:
+    """
+    Return a team's stored schedule as {synced_at, events}.
+
+    Returns None if the team has never been synced.
+    """
+    try:
+        with get_db_connection(read_only=True) as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT synced_at FROM schedules WHERE nfl_id = ?", (nfl_id,))
+            row = cursor.fetchone()
+            if row is None:
+                return None
+
+            cursor.execute("""
+                SELECT week, date, name FROM games
+                WHERE nfl_id = ? ORDER BY date
+            """, (nfl_id,))
+            events = [{"week": r[0], "date": r[1], "name": r[2]} for r in cursor.fetchall()]
+            return {"synced_at": row[0], "events": events}
+
+    except sqlite3.Error as e:
+        logger.error("Database error: %s", str(e))
+        raise e
+
+def save_roster(nfl_id: int, athletes: list[dict]) -> None:
+    """Replace a team's stored roster with athletes in a single transaction."""
+    try:
+        with get_db_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("""
+                INSERT INTO rosters (nfl_id, synced_at) VALUES (?, ?)
+                ON CONFLICT(nfl_id) DO UPDATE SET synced_at = excluded.synced_at
+            """, (nfl_id, time.time()))
+            cursor.execute("DELETE FROM roster_entries WHERE nfl_id = ?", (nfl_id,))
+            cursor.executemany("""
+                INSERT INTO roster_entries (nfl_id, name, age, position)
+                VALUES (?, ?, ?, ?)
+            """, [(nfl_id, a["name"], a["age"], a["position"]) for a in athletes])
+            conn.commit()
+
+            logger.info("Roster stored for team %s: %d athletes", nfl_id, len(athletes))
+
+    except sqlite3.Error as e:
+        logger.error("Database error: %s", str(e))
+        raise e
+
+def get_roster(nfl_id: int) -> Optional[dict]:
+    """
+    Return a team's stored roster as {synced_at, athletes}.
+
+    Returns None if the team has never been synced.
+    """
+    try:
+        with get_db_connection(read_only=True) as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT synced_at FROM rosters WHERE nfl_id = ?", (nfl_id,))
+            row = cursor.fetchone()
+            if row is None:
+                return None
+
+            cursor.execute("""
+                SELECT name, age, position FROM roster_entries
+                WHERE nfl_id = ? ORDER BY id
+            """, (nfl_id,))
+            athletes = [{"name": r[0], "age": r[1], "position": r[2]} for r in cursor.fetchall()]
+            return {"synced_at": row[0], "athletes": athletes}
+
+    except sqlite3.Error as e:
+        logger.error("Database error: %s", str(e))
+        raise e
+
+def mark_schedule_synced(nfl_id: int) -> bool:
+    """Bump a team's schedule sync time; returns False if nothing is stored."""
+    try:
+        with get_db_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("UPDATE schedules SET synced_at = ? WHERE nfl_id = ?", (time.time(), nfl_id))
+            conn.commit()
+            return cursor.rowcount > 0
+
+    except sqlite3.Error as e:
+        logger.error("Database error: %s", str(e))
+        raise e
+
+def mark_roster_synced(nfl_id: int) -> bool:
+    """Bump a team's roster sync time; returns False if nothing is stored."""
+    try:
+        with get_db_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("UPDATE rosters SET synced_at = ? WHERE nfl_id = ?", (time.time(), nfl_id))
+            conn.commit()
+            return cursor.rowcount > 0
+
+    except sqlite3.Error as e:
+        logger.error("Database error: %s", str(e))
+        raise e
+
+###################################################
+#
+# Sync: ESPN is the source of truth, SQLite the
+# local copy the routes read from.
+#
+###################################################
+
+def _sync(nfl_id: int, fetch: Callable[..., Optional[list[dict]]], mark_synced: Callable[[int], bool],
+          save: Callable[[int, list[dict]], None], forget: Callable[[int], None]) -> Optional[list[dict]]:
+    data = fetch(nfl_id, only_if_changed=True)
+    if data is None:
+        if mark_synced(nfl_id):
+            return None
+        # ESPN says nothing changed but we have no local copy, so fetch it in full
+        data = fetch(nfl_id)
+    try:
+        save(nfl_id, data)
+    except Exception:
+        # The client already keeps this fetch's validators; drop them, or the
+        # next sync would be told nothing changed and never store this data
+        forget(nfl_id)
+        raise
+    return data
+
+def sync_schedule(nfl_id: int) -> Optional[list[dict]]:
+    """
+    Fetch a team's schedule from ESPN and store it.
+
+    Returns None, leaving the stored games untouched, if ESPN reports no change.
+    """
+    client = get_espn_client()
+    return _sync(nfl_id, client.schedule, mark_schedule_synced, save_schedule_and_results,
+                 client.forget_schedule)
+
+def sync_roster(nfl_id: int) -> Optional[list[dict]]:
+    """
+    Fetch a team's roster from ESPN and store it.
+
+    Returns None, leaving the stored athletes untouched, if ESPN reports no change.
+    """
+    client = get_espn_client()
+    return _sync(nfl_id, client.roster, mark_roster_synced, save_roster, client.forget_roster)
+
+def _load(nfl_id: int, max_age: float, get: Callable[[int], Optional[dict]],
+          sync: Callable[[int], Optional[list[dict]]]) -> dict:
+    stored = get(nfl_id)
+    if stored is not None and time.time() - stored["synced_at"] < max_age:
+        return stored
+    try:
+        # Don't hold the request's pooled connection while waiting on ESPN;
+        # the sync commits its writes on short connections of its own
+        with outside_unit_of_work():
+            sync(nfl_id)
+    except RuntimeError as e:
+        if stored is None:
+            raise
+        # ESPN is unavailable or its circuit is open; an old copy beats an error
+        logger.warning("Serving stored data for team %s after sync failure: %s", nfl_id, str(e))
+        return stored
+    return get(nfl_id)
+
+def load_schedule(nfl_id: int, max_age: float) -> dict:
+    """
+    Return a team's schedule from SQLite as {synced_at, events}, syncing from
+    ESPN first if it is missing or older than max_age seconds.
+
+    If ESPN cannot be reached, the stored copy is returned as is; callers can
+    tell it is stale from synced_at.
+    """
+    return _load(nfl_id, max_age, get_schedule, sync_schedule)
+
+def load_roster(nfl_id: int, max_age: float) -> dict:
+    """
+    Return a team's roster from SQLite as {synced_at, athletes}, syncing from
+    ESPN first if it is missing or older than max_age seconds.
+
+    If ESPN cannot be reached, the stored copy is returned as is; callers can
+    tell it is stale from synced_at.
+    """
+    return _load(nfl_id, max_age, get_roster, sync_roster)
+
+###################################################
+#
+# The same, for the ASGI entry point: ESPN calls
+# are awaited, SQLite calls run on the database
+# threads.
+#
+###################################################
+
+async def _sync_async(nfl_id: int, fetch: Callable[..., Awaitable[Optional[list[dict]]]],
+                      mark_synced: Callable[[int], bool], save: Callable[[int, list[dict]], None],
+                      forget: Callable[[int], None]) -> Optional[list[dict]]:
+    data = await fetch(nfl_id, only_if_changed=True)
+    if data is None:
+        if await run_db(mark_synced, nfl_id):
+            return None
+        # ESPN says nothing changed but we have no local copy, so fetch it in full
+        data = await fetch(nfl_id)
+    try:
+        await run_db(save, nfl_id, data)
+    except Exception:
+        # See _sync; the disk cache is SQLite too, so off the event loop
+        await asyncio.to_thread(forget, nfl_id)
+        raise
+    return data
+
+async def _load_async(nfl_id: int, max_age: float, get: Callable[[int], Optional[dict]],
+                      sync: Callable[[int], Awaitable[Optional[list[dict]]]]) -> dict:
+    stored = await run_db(get, nfl_id, read_only=True)
+    if stored is not None and time.time() - stored["synced_at"] < max_age:
+        return stored
+    try:
+        await sync(nfl_id)
+    except RuntimeError as e:
+        if stored is None:
+            raise
+        # ESPN is unavailable or its circuit is open; an old copy beats an error
+        logger.warning("Serving stored data for team %s after sync failure: %s", nfl_id, str(e))
+        return stored
+    return await run_db(get, nfl_id, read_only=True)
+
+async def load_schedule_async(nfl_id: int, max_age: float) -> dict:
+    """load_schedule for asyncio callers."""
+    async def sync(team_id: int) -> Optional[list[dict]]:
+        client = get_async_espn_client()
+        return await _sync_async(team_id, client.schedule, mark_schedule_synced, save_schedule_and_results,
+                                 client.forget_schedule)
+    return await _load_async(nfl_id, max_age, get_schedule, sync)
+
+async def load_roster_async(nfl_id: int, max_age: float) -> dict:
+    """load_roster for asyncio callers."""
+    async def sync(team_id: int) -> Optional[list[dict]]:
+        client = get_async_espn_client()
+        return await _sync_async(team_id, client.roster, mark_roster_synced, save_roster, client.forget_roster)
+    return await _load_async(nfl_id, max_age, get_roster, sync)
@@ -0,0 +1,265 @@
+from collections import defaultdict
+import logging
+import sqlite3
+import time
+from typing import Optional
+
+from team_tracker.models.locker_model import NFL_ALIGNMENT, teams_cache
+from team_tracker.utils.sql_utils import begin_immediate, get_db_connection
+from team_tracker.utils.logger import configure_logger
+
+
+logger = logging.getLogger(__name__)
+configure_logger(logger)
+
+
+# The teams columns a game result adds to
+RECORD_COLUMNS = ("games", "wins", "losses", "ties", "division_wins", "division_losses", "division_ties",
+                  "conference_wins", "conference_losses", "conference_ties",
+                  "points_for", "points_against", "point_diff")
+
+
+def _add_game(deltas: dict, team_id: int, opponent_id: int, scored: int, allowed: int, sign: int) -> None:
+    """Add (sign=1) or take back (sign=-1) one game to a team's deltas."""
+    outcome = "wins" if scored > allowed else "losses" if scored < allowed else "ties"
+    team = deltas[team_id]
+    team["games"] += sign
+    team[outcome] += sign
+    team["points_for"] += sign * scored
+    team["points_against"] += sign * allowed
+    team["point_diff"] += sign * (scored - allowed)
+
+    alignment, opponent = NFL_ALIGNMENT.get(team_id), NFL_ALIGNMENT.get(opponent_id)
+    if alignment is not None and opponent is not None:
+        if alignment[0] == opponent[0]:
+            team[f"conference_{outcome}"] += sign
+            if alignment[1] == opponent[1]:
+                team[f"division_{outcome}"] += sign
+
+
+def _add_result(deltas: dict, result: tuple, sign: int) -> None:
+    home_id, away_id, home_score, away_score = result
+    _add_game(deltas, home_id, away_id, home_score, away_score, sign)
+    _add_game(deltas, away_id, home_id, away_score, home_score, sign)
+
+
+def _apply(cursor: sqlite3.Cursor, deltas: dict) -> None:
+    assignments = ", ".join(f"{column} = {column} + ?" for column in RECORD_COLUMNS)
+    cursor.executemany(
+        f"UPDATE teams SET {assignments} WHERE nfl_id = ?",
+        [tuple(team[column] for column in RECORD_COLUMNS) + (nfl_id,) for nfl_id, team in deltas.items()],
+    )
+    cursor.executemany(
+        "UPDATE teams SET win_pct = (wins + 0.5 * ties) / games WHERE nfl_id = ? AND games > 0",
+        [(nfl_id,) for nfl_id in deltas],
+    )
+
+
+def _record(cursor: sqlite3.Cursor, games: dict, counts: dict) -> bool:
+    """
+    Record games, keyed by event_id, adding to counts. Games involving a team
+    that isn't stored yet are kept in pending_results instead.
+
+    Returns:
+        bool: Whether any record changed.
+    """
+    cursor.execute("SELECT nfl_id FROM teams")
+    stored_teams = {row[0] for row in cursor.fetchall()}
+
+    deltas = defaultdict(lambda: dict.fromkeys(RECORD_COLUMNS, 0))
+    rows, pending = [], []
+    for event_id, r in games.items():
+        new = (r["home_id"], r["away_id"], r["home_score"], r["away_score"])
+        if r["home_id"] not in stored_teams or r["away_id"] not in stored_teams:
+            counts["skipped"] += 1
+            pending.append((event_id, r.get("week"), *new, time.time()))
+            continue
+        cursor.execute("""
+            SELECT home_id, away_id, home_score, away_score FROM game_results WHERE event_id = ?
+        """, (event_id,))
+        old = cursor.fetchone()
+        if old is not None and tuple(old) == new:
+            counts["unchanged"] += 1
+            continue
+        if old is not None:
+            _add_result(deltas, tuple(old), -1)
+            counts["corrected"] += 1
+        else:
+            counts["new"] += 1
+        _add_result(deltas, new, 1)
+        rows.append((event_id, r.get("week"), *new, time.time()))
+
+    for table, values in (("pending_results", pending), ("game_results", rows)):
+        if values:
+            cursor.executemany(f"""
+                INSERT INTO {table} (event_id, week, home_id, away_id, home_score, away_score, recorded_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT(event_id) DO UPDATE SET
+                    week = excluded.week, home_id = excluded.home_id, away_id = excluded.away_id,
+                    home_score = excluded.home_score, away_score = excluded.away_score,
+                    recorded_at = excluded.recorded_at
+            """, values)
+    if rows:
+        cursor.executemany("DELETE FROM pending_results WHERE event_id = ?", [(row[0],) for row in rows])
+        _apply(cursor, deltas)
+    return bool(rows)
+
+
+def record_results(results: list[dict]) -> dict:
+    """
+    Fold completed game results into the teams' records, in one transaction.
+
+    Only what changed is applied: a game already recorded with the same
+    score is skipped, a corrected score is applied as the difference from
+    the recorded one, so nothing is ever recomputed from scratch. Games
+    involving a team that isn't stored yet are kept pending until
+    record_pending_results() runs after that team is stored.
+
+    Args:
+        results: Games as {event_id, week, home_id, away_id, home_score, away_score}.
+
+    Returns:
+        dict: Counts of new, corrected, unchanged and skipped (pending) games.
+    """
+    # Every game is in both teams' schedules; the last copy wins
+    games = {r["event_id"]: r for r in results}
+    counts = {"new": 0, "corrected": 0, "unchanged": 0, "skipped": 0}
+    if not games:
+        return counts
+
+    try:
+        with get_db_connection() as conn:
+            begin_immediate(conn)
+            changed = _record(conn.cursor(), games, counts)
+            conn.commit()
+            if changed:
+                teams_cache.invalidate()
+
+            logger.info("Game results recorded: %s", counts)
+            return counts
+
+    except sqlite3.Error as e:
+        logger.error("Database error: %s", str(e))
+        raise e
+
+
+def record_pending_results() -> dict:
+    """
+    Record the pending games whose teams are all stored now; run it once new
+    teams are stored. The schedules those games came from may not change
+    again for weeks, so a later sync can't be relied on to bring them back.
+
+    Returns:
+        dict: Counts of new, corrected, unchanged and still pending (skipped) games.
+    """
+    counts = {"new": 0, "corrected": 0, "unchanged": 0, "skipped": 0}
+    try:
+        with get_db_connection() as conn:
+            begin_immediate(conn)
+            cursor = conn.cursor()
+            cursor.execute("""
+                SELECT event_id, week, home_id, away_id, home_score, away_score FROM pending_results
+                WHERE home_id IN (SELECT nfl_id FROM teams) AND away_id IN (SELECT nfl_id FROM teams)
+            """)
+            columns = ("event_id", "week", "home_id", "away_id", "home_score", "away_score")
+            games = {row[0]: dict(zip(columns, row)) for row in cursor.fetchall()}
+            changed = bool(games) and _record(cursor, games, counts)
+            conn.commit()
+            if changed:
+                teams_cache.invalidate()
+
+            if games:
+                logger.info("Pending game results recorded: %s", counts)
+            return counts
+
+    except sqlite3.Error as e:
+        logger.error("Database error: %s", str(e))
+        raise e
+
+
+def rebuild_standings() -> None:
+    """
+    Recompute every record from game_results, e.g. after restoring a backup
+    or changing NFL_ALIGNMENT. Never needed to serve requests.
+    """
+    try:
+        with get_db_connection() as conn:
+            begin_immediate(conn)
+            cursor = conn.cursor()
+            cursor.execute("SELECT home_id, away_id, home_score, away_score FROM game_results")
+            deltas = defaultdict(lambda: dict.fromkeys(RECORD_COLUMNS, 0))
+            for row in cursor.fetchall():
+                _add_result(deltas, tuple(row), 1)
+
+            resets = ", ".join(f"{column} = 0" for column in RECORD_COLUMNS)
+            cursor.execute(f"UPDATE teams SET {resets}, win_pct = 0, conference = NULL, division = NULL")
+            cursor.executemany("UPDATE teams SET conference = ?, division = ? WHERE nfl_id = ?",
+                               [(*alignment, nfl_id) for nfl_id, alignment in NFL_ALIGNMENT.items()])
+            _apply(cursor, deltas)
+            conn.commit()
+            teams_cache.invalidate()
+
+            logger.info("Standings rebuilt for %d teams", len(deltas))
+
+    except sqlite3.Error as e:
+        logger.error("Database error: %s", str(e))
+        raise e
+
+
+def _load_standings(conference: Optional[str], division: Optional[str]) -> list[dict]:
+    conditions, params = ["conference IS NOT NULL"], []
+    if conference is not None:
+        conditions.append("conference = ?")
+        params.append(conference)
+    if division is not None:
+        conditions.append("division = ?")
+        params.append(division)
+
+    try:
+        with get_db_connection(read_only=True) as conn:
+            cursor = conn.cursor()
+            cursor.execute(f"""
+                SELECT nfl_id, team, loc, conference, division, games, wins, losses, ties, win_pct,
+                       division_wins, division_losses, division_ties,
+                       conference_wins, conference_losses, conference_ties,
+                       points_for, points_against, point_diff
+                FROM teams
+                WHERE {' AND '.join(conditions)}
+                ORDER BY conference, division, win_pct DESC, point_diff DESC
+            """, params)
+
+            return [
+                {
+                    'nfl_id': row[0], 'team': row[1], 'loc': row[2], 'conference': row[3], 'division': row[4],
+                    'games': row[5], 'wins': row[6], 'losses': row[7], 'ties': row[8], 'win_pct': row[9],
+                    'division_record': {'wins': row[10], 'losses': row[11], 'ties': row[12]},
+                    'conference_record': {'wins': row[13], 'losses': row[14], 'ties': row[15]},
+                    'points_for': row[16], 'points_against': row[17], 'point_diff': row[18],
+                }
+                for row in cursor.fetchall()
+            ]
+
+    except sqlite3.Error as e:
+        logger.error("Database error: %s", str(e))
+        raise e
+
+
+def get_standings(conference: Optional[str] = None, division: Optional[str] = None) -> list[dict]:
+    """
+    Return the standings, ordered by conference, division, win percentage
+    and point differential, as read from the precomputed team columns.
+    Every stored team is listed, at 0-0 until its first result is recorded.
+
+    Args:
+        conference: Only teams of this conference (AFC or NFC).
+        division: Only teams of this division (East, North, South or West).
+
+    Raises:
+        ValueError: If the conference or division doesn't exist.
+    """
+    if conference is not None and conference not in {c for c, _ in NFL_ALIGNMENT.values()}:
+        raise ValueError(f"Unknown conference: {conference}")
+    if division is not None and division not in {d for _, d in NFL_ALIGNMENT.values()}:
+        raise ValueError(f"Unknown division: {division}")
+    return teams_cache.get_or_load(("standings", conference, division),
+                                   lambda: _load_standings(conference, division))
@@ -1,16 +1,24 @@
+import base64
 from dataclasses import dataclass   
 import hashlib   #to get hash for password
+import hmac
 import sqlite3  
 import os           #this will let us get random salts from OS (encryption data)
 import logging
-from typing import Any
+import time
+from typing import Any, Optional
 
-from team_tracker.utils.sql_utils import get_db_connection
+from team_tracker.utils.sql_utils import DB_PATH, begin_immediate, get_db_connection
 from team_tracker.utils.logger import configure_logger
 
 logger = logging.getLogger(__name__)
 configure_logger(logger)
 
+# load the login token settings from the environment with sensible defaults
+AUTH_SECRET = os.getenv("AUTH_SECRET", "")
+AUTH_SECRET_PATH = os.getenv("AUTH_SECRET_PATH", os.path.join(os.path.dirname(DB_PATH), "auth_secret"))
+AUTH_TOKEN_TTL = int(os.getenv("AUTH_TOKEN_TTL", "86400"))
+
 @dataclass
 class User:
     id: int
@@ -48,10 +56,31 @@ def create_user(username: str, password: str) -> None:
         logger.error("Username already exists: %s", username)
         raise ValueError(f"Username '{username}' already exists")
 
+def get_user_id(username: str) -> int:
+    """
+    Look up a user's id by username.
+
+    Raises:
+        ValueError: If there is no such user.
+    """
+    try:
+        with get_db_connection(read_only=True) as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT id FROM users WHERE username = ?", (username,))
+            result = cursor.fetchone()
+
+            if not result:
+                raise ValueError(f"User '{username}' not found")
+            return result[0]
+
+    except sqlite3.Error as e:
+        logger.error("Database error: %s", str(e))
+        raise e
+
 def verify_user(username: str, password: str) -> bool:
     """Check if login credentials are correct."""
     try:
-        with get_db_connection() as conn:
+        with get_db_connection(read_only=True) as conn:
             cursor = conn.cursor()
             cursor.execute("""
                 SELECT password_hash, salt FROM users
@@ -73,16 +102,25 @@ def verify_user(username: str, password: str) -> bool:
 def update_password(username: str, old_password: str, new_password: str) -> bool:
     """Update a user's password."""
     try:
-        # First verify the old password
-        if not verify_user(username, old_password):
-            return False
-            
-        # Generate new salt and hash for the new password
-        salt = generate_salt()
-        new_hash = hash_password(new_password, salt)
-        
         with get_db_connection() as conn:
+            # Verify and update in one write transaction, so nothing can change
+            # the password between the check and the update
+            begin_immediate(conn)
             cursor = conn.cursor()
+            cursor.execute("""
+                SELECT password_hash, salt FROM users
+                WHERE username = ?
+            """, (username,))
+            result = cursor.fetchone()
+
+            # First verify the old password
+            if not result or hash_password(old_password, result[1]) != result[0]:
+                return False
+
+            # Generate new salt and hash for the new password
+            salt = generate_salt()
+            new_hash = hash_password(new_password, salt)
+
             cursor.execute("""
                 UPDATE users 
                 SET password_hash = ?, salt = ?
@@ -96,6 +134,51 @@ def update_password(username: str, old_password: str, new_password: str) -> bool
     except sqlite3.Error as e:
         logger.error("Database error during password update: %s", str(e))
         return False
-    
 
-    
+_file_secret: Optional[bytes] = None
+
+def _auth_secret() -> bytes:
+    """
+    The key login tokens are signed with: AUTH_SECRET if set, otherwise a
+    random key kept in AUTH_SECRET_PATH, so every worker on the host shares it.
+    """
+    global _file_secret
+    if AUTH_SECRET:
+        return AUTH_SECRET.encode()
+    if _file_secret is None:
+        if not os.path.exists(AUTH_SECRET_PATH):
+            os.makedirs(os.path.dirname(os.path.abspath(AUTH_SECRET_PATH)), exist_ok=True)
+            scratch = f"{AUTH_SECRET_PATH}.{os.getpid()}"
+            with open(os.open(scratch, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600), "w") as f:
+                f.write(os.urandom(32).hex())
+            try:
+                # Linked rather than written in place, so no worker ever reads a partial key
+                os.link(scratch, AUTH_SECRET_PATH)
+            except FileExistsError:
+                pass  # another worker created it first
+            finally:
+                os.remove(scratch)
+        with open(AUTH_SECRET_PATH) as f:
+            _file_secret = f.read().strip().encode()
+    return _file_secret
+
+def _sign(payload: str) -> str:
+    return hmac.new(_auth_secret(), payload.encode(), hashlib.sha256).hexdigest()
+
+def issue_token(username: str) -> str:
+    """Return a signed login token for a user, valid for AUTH_TOKEN_TTL seconds."""
+    encoded = base64.urlsafe_b64encode(username.encode()).decode()
+    payload = f"{encoded}.{int(time.time()) + AUTH_TOKEN_TTL}"
+    return f"{payload}.{_sign(payload)}"
+
+def verify_token(token: str) -> Optional[str]:
+    """Return the username a login token was issued to, or None if it is malformed, forged or expired."""
+    try:
+        encoded, expires, signature = token.split(".")
+        if not hmac.compare_digest(signature, _sign(f"{encoded}.{expires}")):
+            return None
+        if int(expires) < time.time():
+            return None
+        return base64.urlsafe_b64decode(encoded.encode()).decode()
+    except (ValueError, TypeError):
+        return None
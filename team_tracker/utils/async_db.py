@@ -0,0 +1,40 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+import functools
+import os
+from typing import Any, Callable, Optional
+
+from team_tracker.utils.sql_utils import DB_READ_POOL_SIZE, DB_WRITE_POOL_SIZE, unit_of_work
+
+
+# load the async database settings from the environment with sensible defaults;
+# more threads than pooled connections would only wait for a connection
+DB_THREADS = int(os.getenv("DB_THREADS", str(DB_READ_POOL_SIZE + DB_WRITE_POOL_SIZE)))
+
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_pid: Optional[int] = None
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor, _executor_pid
+    if _executor is None or _executor_pid != os.getpid():
+        _executor = ThreadPoolExecutor(max_workers=DB_THREADS, thread_name_prefix="db")
+        _executor_pid = os.getpid()
+    return _executor
+
+
+def _in_unit_of_work(fn: Callable[..., Any], read_only: bool, *args: Any, **kwargs: Any) -> Any:
+    with unit_of_work(read_only=read_only):
+        return fn(*args, **kwargs)
+
+
+async def run_db(fn: Callable[..., Any], *args: Any, read_only: bool = False, **kwargs: Any) -> Any:
+    """
+    Await a blocking model function, e.g. locker_model.get_favorites.
+
+    The call runs on a dedicated database thread pool, as its own unit of
+    work, so the event loop never waits on SQLite. Read-only calls are served
+    from the read connection pool.
+    """
+    call = functools.partial(_in_unit_of_work, fn, read_only, *args, **kwargs)
+    return await asyncio.get_running_loop().run_in_executor(_get_executor(), call)
@@ -0,0 +1,156 @@
+from collections import deque
+from datetime import datetime, timezone
+import logging
+import os
+import threading
+import time
+from typing import Any, Awaitable, Callable
+
+from team_tracker.utils.logger import configure_logger
+
+
+logger = logging.getLogger(__name__)
+configure_logger(logger)
+
+
+# load the breaker settings from the environment with sensible defaults
+BREAKER_WINDOW = int(os.getenv("BREAKER_WINDOW", "20"))
+BREAKER_MIN_CALLS = int(os.getenv("BREAKER_MIN_CALLS", "5"))
+BREAKER_FAILURE_RATE = float(os.getenv("BREAKER_FAILURE_RATE", "0.5"))
+BREAKER_SLOW_CALL_SECONDS = float(os.getenv("BREAKER_SLOW_CALL_SECONDS", "2.0"))
+BREAKER_SLOW_CALL_RATE = float(os.getenv("BREAKER_SLOW_CALL_RATE", "0.8"))
+BREAKER_OPEN_SECONDS = float(os.getenv("BREAKER_OPEN_SECONDS", "30"))
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(RuntimeError):
+    """Raised instead of calling upstream while a circuit is open."""
+
+
+class CircuitBreaker:
+    """
+    Stop calling an upstream that is failing or slow.
+
+    The breaker tracks the outcome of the last `window` calls. Once at least
+    `min_calls` are recorded and the share of failures or of calls slower than
+    `slow_call_seconds` crosses its threshold, the circuit opens and calls fail
+    immediately with CircuitOpenError. After `open_seconds` a single probe call
+    is let through (half-open): success closes the circuit, failure reopens it.
+
+    Only exceptions of the types in `failure_types` count as failures, so that
+    e.g. a 404 for an unknown team does not trip the breaker.
+    """
+
+    def __init__(self, name: str, window: int = BREAKER_WINDOW, min_calls: int = BREAKER_MIN_CALLS,
+                 failure_rate: float = BREAKER_FAILURE_RATE, slow_call_seconds: float = BREAKER_SLOW_CALL_SECONDS,
+                 slow_call_rate: float = BREAKER_SLOW_CALL_RATE, open_seconds: float = BREAKER_OPEN_SECONDS,
+                 failure_types: tuple = (RuntimeError,), clock: Callable[[], float] = time.monotonic) -> None:
+        self.name = name
+        self.min_calls = min_calls
+        self.failure_rate = failure_rate
+        self.slow_call_seconds = slow_call_seconds
+        self.slow_call_rate = slow_call_rate
+        self.open_seconds = open_seconds
+        self.failure_types = failure_types
+        self._clock = clock
+        self._outcomes: deque = deque(maxlen=window)  # (failed, slow) per call
+        self._state = CLOSED
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+        self._transitions: deque = deque(maxlen=10)
+        self._rejected = 0
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._state
+
+    def call(self, fn: Callable[[], Any]) -> Any:
+        """
+        Run fn through the breaker.
+
+        Raises:
+            CircuitOpenError: If the circuit is open, without calling fn.
+        """
+        self._before_call()
+        started = self._clock()
+        try:
+            result = fn()
+        except self.failure_types:
+            self._after_call(failed=True, elapsed=self._clock() - started)
+            raise
+        except BaseException:
+            self._after_call(failed=False, elapsed=self._clock() - started)
+            raise
+        self._after_call(failed=False, elapsed=self._clock() - started)
+        return result
+
+    async def call_async(self, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """Like call(), for a coroutine function."""
+        self._before_call()
+        started = self._clock()
+        try:
+            result = await fn()
+        except self.failure_types:
+            self._after_call(failed=True, elapsed=self._clock() - started)
+            raise
+        except BaseException:
+            self._after_call(failed=False, elapsed=self._clock() - started)
+            raise
+        self._after_call(failed=False, elapsed=self._clock() - started)
+        return result
+
+    def _before_call(self) -> None:
+        with self._lock:
+            if self._state == OPEN and self._clock() - self._opened_at >= self.open_seconds:
+                self._transition(HALF_OPEN)
+            if self._state == HALF_OPEN and not self._probe_in_flight:
+                self._probe_in_flight = True
+                return
+            if self._state != CLOSED:
+                self._rejected += 1
+                raise CircuitOpenError(f"ESPN {self.name} circuit is open")
+
+    def _after_call(self, failed: bool, elapsed: float) -> None:
+        slow = elapsed >= self.slow_call_seconds
+        with self._lock:
+            if self._state == HALF_OPEN:
+                self._probe_in_flight = False
+                if failed or slow:
+                    self._open()
+                else:
+                    self._outcomes.clear()
+                    self._transition(CLOSED)
+                return
+
+            self._outcomes.append((failed, slow))
+            if self._state == CLOSED and len(self._outcomes) >= self.min_calls:
+                failures = sum(1 for f, _ in self._outcomes if f) / len(self._outcomes)
+                slow_calls = sum(1 for _, s in self._outcomes if s) / len(self._outcomes)
+                if failures >= self.failure_rate or slow_calls >= self.slow_call_rate:
+                    self._open()
+
+    def _open(self) -> None:
+        self._opened_at = self._clock()
+        self._transition(OPEN)
+
+    def _transition(self, state: str) -> None:
+        logger.warning("ESPN %s circuit %s -> %s", self.name, self._state, state)
+        self._transitions.append({"from": self._state, "to": state, "at": datetime.now(timezone.utc).isoformat()})
+        self._state = state
+
+    def status(self) -> dict:
+        with self._lock:
+            calls = len(self._outcomes)
+            return {
+                "state": self._state,
+                "calls": calls,
+                "failure_rate": sum(1 for f, _ in self._outcomes if f) / calls if calls else 0.0,
+                "slow_call_rate": sum(1 for _, s in self._outcomes if s) / calls if calls else 0.0,
+                "rejected": self._rejected,
+                "transitions": list(self._transitions),
+            }
@@ -0,0 +1,293 @@
+from dataclasses import dataclass
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Hashable, Optional
+
+from team_tracker.utils.logger import configure_logger
+from team_tracker.utils.sql_utils import DB_PATH
+
+
+logger = logging.getLogger(__name__)
+configure_logger(logger)
+
+
+# load the disk cache settings from the environment with sensible defaults
+DISK_CACHE_PATH = os.getenv("DISK_CACHE_PATH", os.path.join(os.path.dirname(DB_PATH), "http_cache.db"))
+DISK_CACHE_MAX_BYTES = int(os.getenv("DISK_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+DISK_CACHE_TOUCH_INTERVAL = float(os.getenv("DISK_CACHE_TOUCH_INTERVAL", "60"))
+
+
+@dataclass
+class RawEntry:
+    body: bytes
+    etag: Optional[str]
+    last_modified: Optional[str]
+    content_hash: str
+    fetched_at: float
+
+
+class DiskCache:
+    """
+    Persistent response cache shared by every worker process.
+
+    Holds two kinds of entries in one SQLite file:
+      - raw ESPN responses per URL, with their validators, so the first fetch
+        after a restart can still be conditional and a 304 can be answered
+        from disk;
+      - projected responses per (endpoint, key), with their expiry, which
+        are loaded into the in-process ResponseCache at startup.
+
+    The file is kept under max_bytes by evicting least recently used entries.
+    Triggers keep a running total of the entries' sizes, so a put doesn't
+    re-sum both tables, and a read only records its access time when the
+    stored one is more than touch_interval seconds old, so most reads don't
+    write.
+    """
+
+    def __init__(self, path: str = DISK_CACHE_PATH, max_bytes: int = DISK_CACHE_MAX_BYTES,
+                 touch_interval: float = DISK_CACHE_TOUCH_INTERVAL) -> None:
+        self.path = path
+        self.max_bytes = max_bytes
+        self.touch_interval = touch_interval
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._counters = {"raw_hits": 0, "raw_misses": 0, "writes": 0, "evictions": 0}
+
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        conn = self._connection()
+        # WAL lets every worker read while one of them writes
+        conn.execute("PRAGMA journal_mode=WAL;")
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS raw_responses (
+                url TEXT PRIMARY KEY,
+                body BLOB NOT NULL,
+                etag TEXT,
+                last_modified TEXT,
+                content_hash TEXT NOT NULL,
+                fetched_at REAL NOT NULL,
+                last_access REAL NOT NULL,
+                size INTEGER NOT NULL
+            );
+        """)
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS projected_responses (
+                endpoint TEXT NOT NULL,
+                key TEXT NOT NULL,
+                value TEXT NOT NULL,
+                fetched_at REAL NOT NULL,
+                expires_at REAL NOT NULL,
+                last_access REAL NOT NULL,
+                size INTEGER NOT NULL,
+                PRIMARY KEY (endpoint, key)
+            );
+        """)
+        # Serialize with other workers setting up the same file
+        conn.execute("BEGIN IMMEDIATE")
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS cache_size (
+                id INTEGER PRIMARY KEY CHECK (id = 1),
+                bytes INTEGER NOT NULL
+            );
+        """)
+        for table in ("raw_responses", "projected_responses"):
+            conn.execute(f"""
+                CREATE TRIGGER IF NOT EXISTS {table}_size_insert AFTER INSERT ON {table}
+                BEGIN UPDATE cache_size SET bytes = bytes + new.size; END;
+            """)
+            conn.execute(f"""
+                CREATE TRIGGER IF NOT EXISTS {table}_size_update AFTER UPDATE OF size ON {table}
+                BEGIN UPDATE cache_size SET bytes = bytes - old.size + new.size; END;
+            """)
+            conn.execute(f"""
+                CREATE TRIGGER IF NOT EXISTS {table}_size_delete AFTER DELETE ON {table}
+                BEGIN UPDATE cache_size SET bytes = bytes - old.size; END;
+            """)
+        # Seeded once from the tables as they are, e.g. in a file from before the triggers existed
+        conn.execute("""
+            INSERT OR IGNORE INTO cache_size (id, bytes)
+            SELECT 1, (SELECT COALESCE(SUM(size), 0) FROM raw_responses)
+                    + (SELECT COALESCE(SUM(size), 0) FROM projected_responses)
+        """)
+        conn.commit()
+
+    def _connection(self) -> sqlite3.Connection:
+        # SQLite connections must not cross a fork, so they are per thread and per process
+        conn = getattr(self._local, "conn", None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=5)
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def _count(self, counter: str, n: int = 1) -> None:
+        with self._lock:
+            self._counters[counter] += n
+
+    def get_raw(self, url: str) -> Optional[RawEntry]:
+        try:
+            conn = self._connection()
+            row = conn.execute("""
+                SELECT body, etag, last_modified, content_hash, fetched_at, last_access
+                FROM raw_responses WHERE url = ?
+            """, (url,)).fetchone()
+            if row is None:
+                self._count("raw_misses")
+                return None
+            now = time.time()
+            if now - row[5] > self.touch_interval:
+                conn.execute("UPDATE raw_responses SET last_access = ? WHERE url = ?", (now, url))
+                conn.commit()
+            self._count("raw_hits")
+            return RawEntry(*row[:5])
+
+        except sqlite3.Error as e:
+            # The disk cache is an optimization; never fail a request because of it
+            logger.error("Disk cache error: %s", str(e))
+            return None
+
+    def put_raw(self, url: str, entry: RawEntry) -> None:
+        try:
+            conn = self._connection()
+            # An upsert rather than INSERT OR REPLACE, whose implicit delete wouldn't fire the size triggers
+            conn.execute("""
+                INSERT INTO raw_responses
+                    (url, body, etag, last_modified, content_hash, fetched_at, last_access, size)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT(url) DO UPDATE SET
+                    body = excluded.body, etag = excluded.etag, last_modified = excluded.last_modified,
+                    content_hash = excluded.content_hash, fetched_at = excluded.fetched_at,
+                    last_access = excluded.last_access, size = excluded.size
+            """, (url, entry.body, entry.etag, entry.last_modified, entry.content_hash,
+                  entry.fetched_at, time.time(), len(entry.body)))
+            conn.commit()
+            self._count("writes")
+            self._evict(conn)
+
+        except sqlite3.Error as e:
+            logger.error("Disk cache error: %s", str(e))
+
+    def delete_raw(self, url: str) -> None:
+        try:
+            conn = self._connection()
+            conn.execute("DELETE FROM raw_responses WHERE url = ?", (url,))
+            conn.commit()
+
+        except sqlite3.Error as e:
+            logger.error("Disk cache error: %s", str(e))
+
+    def put_projected(self, endpoint: str, key: Hashable, value: Any, ttl: float) -> None:
+        try:
+            now = time.time()
+            encoded = json.dumps(value)
+            conn = self._connection()
+            conn.execute("""
+                INSERT INTO projected_responses
+                    (endpoint, key, value, fetched_at, expires_at, last_access, size)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT(endpoint, key) DO UPDATE SET
+                    value = excluded.value, fetched_at = excluded.fetched_at, expires_at = excluded.expires_at,
+                    last_access = excluded.last_access, size = excluded.size
+            """, (endpoint, json.dumps(key), encoded, now, now + ttl, now, len(encoded)))
+            conn.commit()
+            self._count("writes")
+            self._evict(conn)
+
+        except (sqlite3.Error, TypeError) as e:
+            logger.error("Disk cache error: %s", str(e))
+
+    def get_projected(self, endpoint: str, key: Hashable) -> Optional[tuple[Any, float]]:
+        """Return (value, expires_at) for an entry another worker may have stored, or None."""
+        try:
+            conn = self._connection()
+            encoded_key = json.dumps(key)
+            row = conn.execute("""
+                SELECT value, expires_at, last_access FROM projected_responses WHERE endpoint = ? AND key = ?
+            """, (endpoint, encoded_key)).fetchone()
+            if row is None:
+                return None
+            now = time.time()
+            if now - row[2] > self.touch_interval:
+                conn.execute("UPDATE projected_responses SET last_access = ? WHERE endpoint = ? AND key = ?",
+                             (now, endpoint, encoded_key))
+                conn.commit()
+            return json.loads(row[0]), row[1]
+
+        except (sqlite3.Error, TypeError) as e:
+            logger.error("Disk cache error: %s", str(e))
+            return None
+
+    def load_projected(self, not_expired_before: float) -> list[tuple[str, Hashable, Any, float]]:
+        """Return (endpoint, key, value, expires_at) for entries expiring after the given time."""
+        try:
+            rows = self._connection().execute("""
+                SELECT endpoint, key, value, expires_at FROM projected_responses
+                WHERE expires_at > ? ORDER BY last_access
+            """, (not_expired_before,)).fetchall()
+            return [(endpoint, json.loads(key), json.loads(value), expires_at)
+                    for endpoint, key, value, expires_at in rows]
+
+        except sqlite3.Error as e:
+            logger.error("Disk cache error: %s", str(e))
+            return []
+
+    def _evict(self, conn: sqlite3.Connection) -> None:
+        total = conn.execute("SELECT bytes FROM cache_size").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+
+        # Drop least recently used entries, across both tables, until we fit
+        rows = conn.execute("""
+            SELECT 'raw', url, NULL, size, last_access FROM raw_responses
+            UNION ALL
+            SELECT 'projected', endpoint, key, size, last_access FROM projected_responses
+            ORDER BY last_access
+        """).fetchall()
+        evicted = 0
+        for kind, first, second, size, _ in rows:
+            if total <= self.max_bytes:
+                break
+            if kind == "raw":
+                conn.execute("DELETE FROM raw_responses WHERE url = ?", (first,))
+            else:
+                conn.execute("DELETE FROM projected_responses WHERE endpoint = ? AND key = ?", (first, second))
+            total -= size
+            evicted += 1
+        conn.commit()
+        self._count("evictions", evicted)
+
+    def stats(self) -> dict:
+        try:
+            conn = self._connection()
+            raw_entries = conn.execute("SELECT COUNT(*) FROM raw_responses").fetchone()[0]
+            projected_entries = conn.execute("SELECT COUNT(*) FROM projected_responses").fetchone()[0]
+            total = conn.execute("SELECT bytes FROM cache_size").fetchone()[0]
+        except sqlite3.Error as e:
+            logger.error("Disk cache error: %s", str(e))
+            raw_entries = projected_entries = total = 0
+
+        with self._lock:
+            return dict(
+                self._counters,
+                raw_entries=raw_entries,
+                projected_entries=projected_entries,
+                bytes=total,
+                max_bytes=self.max_bytes,
+            )
+
+
+_disk_cache: Optional[DiskCache] = None
+_disk_cache_lock = threading.Lock()
+
+
+def get_disk_cache() -> DiskCache:
+    """Return the disk cache shared by the ESPN client and the response cache."""
+    global _disk_cache
+    if _disk_cache is None:
+        with _disk_cache_lock:
+            if _disk_cache is None:
+                _disk_cache = DiskCache()
+    return _disk_cache
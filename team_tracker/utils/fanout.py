@@ -0,0 +1,37 @@
+import asyncio
+import os
+from typing import Any, Callable, Hashable, Iterable
+
+
+# load the fan-out settings from the environment with sensible defaults
+BULK_CONCURRENCY = int(os.getenv("BULK_CONCURRENCY", "8"))
+BULK_MAX_IDS = int(os.getenv("BULK_MAX_IDS", "32"))
+
+
+async def _run_bounded(semaphore: asyncio.Semaphore, fn: Callable[[Any], Any], key: Hashable) -> Any:
+    async with semaphore:
+        # The ESPN client and SQLite are blocking, so each call runs on a worker thread
+        return await asyncio.to_thread(fn, key)
+
+
+async def fan_out(keys: Iterable[Hashable], fn: Callable[[Any], Any],
+                  max_concurrency: int = BULK_CONCURRENCY) -> dict:
+    """
+    Call fn for every key concurrently, at most max_concurrency at a time.
+
+    Returns a map of key to result; a call that raised maps to its exception
+    so that one failure does not sink the others.
+    """
+    keys = list(keys)
+    semaphore = asyncio.Semaphore(max_concurrency)
+    results = await asyncio.gather(
+        *(_run_bounded(semaphore, fn, key) for key in keys),
+        return_exceptions=True,
+    )
+    return dict(zip(keys, results))
+
+
+def fan_out_blocking(keys: Iterable[Hashable], fn: Callable[[Any], Any],
+                     max_concurrency: int = BULK_CONCURRENCY) -> dict:
+    """Run fan_out to completion from synchronous code, e.g. a Flask view."""
+    return asyncio.run(fan_out(keys, fn, max_concurrency))
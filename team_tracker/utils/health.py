@@ -0,0 +1,162 @@
+import logging
+import os
+import threading
+import time
+from typing import Any, Callable, Iterable, Optional
+
+from team_tracker.utils.logger import configure_logger
+from team_tracker.utils.migrations import MIGRATIONS
+from team_tracker.utils.sql_utils import get_read_connection
+
+
+logger = logging.getLogger(__name__)
+configure_logger(logger)
+
+
+# load the health check settings from the environment with sensible defaults
+HEALTH_INTERVAL = float(os.getenv("HEALTH_INTERVAL", "5"))
+HEALTH_STALE_AFTER = float(os.getenv("HEALTH_STALE_AFTER", "30"))
+
+Check = Callable[[], dict]
+
+
+def _run(checks: dict[str, Check]) -> dict[str, dict]:
+    results = {}
+    for name, check in checks.items():
+        started = time.monotonic()
+        try:
+            result = dict(check())
+        except Exception as e:
+            result = {"ok": False, "error": str(e)}
+        result["ms"] = (time.monotonic() - started) * 1000
+        results[name] = result
+    return results
+
+
+class HealthMonitor:
+    """
+    Dependency status for the readiness probe, refreshed in the background.
+
+    Every interval seconds a thread runs the checks, each a function
+    returning a dict with at least "ok", and keeps the results as a
+    snapshot. Probes only read that snapshot, so they cost microseconds
+    and no I/O however often they come. The instance is ready when every
+    critical check passed and the snapshot is younger than stale_after
+    (the thread may have died); the other checks are only reported.
+
+    deep_check() runs the checks and the deep ones right away, for an
+    operator or a probe that can afford real I/O.
+    """
+
+    def __init__(self, checks: dict[str, Check], critical: Iterable[str],
+                 deep_checks: Optional[dict[str, Check]] = None, interval: float = HEALTH_INTERVAL,
+                 stale_after: float = HEALTH_STALE_AFTER) -> None:
+        self.checks = checks
+        self.critical = set(critical)
+        self.deep_checks = deep_checks or {}
+        self.interval = interval
+        self.stale_after = stale_after
+        self._snapshot: Optional[dict] = None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def _ready(self, results: dict[str, dict]) -> bool:
+        return all(results.get(name, {}).get("ok") for name in self.critical)
+
+    def refresh(self) -> dict:
+        """Run the checks now and publish the results."""
+        results = _run(self.checks)
+        ready = self._ready(results)
+        previous = self._snapshot
+        if previous is not None and previous["ready"] != ready:
+            logger.warning("Readiness changed to %s: %s", ready,
+                           {name: r for name, r in results.items() if not r.get("ok")})
+        # Replaced whole, so readers never see a half-updated snapshot
+        self._snapshot = {"ready": ready, "checked_at": time.time(), "checks": results}
+        return self._snapshot
+
+    def start(self) -> None:
+        """Take a first snapshot, then keep refreshing it in the background."""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self.refresh()
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._loop, name="health-monitor", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def _loop(self) -> None:
+        while not self._stop.wait(self.interval):
+            try:
+                self.refresh()
+            except Exception as e:
+                logger.error("Health refresh failed: %s", str(e))
+
+    def snapshot(self) -> dict:
+        """The last published status, with whether it makes this instance ready."""
+        snapshot = self._snapshot
+        if snapshot is None:
+            return {"ready": False, "reason": "starting", "checks": {}}
+        age = time.time() - snapshot["checked_at"]
+        if age > self.stale_after:
+            return dict(snapshot, ready=False, reason="stale", age_s=age)
+        return dict(snapshot, age_s=age)
+
+    def deep_check(self) -> dict:
+        """Run every check, cheap and deep, now."""
+        results = _run(dict(self.checks, **self.deep_checks))
+        return {"ready": self._ready(results), "checked_at": time.time(), "deep": True, "checks": results}
+
+
+###################################################
+#
+# Checks
+#
+###################################################
+
+def database_check() -> dict:
+    """The database answers on a pooled connection and has the latest schema."""
+    with get_read_connection() as conn:
+        version = conn.execute("SELECT MAX(version) FROM schema_version").fetchone()[0]
+    expected = MIGRATIONS[-1][0]
+    return {"ok": version == expected, "schema_version": version, "expected_schema_version": expected}
+
+
+def database_integrity_check() -> dict:
+    """PRAGMA quick_check over the whole file; reads every page, so deep only."""
+    with get_read_connection() as conn:
+        result = conn.execute("PRAGMA quick_check;").fetchone()[0]
+    return {"ok": result == "ok", "result": result}
+
+
+def espn_breakers_check(clients: Callable[[], list]) -> Check:
+    """ESPN is considered up while none of the clients' circuit breakers is open."""
+    def check() -> dict:
+        states: dict[str, str] = {}
+        for client in clients():
+            for family, status in client.breaker_status().items():
+                if states.get(family, "closed") == "closed":
+                    states[family] = status["state"]
+        return {"ok": all(state == "closed" for state in states.values()), "breakers": states}
+    return check
+
+
+def espn_reachability_check(client: Callable[[], Any]) -> Check:
+    """A conditional request for the teams, usually answered 304 without a body."""
+    def check() -> dict:
+        client().teams(only_if_changed=True)
+        return {"ok": True}
+    return check
+
+
+def cache_check(response_cache: Any, read_cache: Any) -> Check:
+    """Whether the caches hold anything yet; a cold cache only means slower first requests."""
+    def check() -> dict:
+        responses = response_cache.stats()["size"]
+        reads = read_cache.stats()["entries"]
+        return {"ok": responses > 0, "response_cache_entries": responses, "read_cache_entries": reads}
+    return check
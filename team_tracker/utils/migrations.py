@@ -0,0 +1,286 @@
+import logging
+import sqlite3
+import time
+from typing import Callable
+
+from team_tracker.utils.logger import configure_logger
+
+
+logger = logging.getLogger(__name__)
+configure_logger(logger)
+
+
+def _columns(cursor: sqlite3.Cursor, table: str) -> list[str]:
+    cursor.execute(f"PRAGMA table_info({table})")
+    return [row[1] for row in cursor.fetchall()]
+
+
+def _0001_initial(cursor: sqlite3.Cursor) -> None:
+    """
+    Reconcile the two schemas the app used to be created from.
+
+    initialize_database() created teams(team, city, sport, league), which no
+    model uses; sql/create_team_table.sql created the teams table the models
+    expect. Whichever a database has, this leaves it with the latter, keeping
+    any rows: a teams table without nfl_id is renamed to teams_legacy.
+    """
+    columns = _columns(cursor, "teams")
+    if columns and "nfl_id" not in columns:
+        logger.warning("Keeping the old teams table as teams_legacy")
+        cursor.execute("ALTER TABLE teams RENAME TO teams_legacy;")
+
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS teams (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            team TEXT NOT NULL UNIQUE,
+            nfl_id INTEGER NOT NULL,
+            loc TEXT NOT NULL,
+            games INTEGER DEFAULT 0,
+            wins INTEGER DEFAULT 0,
+            favorite BOOLEAN DEFAULT FALSE
+        );
+    """)
+    # Favorites are toggled and upserted by nfl_id, and listed by favorite = TRUE
+    cursor.execute("CREATE UNIQUE INDEX IF NOT EXISTS idx_teams_nfl_id ON teams (nfl_id);")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_teams_favorite ON teams (nfl_id) WHERE favorite = TRUE;")
+
+    # users.username is UNIQUE, which already indexes logins by username
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS users (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            username TEXT UNIQUE NOT NULL,
+            password_hash TEXT NOT NULL,
+            salt TEXT NOT NULL
+        );
+    """)
+
+    # Schedule tables; schedules records when each team was last synced
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS schedules (
+            nfl_id INTEGER PRIMARY KEY,
+            synced_at REAL NOT NULL
+        );
+    """)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS games (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            nfl_id INTEGER NOT NULL,
+            week TEXT NOT NULL,
+            date TEXT NOT NULL,
+            name TEXT NOT NULL
+        );
+    """)
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_games_nfl_id_date ON games (nfl_id, date);")
+
+    # Roster tables; rosters records when each team was last synced
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS rosters (
+            nfl_id INTEGER PRIMARY KEY,
+            synced_at REAL NOT NULL
+        );
+    """)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS roster_entries (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            nfl_id INTEGER NOT NULL,
+            name TEXT NOT NULL,
+            age INTEGER,
+            position TEXT NOT NULL
+        );
+    """)
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_roster_entries_nfl_id ON roster_entries (nfl_id);")
+
+
+def _0002_user_favorites(cursor: sqlite3.Cursor) -> None:
+    """
+    Per-user favorites, replacing the single favorite flag every user shared.
+
+    WITHOUT ROWID stores the rows in primary key order, so the key doubles as
+    a covering index: listing one user's favorites is a range scan over
+    (user_id, team_id) whose cost depends only on that user's row count.
+    """
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS user_favorites (
+            user_id INTEGER NOT NULL REFERENCES users (id),
+            team_id INTEGER NOT NULL REFERENCES teams (id),
+            created_at REAL NOT NULL,
+            PRIMARY KEY (user_id, team_id)
+        ) WITHOUT ROWID;
+    """)
+    # For finding who follows a team, e.g. when a team is removed
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_user_favorites_team_id ON user_favorites (team_id);")
+
+
+def _0003_teams_listing_indexes(cursor: sqlite3.Cursor) -> None:
+    """
+    Indexes for keyset paging of /api/teams and /api/get-favs in id order.
+
+    Both keep rows in id order within the filter, so a page is an index seek
+    past the cursor rather than a scan of the teams that don't match.
+    """
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_teams_loc ON teams (loc);")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_teams_favorite_id ON teams (id) WHERE favorite = TRUE;")
+
+
+def _0004_table_versions(cursor: sqlite3.Cursor) -> None:
+    """
+    A change counter per cached table, bumped by triggers in the writing
+    transaction, so read caches in every worker can tell when to reload.
+    """
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS table_versions (
+            name TEXT PRIMARY KEY,
+            version INTEGER NOT NULL
+        );
+    """)
+    cursor.execute("INSERT OR IGNORE INTO table_versions (name, version) VALUES ('teams', 0);")
+    for event in ("INSERT", "UPDATE", "DELETE"):
+        cursor.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS teams_version_after_{event.lower()} AFTER {event} ON teams
+            BEGIN
+                UPDATE table_versions SET version = version + 1 WHERE name = 'teams';
+            END;
+        """)
+
+
+def _0005_standings(cursor: sqlite3.Cursor) -> None:
+    """
+    Standings columns on teams, maintained incrementally from game results.
+
+    game_results keeps the last score applied for every game, so a game seen
+    again (from the other team's schedule, or a later sync) is a no-op and a
+    corrected score is applied as a difference.
+    """
+    for column in ("losses", "ties", "division_wins", "division_losses", "division_ties",
+                   "conference_wins", "conference_losses", "conference_ties",
+                   "points_for", "points_against", "point_diff"):
+        if column not in _columns(cursor, "teams"):
+            cursor.execute(f"ALTER TABLE teams ADD COLUMN {column} INTEGER NOT NULL DEFAULT 0;")
+    if "win_pct" not in _columns(cursor, "teams"):
+        cursor.execute("ALTER TABLE teams ADD COLUMN win_pct REAL NOT NULL DEFAULT 0;")
+    for column in ("conference", "division"):
+        if column not in _columns(cursor, "teams"):
+            cursor.execute(f"ALTER TABLE teams ADD COLUMN {column} TEXT;")
+    # /api/standings reads the teams in this order straight off the index
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_teams_standings
+        ON teams (conference, division, win_pct DESC, point_diff DESC);
+    """)
+
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS game_results (
+            event_id TEXT PRIMARY KEY,
+            week INTEGER,
+            home_id INTEGER NOT NULL,
+            away_id INTEGER NOT NULL,
+            home_score INTEGER NOT NULL,
+            away_score INTEGER NOT NULL,
+            recorded_at REAL NOT NULL
+        );
+    """)
+
+
+def _0006_teams_sorted_listing_indexes(cursor: sqlite3.Cursor) -> None:
+    """
+    Indexes for keyset paging of /api/teams by loc, sorted by team or nfl_id.
+
+    Without them SQLite sorted each loc's teams in a temporary B-tree for
+    every page. Both columns are unique, and each index entry ends with the
+    rowid (id), so these are the (loc, team, id) and (loc, nfl_id, id)
+    orders. idx_teams_favorite (nfl_id, partial on favorite) goes: favorites
+    are listed through idx_teams_favorite_id, and toggled by idx_teams_nfl_id.
+    """
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_teams_loc_team ON teams (loc, team);")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_teams_loc_nfl_id ON teams (loc, nfl_id);")
+    cursor.execute("DROP INDEX IF EXISTS idx_teams_favorite;")
+
+
+def _0007_pending_results(cursor: sqlite3.Cursor) -> None:
+    """
+    Standings for every stored team, and results waiting on a team.
+
+    Teams used to get their conference and division with their first
+    result, so teams yet to play were missing from the standings; stored
+    teams get them now, from the alignment as of this migration, and new
+    teams get them when stored. pending_results keeps the games skipped for
+    involving a team that wasn't stored yet, to be recorded once it is.
+    """
+    alignment = {
+        "AFC": {"East": (2, 15, 17, 20), "North": (33, 4, 5, 23), "South": (34, 11, 30, 10), "West": (7, 12, 13, 24)},
+        "NFC": {"East": (6, 19, 21, 28), "North": (3, 8, 9, 16), "South": (1, 29, 18, 27), "West": (22, 14, 25, 26)},
+    }
+    cursor.executemany(
+        "UPDATE teams SET conference = ?, division = ? WHERE nfl_id = ? AND conference IS NULL",
+        [(conference, division, nfl_id)
+         for conference, divisions in alignment.items()
+         for division, nfl_ids in divisions.items()
+         for nfl_id in nfl_ids],
+    )
+
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS pending_results (
+            event_id TEXT PRIMARY KEY,
+            week INTEGER,
+            home_id INTEGER NOT NULL,
+            away_id INTEGER NOT NULL,
+            home_score INTEGER NOT NULL,
+            away_score INTEGER NOT NULL,
+            recorded_at REAL NOT NULL
+        );
+    """)
+
+
+# Forward-only: never edit or reorder a released migration, append a new one
+MIGRATIONS: list[tuple[int, str, Callable[[sqlite3.Cursor], None]]] = [
+    (1, "initial", _0001_initial),
+    (2, "user_favorites", _0002_user_favorites),
+    (3, "teams_listing_indexes", _0003_teams_listing_indexes),
+    (4, "table_versions", _0004_table_versions),
+    (5, "standings", _0005_standings),
+    (6, "teams_sorted_listing_indexes", _0006_teams_sorted_listing_indexes),
+    (7, "pending_results", _0007_pending_results),
+]
+
+
+def apply_migrations(conn: sqlite3.Connection) -> list[int]:
+    """
+    Apply every pending migration in a single transaction.
+
+    BEGIN IMMEDIATE makes concurrent workers starting up together wait for
+    each other, so each migration runs exactly once. If any migration fails,
+    none of the pending ones are applied.
+
+    Returns:
+        list[int]: The versions applied by this call.
+    """
+    cursor = conn.cursor()
+    cursor.execute("BEGIN IMMEDIATE")
+    try:
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS schema_version (
+                version INTEGER PRIMARY KEY,
+                name TEXT NOT NULL,
+                applied_at REAL NOT NULL
+            );
+        """)
+        cursor.execute("SELECT COALESCE(MAX(version), 0) FROM schema_version")
+        current = cursor.fetchone()[0]
+
+        applied = []
+        for version, name, migrate in MIGRATIONS:
+            if version <= current:
+                continue
+            logger.info("Applying migration %04d_%s", version, name)
+            migrate(cursor)
+            cursor.execute("INSERT INTO schema_version (version, name, applied_at) VALUES (?, ?, ?)",
+                           (version, name, time.time()))
+            applied.append(version)
+        conn.commit()
+
+    except BaseException:
+        conn.rollback()
+        raise
+
+    if applied:
+        logger.info("Schema migrated to version %d", applied[-1])
+    return applied
@@ -0,0 +1,210 @@
+import asyncio
+from contextlib import closing, contextmanager
+import contextvars
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Iterator, Optional
+
+from team_tracker.utils.logger import configure_logger
+from team_tracker.utils.sql_utils import DB_PATH
+
+
+logger = logging.getLogger(__name__)
+configure_logger(logger)
+
+
+# load the rate limit settings from the environment with sensible defaults
+ESPN_RATE_LIMIT = float(os.getenv("ESPN_RATE_LIMIT", "10"))  # requests per second, 0 disables
+ESPN_RATE_BURST = float(os.getenv("ESPN_RATE_BURST", "20"))
+ESPN_RATE_BACKGROUND_RESERVE = float(os.getenv("ESPN_RATE_BACKGROUND_RESERVE", "5"))
+ESPN_RATE_MAX_WAIT = float(os.getenv("ESPN_RATE_MAX_WAIT", "2"))
+ESPN_RATE_STATE_PATH = os.getenv(
+    "ESPN_RATE_STATE_PATH", os.path.join(os.path.dirname(DB_PATH), "espn_rate_limit.db"))
+
+INTERACTIVE = "interactive"
+BACKGROUND = "background"
+
+# Priority of the ESPN calls made by the current thread or task
+current_priority: contextvars.ContextVar = contextvars.ContextVar("espn_priority", default=INTERACTIVE)
+
+
+@contextmanager
+def background_priority() -> Iterator[None]:
+    """Mark the ESPN calls made inside the block as background traffic."""
+    token = current_priority.set(BACKGROUND)
+    try:
+        yield
+    finally:
+        current_priority.reset(token)
+
+
+class TokenBucket:
+    """
+    Token bucket rate limiter shared by every thread and worker process.
+
+    The bucket refills at `rate` tokens per second up to `burst`. Its state
+    lives in a small SQLite file, updated under BEGIN IMMEDIATE, so all
+    processes pointed at the same file share one budget.
+
+    Interactive callers take precedence over background ones: background
+    calls leave `background_reserve` tokens in the bucket for interactive
+    traffic from any process, and within a process they also hold back while
+    an interactive caller is waiting. Interactive callers give up with a
+    RuntimeError rather than wait longer than `max_wait` seconds.
+    """
+
+    def __init__(self, name: str = "espn", rate: float = ESPN_RATE_LIMIT, burst: float = ESPN_RATE_BURST,
+                 background_reserve: float = ESPN_RATE_BACKGROUND_RESERVE, max_wait: float = ESPN_RATE_MAX_WAIT,
+                 state_path: str = ESPN_RATE_STATE_PATH) -> None:
+        self.name = name
+        self.rate = rate
+        self.burst = burst
+        self.background_reserve = min(background_reserve, max(burst - 1, 0))
+        self.max_wait = max_wait
+        self.state_path = state_path
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._interactive_waiting = 0
+        self._stats = {
+            priority: {"acquired": 0, "rejected": 0, "wait_ms_total": 0.0, "wait_ms_max": 0.0}
+            for priority in (INTERACTIVE, BACKGROUND)
+        }
+
+        os.makedirs(os.path.dirname(os.path.abspath(state_path)), exist_ok=True)
+        with self._connection() as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS token_buckets (
+                    name TEXT PRIMARY KEY,
+                    tokens REAL NOT NULL,
+                    updated_at REAL NOT NULL
+                );
+            """)
+
+    @property
+    def enabled(self) -> bool:
+        return self.rate > 0
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            # Autocommit mode so we control the transaction with BEGIN IMMEDIATE
+            conn = sqlite3.connect(self.state_path, timeout=5, isolation_level=None)
+            self._local.conn = conn
+        return conn
+
+    def _take(self, floor: float) -> float:
+        """
+        Take a token if more than `floor - 1` would remain.
+
+        Returns 0 if a token was taken, otherwise the seconds until one should be.
+        """
+        conn = self._connection()
+        now = time.time()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute("SELECT tokens, updated_at FROM token_buckets WHERE name = ?", (self.name,)).fetchone()
+            tokens = self.burst if row is None else min(self.burst, row[0] + max(now - row[1], 0) * self.rate)
+            wait = 0.0
+            if tokens >= floor:
+                tokens -= 1
+            else:
+                wait = (floor - tokens) / self.rate
+            conn.execute("""
+                INSERT INTO token_buckets (name, tokens, updated_at) VALUES (?, ?, ?)
+                ON CONFLICT(name) DO UPDATE SET tokens = excluded.tokens, updated_at = excluded.updated_at
+            """, (self.name, tokens, now))
+            conn.execute("COMMIT")
+        except sqlite3.Error:
+            conn.execute("ROLLBACK")
+            raise
+        return wait
+
+    def _waits(self, priority: str, started: float) -> Iterator[float]:
+        """
+        Try to take a token, yielding how long to sleep before each retry.
+
+        Shared by acquire() and acquire_async(), which differ only in how they sleep.
+        """
+        interactive = priority == INTERACTIVE
+        floor = 1 if interactive else 1 + self.background_reserve
+
+        if interactive:
+            with self._lock:
+                self._interactive_waiting += 1
+        try:
+            while True:
+                if not interactive and self._interactive_waiting:
+                    yield 1 / self.rate
+                    continue
+                wait = self._take(floor)
+                if wait == 0:
+                    return
+                if interactive and time.monotonic() - started + wait > self.max_wait:
+                    with self._lock:
+                        self._stats[priority]["rejected"] += 1
+                    logger.warning("ESPN rate limit exceeded; not waiting %.2fs", wait)
+                    raise RuntimeError("ESPN rate limit exceeded")
+                yield wait
+        finally:
+            if interactive:
+                with self._lock:
+                    self._interactive_waiting -= 1
+
+    def _acquired(self, priority: str, started: float) -> float:
+        waited = time.monotonic() - started
+        with self._lock:
+            stats = self._stats[priority]
+            stats["acquired"] += 1
+            stats["wait_ms_total"] += waited * 1000
+            stats["wait_ms_max"] = max(stats["wait_ms_max"], waited * 1000)
+        return waited
+
+    def acquire(self, priority: Optional[str] = None) -> float:
+        """
+        Block until a request may be sent; returns the time waited in seconds.
+
+        Raises:
+            RuntimeError: If an interactive caller would wait longer than max_wait.
+        """
+        if not self.enabled:
+            return 0.0
+        priority = priority or current_priority.get()
+        started = time.monotonic()
+        with closing(self._waits(priority, started)) as waits:
+            for wait in waits:
+                time.sleep(wait)
+        return self._acquired(priority, started)
+
+    async def acquire_async(self, priority: Optional[str] = None) -> float:
+        """Like acquire(), but without blocking the event loop."""
+        if not self.enabled:
+            return 0.0
+        priority = priority or current_priority.get()
+        started = time.monotonic()
+        with closing(self._waits(priority, started)) as waits:
+            while True:
+                # Each try takes the SQLite write lock, which another process may
+                # hold for up to the busy timeout, so it runs on a thread
+                wait = await asyncio.to_thread(next, waits, None)
+                if wait is None:
+                    break
+                await asyncio.sleep(wait)
+        return self._acquired(priority, started)
+
+    def stats(self) -> dict:
+        """Return queue wait time per priority."""
+        with self._lock:
+            return {
+                "rate": self.rate,
+                "burst": self.burst,
+                **{
+                    priority: dict(
+                        s,
+                        wait_ms_mean=s["wait_ms_total"] / s["acquired"] if s["acquired"] else 0.0,
+                    )
+                    for priority, s in self._stats.items()
+                },
+            }
@@ -0,0 +1,150 @@
+from collections import OrderedDict
+import logging
+import os
+import sqlite3
+import threading
+from typing import Any, Callable, Hashable, Optional
+from urllib.parse import quote
+
+from team_tracker.utils import sql_utils
+from team_tracker.utils.logger import configure_logger
+
+
+logger = logging.getLogger(__name__)
+configure_logger(logger)
+
+
+# load the read cache settings from the environment with sensible defaults
+READ_CACHE_ENABLED = os.getenv("READ_CACHE_ENABLED", "true").lower() == "true"
+READ_CACHE_MAX_ENTRIES = int(os.getenv("READ_CACHE_MAX_ENTRIES", "1024"))
+
+
+class VersionedReadCache:
+    """
+    Read-through cache of query results over one table, shared by every
+    thread of a process and kept consistent across processes.
+
+    Writes to the table bump its row in table_versions (via triggers, see
+    migration 0004), in the same transaction. Before serving from the cache,
+    `PRAGMA data_version` is read on a dedicated connection: it only changes
+    when another connection has committed, and reading it costs no I/O, so
+    an idle database costs one PRAGMA per lookup. When it has changed, the
+    table's version is read; if that changed too, the whole cache is dropped.
+    A worker therefore sees every committed write, from any process, on its
+    next lookup. Writers in this process also call invalidate() right away.
+
+    Lookups made while the current unit of work has uncommitted writes
+    bypass the cache, so a request always reads its own writes.
+    """
+
+    def __init__(self, table: str, max_entries: int = READ_CACHE_MAX_ENTRIES,
+                 enabled: bool = READ_CACHE_ENABLED) -> None:
+        self.table = table
+        self.max_entries = max_entries
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._entries: OrderedDict[Hashable, Any] = OrderedDict()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._conn_key: Optional[tuple] = None
+        self._data_version: Optional[int] = None
+        self._version: Optional[int] = None
+        self._counters = {
+            "hits": 0,
+            "misses": 0,
+            "bypassed": 0,
+            "local_invalidations": 0,
+            "remote_invalidations": 0,
+            "version_checks": 0,
+            "version_errors": 0,
+        }
+
+    def _watcher(self) -> sqlite3.Connection:
+        # Reopened after a fork or when DB_PATH is pointed elsewhere
+        key = (os.getpid(), sql_utils.DB_PATH)
+        if self._conn is None or self._conn_key != key:
+            path = os.path.abspath(sql_utils.DB_PATH)
+            self._conn = sqlite3.connect(f"file:{quote(path)}?mode=ro", uri=True, check_same_thread=False)
+            self._conn_key = key
+            self._data_version = None
+            self._version = None
+            self._entries.clear()
+        return self._conn
+
+    def _check_version(self) -> Optional[int]:
+        """Drop the entries if the table changed since they were loaded; None if it can't be told."""
+        try:
+            conn = self._watcher()
+            data_version = conn.execute("PRAGMA data_version").fetchone()[0]
+            if data_version == self._data_version:
+                return self._version
+            self._counters["version_checks"] += 1
+            row = conn.execute("SELECT version FROM table_versions WHERE name = ?", (self.table,)).fetchone()
+        except sqlite3.Error as e:
+            logger.error("Could not read the %s table version: %s", self.table, str(e))
+            self._counters["version_errors"] += 1
+            self._conn = None
+            return None
+
+        version = row[0] if row else 0
+        if version != self._version:
+            if self._entries:
+                self._counters["remote_invalidations"] += 1
+            self._entries.clear()
+        self._data_version = data_version
+        self._version = version
+        return version
+
+    def get_or_load(self, key: Hashable, loader: Callable[[], Any]) -> Any:
+        """
+        Return the cached result for key, calling loader on a miss.
+
+        Results are shared between callers and must not be modified.
+        """
+        if not self.enabled:
+            return loader()
+        uow = sql_utils.current_unit_of_work()
+        if uow is not None and uow.in_transaction:
+            with self._lock:
+                self._counters["bypassed"] += 1
+            return loader()
+
+        with self._lock:
+            version = self._check_version()
+            if version is not None and key in self._entries:
+                self._entries.move_to_end(key)
+                self._counters["hits"] += 1
+                return self._entries[key]
+            self._counters["misses"] += 1
+
+        value = loader()
+        if version is None:
+            return value
+
+        with self._lock:
+            # Only keep it if nothing was invalidated while it loaded; the
+            # version was read before the query, so a concurrent write can
+            # only make it newer, never older, than what is recorded
+            if self._version == version:
+                self._entries[key] = value
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+        return value
+
+    def invalidate(self) -> None:
+        """Drop everything, e.g. after this process wrote to the table."""
+        with self._lock:
+            self._entries.clear()
+            # Forces a version read on the next lookup, which picks up the write
+            self._data_version = None
+            self._version = None
+            self._counters["local_invalidations"] += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self._counters["hits"] + self._counters["misses"]
+            stats = dict(self._counters)
+            stats["entries"] = len(self._entries)
+            stats["version"] = self._version
+            stats["hit_ratio"] = self._counters["hits"] / lookups if lookups else 0.0
+            return stats
@@ -0,0 +1,273 @@
+import asyncio
+from collections import OrderedDict
+from dataclasses import dataclass
+import logging
+import os
+import threading
+import time
+from typing import Any, Awaitable, Callable, Hashable, Optional
+
+from team_tracker.utils.disk_cache import DiskCache
+from team_tracker.utils.logger import configure_logger
+
+
+logger = logging.getLogger(__name__)
+configure_logger(logger)
+
+
+# load the cache settings from the environment with sensible defaults
+CACHE_MAX_ENTRIES = int(os.getenv("CACHE_MAX_ENTRIES", "256"))
+CACHE_SCHEDULE_TTL = float(os.getenv("CACHE_SCHEDULE_TTL", "21600"))  # schedules change a few times a week
+CACHE_ROSTER_TTL = float(os.getenv("CACHE_ROSTER_TTL", "1800"))  # rosters change a few times a day
+CACHE_NEGATIVE_TTL = float(os.getenv("CACHE_NEGATIVE_TTL", "300"))
+CACHE_STALE_TTL = float(os.getenv("CACHE_STALE_TTL", "30"))
+CACHE_MAX_STALE = float(os.getenv("CACHE_MAX_STALE", "86400"))
+
+
+@dataclass
+class CacheEntry:
+    value: Any
+    expires_at: float
+    error: Optional[str] = None  # set for negatively cached lookups
+    outdated: bool = False  # already past its TTL when loaded, so never served stale
+
+
+def _run_in_thread(fn: Callable[[], None]) -> None:
+    threading.Thread(target=fn, daemon=True).start()
+
+
+class ResponseCache:
+    """
+    Bounded in-process LRU cache for upstream responses.
+
+    Entries are keyed by (endpoint, key) and expire after a per-endpoint TTL.
+    An expired entry is still served while a single background refresh runs
+    (stale-while-revalidate), up to max_stale seconds past its expiry. Loaders
+    that raise ValueError (unknown ids) are cached negatively for negative_ttl.
+
+    With synced_at, a function returning when a value was fetched upstream,
+    entries expire a TTL after that rather than after they were loaded. A value
+    already past its TTL (last-known-good data returned while upstream is down)
+    is kept for stale_ttl only and not written to disk, so the next request
+    after that retries upstream.
+
+    With a store, loaded values are also written to the disk cache, a miss
+    first looks there for a value another worker already loaded, and
+    warm_load() fills the cache from it at startup.
+    """
+
+    def __init__(self, ttls: dict[str, float], max_entries: int = CACHE_MAX_ENTRIES,
+                 negative_ttl: float = CACHE_NEGATIVE_TTL, max_stale: float = CACHE_MAX_STALE,
+                 clock: Callable[[], float] = time.monotonic,
+                 background: Callable[[Callable[[], None]], None] = _run_in_thread,
+                 store: Optional[DiskCache] = None, synced_at: Optional[Callable[[Any], float]] = None,
+                 stale_ttl: float = CACHE_STALE_TTL) -> None:
+        self.ttls = ttls
+        self.max_entries = max_entries
+        self.negative_ttl = negative_ttl
+        self.synced_at = synced_at
+        self.stale_ttl = stale_ttl
+        self.max_stale = max_stale
+        self._clock = clock
+        self._background = background
+        self.store = store
+        self._entries: "OrderedDict[tuple, CacheEntry]" = OrderedDict()
+        self._refreshing: set[tuple] = set()
+        self._tasks: set[asyncio.Task] = set()
+        self._lock = threading.Lock()
+        self._counters = {
+            "hits": 0,
+            "misses": 0,
+            "stale_hits": 0,
+            "negative_hits": 0,
+            "evictions": 0,
+            "refreshes": 0,
+            "refresh_errors": 0,
+            "disk_hits": 0,
+            "warm_loaded": 0,
+            "outdated_loads": 0,
+        }
+
+    def _lookup(self, cache_key: tuple) -> tuple[bool, Any, bool]:
+        """
+        Return (found, value, start_refresh) for a key.
+
+        Raises:
+            ValueError: If the key is (negatively) cached as unknown upstream.
+        """
+        now = self._clock()
+        with self._lock:
+            entry = self._entries.get(cache_key)
+            if entry is not None:
+                if entry.error is not None and now < entry.expires_at:
+                    self._entries.move_to_end(cache_key)
+                    self._counters["negative_hits"] += 1
+                    raise ValueError(entry.error)
+                if entry.error is None and now < entry.expires_at:
+                    self._entries.move_to_end(cache_key)
+                    self._counters["hits"] += 1
+                    return True, entry.value, False
+                if entry.error is None and not entry.outdated and now < entry.expires_at + self.max_stale:
+                    self._entries.move_to_end(cache_key)
+                    self._counters["stale_hits"] += 1
+                    start_refresh = cache_key not in self._refreshing
+                    self._refreshing.add(cache_key)
+                    return True, entry.value, start_refresh
+            self._counters["misses"] += 1
+            return False, None, False
+
+    def get_or_load(self, endpoint: str, key: Hashable, loader: Callable[[], Any]) -> Any:
+        """
+        Return the cached value for (endpoint, key), calling loader on a miss.
+
+        Raises:
+            ValueError: If the key is (negatively) cached as unknown upstream.
+        """
+        cache_key = (endpoint, key)
+        found, value, start_refresh = self._lookup(cache_key)
+        if found:
+            # Kick off the refresh outside the lock so a synchronous runner can't deadlock.
+            if start_refresh:
+                self._background(lambda: self._refresh(cache_key, loader))
+            return value
+        return self._load(cache_key, loader)
+
+    async def get_or_load_async(self, endpoint: str, key: Hashable, loader: Callable[[], Awaitable[Any]]) -> Any:
+        """get_or_load for a coroutine loader; stale entries are refreshed in a task."""
+        cache_key = (endpoint, key)
+        found, value, start_refresh = self._lookup(cache_key)
+        if found:
+            if start_refresh:
+                task = asyncio.create_task(self._refresh_async(cache_key, loader))
+                # Keep a reference until it finishes, or the task may be garbage collected
+                self._tasks.add(task)
+                task.add_done_callback(self._tasks.discard)
+            return value
+        return await self._load_async(cache_key, loader)
+
+    def _from_store(self, cache_key: tuple) -> tuple[bool, Any]:
+        if self.store is not None:
+            stored = self.store.get_projected(*cache_key)
+            if stored is not None and stored[1] > time.time():
+                value, expires_at = stored
+                self._store(cache_key, CacheEntry(value, self._from_wall_clock(expires_at)))
+                with self._lock:
+                    self._counters["disk_hits"] += 1
+                return True, value
+        return False, None
+
+    def _load(self, cache_key: tuple, loader: Callable[[], Any]) -> Any:
+        found, value = self._from_store(cache_key)
+        if found:
+            return value
+        try:
+            value = loader()
+        except ValueError as e:
+            self._store(cache_key, CacheEntry(None, self._clock() + self.negative_ttl, error=str(e)))
+            raise
+        self._put(cache_key, value)
+        return value
+
+    async def _load_async(self, cache_key: tuple, loader: Callable[[], Awaitable[Any]]) -> Any:
+        found, value = await asyncio.to_thread(self._from_store, cache_key)
+        if found:
+            return value
+        try:
+            value = await loader()
+        except ValueError as e:
+            self._store(cache_key, CacheEntry(None, self._clock() + self.negative_ttl, error=str(e)))
+            raise
+        await asyncio.to_thread(self._put, cache_key, value)
+        return value
+
+    async def _refresh_async(self, cache_key: tuple, loader: Callable[[], Awaitable[Any]]) -> None:
+        try:
+            await self._load_async(cache_key, loader)
+            with self._lock:
+                self._counters["refreshes"] += 1
+        except Exception as e:
+            logger.error("Background refresh of %s failed: %s", cache_key, str(e))
+            with self._lock:
+                self._counters["refresh_errors"] += 1
+        finally:
+            with self._lock:
+                self._refreshing.discard(cache_key)
+
+    def _refresh(self, cache_key: tuple, loader: Callable[[], Any]) -> None:
+        try:
+            self._load(cache_key, loader)
+            with self._lock:
+                self._counters["refreshes"] += 1
+        except Exception as e:
+            # Keep serving the stale value; the next request past expiry will retry.
+            logger.error("Background refresh of %s failed: %s", cache_key, str(e))
+            with self._lock:
+                self._counters["refresh_errors"] += 1
+        finally:
+            with self._lock:
+                self._refreshing.discard(cache_key)
+
+    def _store(self, cache_key: tuple, entry: CacheEntry) -> None:
+        with self._lock:
+            self._entries[cache_key] = entry
+            self._entries.move_to_end(cache_key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._counters["evictions"] += 1
+
+    def _ttl(self, endpoint: str) -> float:
+        return self.ttls.get(endpoint, min(self.ttls.values(), default=0.0))
+
+    def _put(self, cache_key: tuple, value: Any) -> None:
+        ttl = self._ttl(cache_key[0])
+        if self.synced_at is not None:
+            ttl = self.synced_at(value) + ttl - time.time()
+            if ttl <= 0:
+                self._store(cache_key, CacheEntry(value, self._clock() + self.stale_ttl, outdated=True))
+                with self._lock:
+                    self._counters["outdated_loads"] += 1
+                return
+        self._store(cache_key, CacheEntry(value, self._clock() + ttl))
+        if self.store is not None:
+            self.store.put_projected(cache_key[0], cache_key[1], value, ttl)
+
+    def _from_wall_clock(self, expires_at: float) -> float:
+        # The disk cache keeps wall-clock expiries; entries here use self._clock
+        return self._clock() + expires_at - time.time()
+
+    def put(self, endpoint: str, key: Hashable, value: Any) -> None:
+        """Store a freshly fetched value, e.g. from a background refresher."""
+        self._put((endpoint, key), value)
+
+    def warm_load(self) -> int:
+        """Fill the cache from the disk cache, including entries still servable stale."""
+        if self.store is None:
+            return 0
+        entries = self.store.load_projected(time.time() - self.max_stale)
+        # Oldest first, so the most recently used entries survive LRU eviction
+        for endpoint, key, value, expires_at in entries:
+            self._store((endpoint, key), CacheEntry(value, self._from_wall_clock(expires_at)))
+        with self._lock:
+            self._counters["warm_loaded"] += len(entries)
+        logger.info("Warm-loaded %d cached responses from disk", len(entries))
+        return len(entries)
+
+    def invalidate(self, endpoint: str, key: Hashable) -> None:
+        with self._lock:
+            self._entries.pop((endpoint, key), None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        """Return the cache counters along with its current size."""
+        with self._lock:
+            lookups = self._counters["hits"] + self._counters["stale_hits"] + self._counters["misses"]
+            stats = dict(self._counters)
+            stats["size"] = len(self._entries)
+            stats["max_entries"] = self.max_entries
+            stats["hit_ratio"] = (
+                (self._counters["hits"] + self._counters["stale_hits"]) / lookups if lookups else 0.0
+            )
+            return stats
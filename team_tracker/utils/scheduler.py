@@ -0,0 +1,201 @@
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+import fcntl
+import logging
+import os
+import random
+import threading
+import time
+from typing import Any, Callable, IO, Optional
+
+from team_tracker.utils.logger import configure_logger
+
+
+logger = logging.getLogger(__name__)
+configure_logger(logger)
+
+
+# load the refresher settings from the environment with sensible defaults;
+# off unless asked for, since every worker process that imports the app could run one
+REFRESH_ENABLED = os.getenv("REFRESH_ENABLED", "false").lower() == "true"
+REFRESH_LOCK_PATH = os.getenv("REFRESH_LOCK_PATH", os.path.join(os.getcwd(), "data", "refresher.lock"))
+REFRESH_NEW_TEAMS_INTERVAL = float(os.getenv("REFRESH_NEW_TEAMS_INTERVAL", "10"))
+REFRESH_SCHEDULE_INTERVAL = float(os.getenv("REFRESH_SCHEDULE_INTERVAL", "3600"))
+REFRESH_ROSTER_INTERVAL = float(os.getenv("REFRESH_ROSTER_INTERVAL", "900"))
+REFRESH_JITTER = float(os.getenv("REFRESH_JITTER", "0.1"))
+REFRESH_CONCURRENCY = int(os.getenv("REFRESH_CONCURRENCY", "4"))
+
+
+class TeamRefresher:
+    """
+    Background scheduler that keeps per-team upstream data warm.
+
+    Each job (e.g. "schedule", "roster") is a function of an nfl_id and runs for
+    every team returned by team_ids, at most max_workers teams at a time. Jobs
+    repeat every interval seconds, randomly stretched or shrunk by up to the
+    jitter fraction so that workers don't refresh in lockstep. Teams that
+    appear between cycles are refreshed within new_teams_interval seconds, or
+    right away after wake().
+
+    Only the process holding an exclusive lock on lock_path refreshes; the
+    refreshers of other worker processes stand by and take over if it exits.
+    """
+
+    def __init__(self, team_ids: Callable[[], list[int]], jobs: dict[str, Callable[[int], Any]],
+                 intervals: dict[str, float], jitter: float = REFRESH_JITTER,
+                 max_workers: int = REFRESH_CONCURRENCY, lock_path: str = REFRESH_LOCK_PATH,
+                 new_teams_interval: float = REFRESH_NEW_TEAMS_INTERVAL) -> None:
+        self.team_ids = team_ids
+        self.jobs = jobs
+        self.intervals = intervals
+        self.jitter = jitter
+        self.max_workers = max_workers
+        self.lock_path = lock_path
+        self.new_teams_interval = new_teams_interval
+        self._status: dict[str, dict[int, dict]] = {kind: {} for kind in jobs}
+        self._cycles: dict[str, dict] = {kind: {} for kind in jobs}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._wake = threading.Event()
+        self._lock_file: Optional[IO] = None
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._wake.clear()
+        self._thread = threading.Thread(target=self._loop, name="team-refresher", daemon=True)
+        self._thread.start()
+        logger.info("Team refresher started")
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+        logger.info("Team refresher stopped")
+
+    def wake(self) -> None:
+        """Refresh teams that were never refreshed now, e.g. right after new teams are stored."""
+        self._wake.set()
+
+    def _lead(self) -> bool:
+        """Take the refresher lock if no other process holds it."""
+        if self._lock_file is not None:
+            return True
+        os.makedirs(os.path.dirname(os.path.abspath(self.lock_path)), exist_ok=True)
+        lock_file = open(self.lock_path, "a")
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            lock_file.close()
+            return False
+        self._lock_file = lock_file
+        logger.info("Team refresher leads, holding %s", self.lock_path)
+        return True
+
+    def _release(self) -> None:
+        if self._lock_file is not None:
+            # Closing the file drops the lock
+            self._lock_file.close()
+            self._lock_file = None
+
+    def _next_delay(self, kind: str) -> float:
+        interval = self.intervals[kind]
+        return interval * (1 + random.uniform(-self.jitter, self.jitter))
+
+    def _loop(self) -> None:
+        # Another process is refreshing; check now and then whether it still is
+        while not self._lead():
+            if self._stop.wait(self.new_teams_interval):
+                return
+        try:
+            # Refresh everything right away so the first requests after a restart are warm
+            next_run = {kind: time.monotonic() for kind in self.jobs}
+            while not self._stop.is_set():
+                now = time.monotonic()
+                for kind in self.jobs:
+                    if next_run[kind] <= now:
+                        self.run_once(kind)
+                        next_run[kind] = time.monotonic() + self._next_delay(kind)
+                    else:
+                        self.run_once(kind, only_new=True)
+                wait = min(min(next_run.values()) - time.monotonic(), self.new_teams_interval)
+                self._wake.wait(max(0.0, wait))
+                self._wake.clear()
+        finally:
+            self._release()
+
+    def run_once(self, kind: str, only_new: bool = False) -> None:
+        """
+        Refresh one job for every team, bounded by max_workers. With only_new,
+        only for teams it was never run for, without counting as a cycle.
+        """
+        started = time.monotonic()
+        try:
+            team_ids = self.team_ids()
+        except Exception as e:
+            logger.error("Could not list teams to refresh: %s", str(e))
+            with self._lock:
+                self._cycles[kind] = {"last_run": _utcnow(), "error": str(e)}
+            return
+
+        if only_new:
+            with self._lock:
+                team_ids = [nfl_id for nfl_id in team_ids if nfl_id not in self._status[kind]]
+            if not team_ids:
+                return
+
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix=f"refresh-{kind}") as executor:
+            results = list(executor.map(lambda nfl_id: self._refresh(kind, nfl_id), team_ids))
+        if only_new:
+            logger.info("Refreshed %s for %d new teams", kind, len(team_ids))
+            return
+
+        with self._lock:
+            self._cycles[kind] = {
+                "last_run": _utcnow(),
+                "duration_ms": round((time.monotonic() - started) * 1000, 1),
+                "teams": len(team_ids),
+                "errors": results.count(False),
+            }
+        logger.info("Refreshed %s for %d teams", kind, len(team_ids))
+
+    def _refresh(self, kind: str, nfl_id: int) -> bool:
+        started = time.monotonic()
+        error = None
+        try:
+            self.jobs[kind](nfl_id)
+        except Exception as e:
+            logger.error("Failed to refresh %s for team %s: %s", kind, nfl_id, str(e))
+            error = str(e)
+
+        with self._lock:
+            status = self._status[kind].setdefault(nfl_id, {"last_refresh": None})
+            if error is None:
+                status["last_refresh"] = _utcnow()
+            status["last_attempt"] = _utcnow()
+            status["last_error"] = error
+            status["duration_ms"] = round((time.monotonic() - started) * 1000, 1)
+        return error is None
+
+    def status(self) -> dict:
+        """Return the last refresh time and error for every job and team."""
+        with self._lock:
+            return {
+                "running": self._thread is not None and self._thread.is_alive(),
+                "leader": self._lock_file is not None,
+                "jobs": {
+                    kind: {
+                        "interval": self.intervals[kind],
+                        "last_cycle": dict(self._cycles[kind]),
+                        "teams": {str(nfl_id): dict(s) for nfl_id, s in self._status[kind].items()},
+                    }
+                    for kind in self.jobs
+                },
+            }
+
+
+def _utcnow() -> str:
+    return datetime.now(timezone.utc).isoformat()
@@ -1,9 +1,27 @@
+import argparse
+import bisect
+from collections import deque
 from contextlib import contextmanager
+import contextvars
+from datetime import datetime, timezone
+import functools
+import gzip
 import logging
 import os
+import queue
+import random
+import re
+import shutil
 import sqlite3
+import sys
+import tempfile
+import threading
+import time
+from typing import Any, Callable, Iterator, Optional
+from urllib.parse import quote
 
 from team_tracker.utils.logger import configure_logger
+from team_tracker.utils.migrations import apply_migrations
 
 
 logger = logging.getLogger(__name__)
@@ -17,39 +35,32 @@ DB_PATH = os.getenv("DB_PATH", os.path.join(os.getcwd(), "data", "team_tracker.d
 
 logger.info(f"Database path is: {DB_PATH}")
 
+# load the connection pool settings from the environment with sensible defaults;
+# SQLite has a single writer, so the write pool stays small
+DB_WRITE_POOL_SIZE = int(os.getenv("DB_WRITE_POOL_SIZE", "2"))
+DB_READ_POOL_SIZE = int(os.getenv("DB_READ_POOL_SIZE", "8"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "5"))
+
+# PRAGMAs applied to every new connection; WAL lets readers run alongside the writer
+DB_PRAGMAS = {
+    "journal_mode": os.getenv("DB_JOURNAL_MODE", "WAL"),
+    "synchronous": os.getenv("DB_SYNCHRONOUS", "NORMAL"),
+    "busy_timeout": int(os.getenv("DB_BUSY_TIMEOUT_MS", "5000")),
+    "cache_size": int(os.getenv("DB_CACHE_SIZE", "-16000")),  # negative means KiB, i.e. 16 MB
+    "mmap_size": int(os.getenv("DB_MMAP_SIZE", str(128 * 1024 * 1024))),
+    "temp_store": os.getenv("DB_TEMP_STORE", "MEMORY"),
+}
+
 def initialize_database():
-    """Create database tables if they don't exist."""
+    """Bring the database schema up to date by applying pending migrations."""
     try:
         # Make sure the data directory exists
         os.makedirs(os.path.dirname(DB_PATH), exist_ok=True)
-        
+
         with get_db_connection() as conn:
-            cursor = conn.cursor()
-            
-            # Create teams table
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS teams (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    team TEXT UNIQUE NOT NULL,
-                    city TEXT NOT NULL,
-                    sport TEXT NOT NULL,
-                    league TEXT NOT NULL
-                );
-            """)
-            
-            # Create users table
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS users (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    username TEXT UNIQUE NOT NULL,
-                    password_hash TEXT NOT NULL,
-                    salt TEXT NOT NULL
-                );
-            """)
-            
-            conn.commit()
+            apply_migrations(conn)
             logger.info("Database tables initialized successfully")
-            
+
     except sqlite3.Error as e:
         logger.error("Database initialization error: %s", str(e))
         raise Exception(f"Failed to initialize database: {e}")
@@ -57,11 +68,10 @@ def initialize_database():
 
 def check_database_connection():
     try:
-        conn = sqlite3.connect(DB_PATH)
-        cursor = conn.cursor()
-        # This ensures the connection is actually active
-        cursor.execute("SELECT 1;")
-        conn.close()
+        with get_read_connection() as conn:
+            cursor = conn.cursor()
+            # This ensures the connection is actually active
+            cursor.execute("SELECT 1;")
     except sqlite3.Error as e:
         error_message = f"Database connection error: {e}"
         logger.error(error_message)
@@ -69,33 +79,919 @@ def check_database_connection():
 
 def check_table_exists(tablename: str):
     try:
-        conn = sqlite3.connect(DB_PATH)
-        cursor = conn.cursor()
-        cursor.execute(f"SELECT 1 FROM {tablename} LIMIT 1;")
-        conn.close()
+        with get_read_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(f"SELECT 1 FROM {tablename} LIMIT 1;")
     except sqlite3.Error as e:
         error_message = f"Table check error: {e}"
         logger.error(error_message)
         raise Exception(error_message) from e
 
+###################################################
+#
+# Statement tracing. Pooled connections hand out
+# cursors that time a sample of statements and
+# aggregate them by normalized SQL, logging the
+# slow ones.
+#
+###################################################
+
+# load the statement tracing settings from the environment with sensible defaults
+SQL_TRACE_ENABLED = os.getenv("SQL_TRACE_ENABLED", "true").lower() == "true"
+SQL_TRACE_SAMPLE_RATE = float(os.getenv("SQL_TRACE_SAMPLE_RATE", "1.0"))
+SQL_SLOW_MS = float(os.getenv("SQL_SLOW_MS", "100"))
+SQL_SLOW_LOG_SIZE = int(os.getenv("SQL_SLOW_LOG_SIZE", "100"))
+SQL_SLOW_EXPLAIN = os.getenv("SQL_SLOW_EXPLAIN", "true").lower() == "true"
+
+# Upper bounds of the duration histogram buckets, in ms; the last bucket is open
+SQL_HISTOGRAM_MS = (0.1, 0.5, 1, 5, 10, 50, 100, 500, 1000)
+
+_SQL_LITERALS = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+_SQL_IN_LISTS = re.compile(r"\bIN \(\?(?:, \?)+\)", re.IGNORECASE)
+
+
+@functools.lru_cache(maxsize=1024)
+def normalize_sql(sql: str) -> str:
+    """Collapse whitespace and replace literals, so each statement aggregates under one key."""
+    sql = _SQL_LITERALS.sub("?", " ".join(sql.split()).rstrip(";"))
+    return _SQL_IN_LISTS.sub("IN (?, ...)", re.sub(r"\s*,\s*\?", ", ?", sql))
+
+
+def _explain(path: str, sql: str, parameters: Any) -> Optional[str]:
+    """The query plan of sql, read on a throwaway read-only connection."""
+    if not sql.lstrip().upper().startswith(("SELECT", "WITH", "UPDATE", "DELETE", "INSERT")):
+        return None
+    try:
+        conn = sqlite3.connect(f"file:{quote(os.path.abspath(path))}?mode=ro", uri=True)
+        try:
+            rows = conn.execute(f"EXPLAIN QUERY PLAN {sql}", parameters).fetchall()
+        finally:
+            conn.close()
+    except sqlite3.Error as e:
+        return f"unavailable: {e}"
+    return "; ".join(row[3] for row in rows)
+
+
+class SqlTracer:
+    """
+    Timing of the statements run on pooled connections.
+
+    A sample_rate fraction of statements is timed, from execute() through
+    the last row fetched (time spent by the caller between fetches doesn't
+    count), and aggregated by normalized SQL: count, errors, rows, total
+    and max duration, a histogram and the functions that ran it. Statements
+    taking at least slow_ms are logged as warnings and kept in a bounded
+    log, with their query plan if explain is set; the plan is captured once
+    per statement. A statement that isn't sampled costs one random() call.
+    """
+
+    def __init__(self, enabled: bool = SQL_TRACE_ENABLED, sample_rate: float = SQL_TRACE_SAMPLE_RATE,
+                 slow_ms: float = SQL_SLOW_MS, slow_log_size: int = SQL_SLOW_LOG_SIZE,
+                 explain: bool = SQL_SLOW_EXPLAIN) -> None:
+        self.enabled = enabled
+        self.sample_rate = sample_rate
+        self.slow_ms = slow_ms
+        self.explain = explain
+        self._lock = threading.Lock()
+        self._statements: dict[str, dict] = {}
+        self._plans: dict[str, Optional[str]] = {}
+        self._slow: deque = deque(maxlen=slow_log_size)
+
+    def sampled(self) -> bool:
+        return self.enabled and (self.sample_rate >= 1 or random.random() < self.sample_rate)
+
+    def record(self, sql: str, duration_ms: float, rows: int, caller: str, error: bool = False,
+               path: Optional[str] = None, parameters: Any = ()) -> None:
+        key = normalize_sql(sql)
+        slow = duration_ms >= self.slow_ms
+        with self._lock:
+            stats = self._statements.get(key)
+            if stats is None:
+                stats = self._statements[key] = {
+                    "count": 0, "errors": 0, "rows": 0, "total_ms": 0.0, "max_ms": 0.0,
+                    "histogram": [0] * (len(SQL_HISTOGRAM_MS) + 1), "callers": {},
+                }
+            stats["count"] += 1
+            stats["errors"] += error
+            stats["rows"] += rows
+            stats["total_ms"] += duration_ms
+            stats["max_ms"] = max(stats["max_ms"], duration_ms)
+            stats["histogram"][bisect.bisect_left(SQL_HISTOGRAM_MS, duration_ms)] += 1
+            stats["callers"][caller] = stats["callers"].get(caller, 0) + 1
+            needs_plan = slow and self.explain and path is not None and key not in self._plans
+        if not slow:
+            return
+
+        if needs_plan:
+            plan = _explain(path, sql, parameters)
+            with self._lock:
+                self._plans[key] = plan
+        logger.warning("Slow query: %.1f ms, %d rows, in %s: %s", duration_ms, rows, caller, key)
+        with self._lock:
+            self._slow.append({
+                "sql": key, "duration_ms": duration_ms, "rows": rows, "caller": caller,
+                "error": error, "plan": self._plans.get(key), "at": time.time(),
+            })
+
+    def stats(self, limit: int = 50) -> dict:
+        """The limit statements with the most total time, and the slow query log."""
+        buckets = [f"<={bound}ms" for bound in SQL_HISTOGRAM_MS] + [f">{SQL_HISTOGRAM_MS[-1]}ms"]
+        with self._lock:
+            top = sorted(self._statements.items(), key=lambda item: item[1]["total_ms"], reverse=True)[:limit]
+            statements = [
+                {"sql": sql, **stats, "mean_ms": stats["total_ms"] / stats["count"],
+                 "histogram": dict(zip(buckets, stats["histogram"])), "callers": dict(stats["callers"]),
+                 "plan": self._plans.get(sql)}
+                for sql, stats in top
+            ]
+            return {
+                "enabled": self.enabled,
+                "sample_rate": self.sample_rate,
+                "slow_ms": self.slow_ms,
+                "distinct_statements": len(self._statements),
+                "statements": statements,
+                "slow": list(self._slow),
+            }
+
+    def reset(self) -> None:
+        with self._lock:
+            self._statements.clear()
+            self._plans.clear()
+            self._slow.clear()
+
+
+sql_tracer = SqlTracer()
+
+
+def _caller() -> str:
+    # The first frame outside this module and its context managers, i.e. the model function
+    frame = sys._getframe(2)
+    while frame.f_back is not None and frame.f_globals.get("__name__") in (__name__, "contextlib"):
+        frame = frame.f_back
+    return f"{frame.f_globals.get('__name__')}.{frame.f_code.co_name}"
+
+
+class TracedCursor(sqlite3.Cursor):
+    """A cursor reporting a sample of its statements to sql_tracer."""
+
+    # [sql, parameters, duration_ms, rows, caller] of the statement being fetched
+    _sample: Optional[list] = None
+
+    def _finish(self, error: bool = False) -> None:
+        sample, self._sample = self._sample, None
+        if sample is not None:
+            sql, parameters, duration_ms, rows, caller = sample
+            sql_tracer.record(sql, duration_ms, rows, caller, error=error,
+                              path=getattr(self.connection, "path", None), parameters=parameters)
+
+    def _run(self, method: Callable, sql: str, parameters: Any, plan_parameters: Any) -> "TracedCursor":
+        self._finish()
+        if not sql_tracer.sampled():
+            return method(sql, parameters)
+        started = time.perf_counter()
+        self._sample = [sql, plan_parameters, 0.0, 0, _caller()]
+        try:
+            method(sql, parameters)
+        except sqlite3.Error:
+            self._sample[2] = (time.perf_counter() - started) * 1000
+            self._finish(error=True)
+            raise
+        self._sample[2] = (time.perf_counter() - started) * 1000
+        if self.description is None:
+            # Nothing to fetch
+            self._sample[3] = max(self.rowcount, 0)
+            self._finish()
+        return self
+
+    def _fetched(self, started: float, rows: int) -> None:
+        self._sample[2] += (time.perf_counter() - started) * 1000
+        self._sample[3] += rows
+
+    def execute(self, sql: str, parameters: Any = ()) -> "TracedCursor":
+        return self._run(super().execute, sql, parameters, parameters)
+
+    def executemany(self, sql: str, seq_of_parameters: Any) -> "TracedCursor":
+        # Planned with unbound parameters, since they may be a generator
+        return self._run(super().executemany, sql, seq_of_parameters, ())
+
+    def fetchone(self) -> Any:
+        if self._sample is None:
+            return super().fetchone()
+        started = time.perf_counter()
+        row = super().fetchone()
+        self._fetched(started, row is not None)
+        if row is None:
+            self._finish()
+        return row
+
+    def fetchmany(self, size: Optional[int] = None) -> list:
+        if self._sample is None:
+            return super().fetchmany(self.arraysize if size is None else size)
+        started = time.perf_counter()
+        rows = super().fetchmany(self.arraysize if size is None else size)
+        self._fetched(started, len(rows))
+        if len(rows) < (self.arraysize if size is None else size):
+            self._finish()
+        return rows
+
+    def fetchall(self) -> list:
+        if self._sample is None:
+            return super().fetchall()
+        started = time.perf_counter()
+        rows = super().fetchall()
+        self._fetched(started, len(rows))
+        self._finish()
+        return rows
+
+    def __next__(self) -> Any:
+        if self._sample is None:
+            return super().__next__()
+        started = time.perf_counter()
+        try:
+            row = super().__next__()
+        except StopIteration:
+            self._fetched(started, 0)
+            self._finish()
+            raise
+        self._fetched(started, 1)
+        return row
+
+    def close(self) -> None:
+        self._finish()
+        super().close()
+
+    def __del__(self) -> None:
+        # A cursor dropped before its last row was fetched, e.g. after fetchone()
+        if self._sample is not None:
+            self._finish()
+
+
+class TracedConnection(sqlite3.Connection):
+    """A connection whose cursors, including those of execute(), are TracedCursors."""
+
+    # The database file, for query plans of slow statements
+    path: Optional[str] = None
+
+    def cursor(self, factory: type = TracedCursor) -> sqlite3.Cursor:
+        return super().cursor(factory)
+
+    def execute(self, sql: str, parameters: Any = ()) -> sqlite3.Cursor:
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql: str, seq_of_parameters: Any) -> sqlite3.Cursor:
+        return self.cursor().executemany(sql, seq_of_parameters)
+
+
+def _execute_untraced(conn: sqlite3.Connection, sql: str) -> sqlite3.Cursor:
+    """Run the pool's own housekeeping statements without tracing them."""
+    return sqlite3.Connection.execute(conn, sql)
+
+
+class ConnectionPool:
+    """
+    Bounded pool of SQLite connections to one database file.
+
+    Connections are created on demand up to `size`, get the PRAGMA profile
+    once when created, and are handed back to the pool instead of closed.
+    Each checkout validates the connection with a trivial query and replaces
+    it if that fails; a connection returned mid-transaction is rolled back.
+    When every connection is in use, callers wait up to `timeout` seconds.
+
+    A read_only pool opens read-only URI connections (mode=ro) with
+    query_only set, so they can never take the write lock; under WAL they
+    read alongside the writer without waiting on it.
+    """
+
+    def __init__(self, path: str, size: int = DB_WRITE_POOL_SIZE, timeout: float = DB_POOL_TIMEOUT,
+                 pragmas: Optional[dict] = None, read_only: bool = False) -> None:
+        self.path = path
+        self.size = size
+        self.timeout = timeout
+        self.read_only = read_only
+        self.pragmas = dict(DB_PRAGMAS if pragmas is None else pragmas)
+        if read_only:
+            # The journal mode is a property of the file, set by writers
+            self.pragmas.pop("journal_mode", None)
+            self.pragmas["query_only"] = "ON"
+        self.pid = os.getpid()
+        self._idle: "queue.LifoQueue[sqlite3.Connection]" = queue.LifoQueue()
+        self._lock = threading.Lock()
+        self._open = 0
+        self._in_use = 0
+        self._counters = {
+            "created": 0,
+            "checkouts": 0,
+            "waits": 0,
+            "wait_ms_total": 0.0,
+            "invalidated": 0,
+            "rollbacks": 0,
+        }
+
+    def _connect(self) -> sqlite3.Connection:
+        # Connections move between threads through the pool, never used by two at once
+        timeout = self.pragmas.get("busy_timeout", 5000) / 1000
+        factory = TracedConnection if sql_tracer.enabled else sqlite3.Connection
+        if self.read_only:
+            conn = sqlite3.connect(f"file:{quote(os.path.abspath(self.path))}?mode=ro", uri=True,
+                                   timeout=timeout, check_same_thread=False, factory=factory)
+        else:
+            conn = sqlite3.connect(self.path, timeout=timeout, check_same_thread=False, factory=factory)
+        if factory is TracedConnection:
+            conn.path = self.path
+        for name, value in self.pragmas.items():
+            _execute_untraced(conn, f"PRAGMA {name} = {value};")
+        with self._lock:
+            self._counters["created"] += 1
+        logger.debug("Database connection opened.")
+        return conn
+
+    def _close(self, conn: sqlite3.Connection) -> None:
+        with self._lock:
+            self._open -= 1
+        try:
+            conn.close()
+        except sqlite3.Error:
+            pass
+        logger.debug("Database connection closed.")
+
+    def acquire(self) -> sqlite3.Connection:
+        """
+        Check out a validated connection.
+
+        Raises:
+            sqlite3.OperationalError: If no connection frees up within the timeout.
+        """
+        started = time.monotonic()
+        while True:
+            conn = None
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                with self._lock:
+                    can_open = self._open < self.size
+                    if can_open:
+                        self._open += 1
+                if can_open:
+                    try:
+                        conn = self._connect()
+                    except sqlite3.Error:
+                        with self._lock:
+                            self._open -= 1
+                        raise
+                else:
+                    remaining = self.timeout - (time.monotonic() - started)
+                    try:
+                        conn = self._idle.get(timeout=max(remaining, 0))
+                    except queue.Empty:
+                        raise sqlite3.OperationalError(
+                            f"No database connection available after {self.timeout}s") from None
+                    with self._lock:
+                        self._counters["waits"] += 1
+                        self._counters["wait_ms_total"] += (time.monotonic() - started) * 1000
+
+            try:
+                _execute_untraced(conn, "SELECT 1;")
+            except sqlite3.Error:
+                with self._lock:
+                    self._counters["invalidated"] += 1
+                self._close(conn)
+                continue
+
+            with self._lock:
+                self._counters["checkouts"] += 1
+                self._in_use += 1
+            return conn
+
+    def release(self, conn: sqlite3.Connection) -> None:
+        with self._lock:
+            self._in_use -= 1
+        try:
+            if conn.in_transaction:
+                # Don't leak an uncommitted write into the next checkout
+                conn.rollback()
+                with self._lock:
+                    self._counters["rollbacks"] += 1
+        except sqlite3.Error:
+            self._close(conn)
+            return
+        self._idle.put(conn)
+
+    def close(self) -> None:
+        while True:
+            try:
+                self._close(self._idle.get_nowait())
+            except queue.Empty:
+                return
+
+    def stats(self) -> dict:
+        with self._lock:
+            return dict(
+                self._counters,
+                read_only=self.read_only,
+                size=self.size,
+                open=self._open,
+                in_use=self._in_use,
+                idle=self._idle.qsize(),
+            )
+
+
+_pools: dict[bool, ConnectionPool] = {}
+_pool_lock = threading.Lock()
+
+
+def _get_pool(read_only: bool) -> ConnectionPool:
+    # Connections must not cross a fork, so a new pool is built whenever the
+    # process id changes (or DB_PATH was pointed elsewhere)
+    pool = _pools.get(read_only)
+    if pool is None or pool.pid != os.getpid() or pool.path != DB_PATH:
+        with _pool_lock:
+            pool = _pools.get(read_only)
+            if pool is None or pool.pid != os.getpid() or pool.path != DB_PATH:
+                size = DB_READ_POOL_SIZE if read_only else DB_WRITE_POOL_SIZE
+                pool = _pools[read_only] = ConnectionPool(DB_PATH, size=size, read_only=read_only)
+    return pool
+
+
+def get_pool() -> ConnectionPool:
+    """Return this process's pool of read-write connections to DB_PATH."""
+    return _get_pool(read_only=False)
+
+
+def get_read_pool() -> ConnectionPool:
+    """Return this process's pool of read-only connections to DB_PATH."""
+    return _get_pool(read_only=True)
+
+
+class _UnitOfWorkConnection:
+    """
+    A unit of work's connection as seen by model functions.
+
+    Their commit() is deferred to the end of the unit of work, so several
+    model calls share one transaction.
+    """
+
+    def __init__(self, conn: sqlite3.Connection) -> None:
+        self._conn = conn
+
+    def commit(self) -> None:
+        pass
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._conn, name)
+
+
+class UnitOfWork:
+    """
+    One connection and one transaction shared by every model call in a scope,
+    typically a Flask request.
+
+    A read_only unit of work, e.g. for a GET request, gets its connection
+    from the read pool. The connection is only checked out on first use. finish()
+    commits, or rolls back if the scope failed or a database error went
+    through get_db_connection(), and returns the connection to the pool.
+    """
+
+    def __init__(self, pool: Optional[ConnectionPool] = None, read_only: bool = False) -> None:
+        self._pool = pool
+        self.read_only = read_only
+        self._conn: Optional[sqlite3.Connection] = None
+        self._token: Optional[contextvars.Token] = None
+        # Only the thread that opened it may use it; fan-out workers inherit
+        # the context but must use their own connections
+        self.owner = threading.get_ident()
+        self.rollback_only = False
+
+    @property
+    def in_transaction(self) -> bool:
+        """Whether this unit of work has uncommitted writes."""
+        return self._conn is not None and self._conn.in_transaction
+
+    def connection(self) -> _UnitOfWorkConnection:
+        if self._conn is None:
+            self._pool = self._pool or _get_pool(self.read_only)
+            self._conn = self._pool.acquire()
+        return _UnitOfWorkConnection(self._conn)
+
+    def release(self) -> None:
+        """
+        Give the connection back to the pool before the scope ends, e.g. before
+        waiting on something slow. The next connection() checks out another.
+
+        Raises:
+            RuntimeError: If the unit of work has uncommitted writes.
+        """
+        if self._conn is None:
+            return
+        if self._conn.in_transaction:
+            raise RuntimeError("Cannot release a unit of work with uncommitted writes")
+        conn, self._conn = self._conn, None
+        self._pool.release(conn)
+
+    def finish(self, error: Optional[BaseException] = None) -> None:
+        if self._conn is None:
+            return
+        conn, self._conn = self._conn, None
+        try:
+            if error is not None or self.rollback_only:
+                conn.rollback()
+            else:
+                conn.commit()
+        finally:
+            self._pool.release(conn)
+
+
+_current_unit_of_work: contextvars.ContextVar = contextvars.ContextVar("unit_of_work", default=None)
+
+
+def begin_unit_of_work(read_only: bool = False) -> UnitOfWork:
+    """Start a unit of work that get_db_connection() calls in this context will join."""
+    uow = UnitOfWork(read_only=read_only)
+    uow._token = _current_unit_of_work.set(uow)
+    return uow
+
+
+def end_unit_of_work(uow: UnitOfWork, error: Optional[BaseException] = None) -> None:
+    """Commit or roll back the unit of work and stop joining it."""
+    try:
+        uow.finish(error)
+    finally:
+        _current_unit_of_work.reset(uow._token)
+
+
+def current_unit_of_work() -> Optional[UnitOfWork]:
+    uow = _current_unit_of_work.get()
+    if uow is not None and uow.owner == threading.get_ident():
+        return uow
+    return None
+
+
+@contextmanager
+def unit_of_work(read_only: bool = False) -> Iterator[UnitOfWork]:
+    """
+    Run the block as one unit of work, e.g. outside of a request.
+
+    Inside another unit of work that can serve it, the block joins that one
+    instead, and a failure in the block rolls the whole of it back.
+    """
+    outer = current_unit_of_work()
+    if outer is not None and (read_only or not outer.read_only):
+        try:
+            yield outer
+        except BaseException:
+            outer.rollback_only = True
+            raise
+        return
+
+    uow = begin_unit_of_work(read_only)
+    try:
+        yield uow
+    except BaseException as e:
+        end_unit_of_work(uow, e)
+        raise
+    end_unit_of_work(uow)
+
+
+@contextmanager
+def outside_unit_of_work() -> Iterator[None]:
+    """
+    Run the block without the current unit of work, e.g. while waiting on ESPN
+    or a write queue: the unit's connection goes back to the pool meanwhile,
+    and get_db_connection() calls in the block use short connections of their
+    own, committed as they go.
+
+    Raises:
+        RuntimeError: If the unit of work has uncommitted writes, which the
+            block's own connections would wait on.
+    """
+    uow = current_unit_of_work()
+    if uow is None:
+        yield
+        return
+    uow.release()
+    token = _current_unit_of_work.set(None)
+    try:
+        yield
+    finally:
+        _current_unit_of_work.reset(token)
+
+
+def begin_immediate(conn: sqlite3.Connection) -> None:
+    """
+    Take the write lock now, for a read-then-write that must not race.
+
+    A connection already in a transaction (e.g. inside a unit of work that
+    has written) already holds it.
+    """
+    if not conn.in_transaction:
+        conn.execute("BEGIN IMMEDIATE")
+
+
 ###################################################
 #
 # This one yields rather than returns.
-# What is the type of the yielded value?
+# It yields a pooled sqlite3.Connection, which goes
+# back to the pool (not closed) on exit. Inside a
+# unit of work it yields the unit's connection, so
+# reads see its writes. Outside one, read_only
+# callers get a read pool connection and leave the
+# write pool to writers.
 #
 ###################################################
 @contextmanager
-def get_db_connection():
-    conn = None
+def get_db_connection(read_only: bool = False) -> Iterator[sqlite3.Connection]:
+    uow = current_unit_of_work()
+    if uow is not None:
+        try:
+            yield uow.connection()
+        except sqlite3.Error as e:
+            logger.error("Database connection error: %s", str(e))
+            uow.rollback_only = True
+            raise e
+        return
+
+    if read_only:
+        with get_read_connection() as conn:
+            yield conn
+        return
+
+    pool = get_pool()
+    conn = pool.acquire()
+    try:
+        yield conn
+    except sqlite3.Error as e:
+        logger.error("Database connection error: %s", str(e))
+        raise e
+    finally:
+        pool.release(conn)
+
+
+@contextmanager
+def get_read_connection() -> Iterator[sqlite3.Connection]:
+    """Like get_db_connection(), but always a read-only connection from the read pool."""
+    pool = get_read_pool()
+    conn = pool.acquire()
     try:
-        conn = sqlite3.connect(DB_PATH)
         yield conn
     except sqlite3.Error as e:
         logger.error("Database connection error: %s", str(e))
         raise e
     finally:
-        if conn:
-            conn.close()
-            logger.info("Database connection closed.")
+        pool.release(conn)
+
+
+###################################################
+#
+# Online backups. The SQLite backup API copies the
+# live database a few pages at a time, pausing
+# between steps, so requests keep reading and
+# writing while a snapshot is taken.
+#
+###################################################
+
+# load the backup settings from the environment with sensible defaults
+BACKUP_ENABLED = os.getenv("BACKUP_ENABLED", "false").lower() == "true"
+BACKUP_DIR = os.getenv("BACKUP_DIR", os.path.join(os.getcwd(), "data", "backups"))
+BACKUP_INTERVAL = float(os.getenv("BACKUP_INTERVAL", "86400"))
+BACKUP_KEEP = int(os.getenv("BACKUP_KEEP", "7"))
+BACKUP_COMPRESS = os.getenv("BACKUP_COMPRESS", "true").lower() == "true"
+BACKUP_PAGES_PER_STEP = int(os.getenv("BACKUP_PAGES_PER_STEP", "256"))
+BACKUP_STEP_SLEEP_MS = float(os.getenv("BACKUP_STEP_SLEEP_MS", "5"))
+
+BACKUP_PREFIX = "team_tracker-"
+
+
+def _copy_database(source: sqlite3.Connection, target: sqlite3.Connection, pages: int,
+                   sleep_ms: float) -> dict:
+    """Copy source into target in steps of pages, yielding sleep_ms between steps."""
+    progress = {"steps": 0, "restarts": 0, "total_pages": 0, "remaining": None}
+
+    def step(status: int, remaining: int, total: int) -> None:
+        # A write from another connection between steps starts the copy over
+        if progress["remaining"] is not None and remaining > progress["remaining"]:
+            progress["restarts"] += 1
+        progress.update(steps=progress["steps"] + 1, total_pages=total, remaining=remaining)
+        if remaining and sleep_ms > 0:
+            time.sleep(sleep_ms / 1000)
+
+    source.backup(target, pages=pages, progress=step)
+    return progress
+
+
+def backup_database(directory: Optional[str] = None, compress: bool = BACKUP_COMPRESS,
+                    pages: int = BACKUP_PAGES_PER_STEP, sleep_ms: float = BACKUP_STEP_SLEEP_MS) -> dict:
+    """
+    Write a consistent snapshot of DB_PATH to a new file in directory.
+
+    The copy runs on its own read-only connection, never a pooled one, and
+    releases the database between steps. The snapshot is checked with
+    PRAGMA quick_check, optionally gzipped, and only then renamed into
+    place, so a file named like a backup is always a complete one.
+
+    Returns:
+        dict: The backup's path, size, page count, duration and pages per second.
+
+    Raises:
+        sqlite3.Error: If the database can't be read or the snapshot is corrupt.
+    """
+    directory = directory or BACKUP_DIR
+    os.makedirs(directory, exist_ok=True)
+    stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S%fZ")
+    path = os.path.join(directory, f"{BACKUP_PREFIX}{stamp}.db" + (".gz" if compress else ""))
+    partial = os.path.join(directory, f".{BACKUP_PREFIX}{stamp}.db.partial")
+
+    started = time.monotonic()
+    source = sqlite3.connect(f"file:{quote(os.path.abspath(DB_PATH))}?mode=ro", uri=True)
+    target = sqlite3.connect(partial)
+    try:
+        progress = _copy_database(source, target, pages, sleep_ms)
+        # A self-contained file, without a -wal next to it
+        target.execute("PRAGMA journal_mode = DELETE;")
+        result = target.execute("PRAGMA quick_check;").fetchone()[0]
+        if result != "ok":
+            raise sqlite3.DatabaseError(f"Backup failed its integrity check: {result}")
+    except BaseException:
+        target.close()
+        os.remove(partial)
+        raise
+    finally:
+        source.close()
+    target.close()
+
+    if compress:
+        with open(partial, "rb") as raw, gzip.open(partial + ".gz", "wb", compresslevel=6) as packed:
+            shutil.copyfileobj(raw, packed)
+        os.remove(partial)
+        partial += ".gz"
+    os.replace(partial, path)
+
+    duration = time.monotonic() - started
+    backup = {
+        "path": path,
+        "bytes": os.path.getsize(path),
+        "pages": progress["total_pages"],
+        "steps": progress["steps"],
+        "restarts": progress["restarts"],
+        "duration_ms": duration * 1000,
+        "pages_per_s": progress["total_pages"] / duration if duration else 0.0,
+    }
+    logger.info("Database backed up to %s: %d pages in %.0f ms", path, backup["pages"], backup["duration_ms"])
+    return backup
+
+
+def list_backups(directory: Optional[str] = None) -> list[str]:
+    """Return the backups in directory, oldest first."""
+    directory = directory or BACKUP_DIR
+    if not os.path.isdir(directory):
+        return []
+    names = sorted(name for name in os.listdir(directory)
+                   if name.startswith(BACKUP_PREFIX) and name.endswith((".db", ".db.gz")))
+    return [os.path.join(directory, name) for name in names]
+
+
+def prune_backups(directory: Optional[str] = None, keep: int = BACKUP_KEEP) -> list[str]:
+    """Delete all but the newest keep backups; returns the deleted paths."""
+    expired = list_backups(directory)[:-keep] if keep > 0 else []
+    for path in expired:
+        os.remove(path)
+        logger.info("Deleted expired backup %s", path)
+    return expired
+
+
+def restore_database(path: str, pages: int = BACKUP_PAGES_PER_STEP, sleep_ms: float = 0.0) -> dict:
+    """
+    Replace the contents of DB_PATH with the backup at path.
+
+    The backup (gzipped or not) is checked before anything is overwritten,
+    then copied in with the backup API under the database's own locks, so
+    the file is never seen half written. Processes serving the database
+    keep in-memory caches, so restart them afterwards; pending migrations
+    are applied at startup as usual.
+
+    Raises:
+        FileNotFoundError: If there is no backup at path.
+        sqlite3.Error: If the backup is corrupt or the database can't be written.
+    """
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"No backup at {path}")
+
+    started = time.monotonic()
+    with tempfile.TemporaryDirectory() as tmp:
+        unpacked = path
+        if path.endswith(".gz"):
+            unpacked = os.path.join(tmp, "restore.db")
+            with gzip.open(path, "rb") as packed, open(unpacked, "wb") as raw:
+                shutil.copyfileobj(packed, raw)
+
+        source = sqlite3.connect(f"file:{quote(os.path.abspath(unpacked))}?mode=ro", uri=True)
+        os.makedirs(os.path.dirname(os.path.abspath(DB_PATH)), exist_ok=True)
+        target = sqlite3.connect(DB_PATH, timeout=DB_PRAGMAS["busy_timeout"] / 1000)
+        try:
+            result = source.execute("PRAGMA quick_check;").fetchone()[0]
+            if result != "ok":
+                raise sqlite3.DatabaseError(f"Backup failed its integrity check: {result}")
+            progress = _copy_database(source, target, pages, sleep_ms)
+        finally:
+            source.close()
+            target.close()
+
+    duration = time.monotonic() - started
+    logger.info("Database restored from %s: %d pages in %.0f ms", path, progress["total_pages"], duration * 1000)
+    return {"pages": progress["total_pages"], "duration_ms": duration * 1000}
+
+
+class BackupScheduler:
+    """
+    Background thread taking a backup every interval seconds and pruning
+    all but the newest keep.
+
+    Every worker process may run one; a worker skips its turn when the
+    newest backup in the directory is recent enough, so they don't all
+    snapshot the same database.
+    """
+
+    def __init__(self, interval: float = BACKUP_INTERVAL, keep: int = BACKUP_KEEP,
+                 directory: Optional[str] = None) -> None:
+        self.interval = interval
+        self.keep = keep
+        self.directory = directory
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._last: Optional[dict] = None
+        self._counters = {"backups": 0, "skipped": 0, "errors": 0, "pruned": 0}
+        self._last_error: Optional[str] = None
+
+    def start(self) -> None:
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._loop, name="db-backup", daemon=True)
+        self._thread.start()
+        logger.info("Database backups started, every %.0fs", self.interval)
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def _loop(self) -> None:
+        while not self._stop.is_set():
+            self.run_once()
+            self._stop.wait(self.interval)
+
+    def run_once(self, force: bool = False) -> Optional[dict]:
+        """Take a backup unless a recent one exists (or force is set); returns it."""
+        backups = list_backups(self.directory)
+        if not force and backups and time.time() - os.path.getmtime(backups[-1]) < self.interval / 2:
+            with self._lock:
+                self._counters["skipped"] += 1
+            return None
+        try:
+            backup = backup_database(self.directory)
+            pruned = prune_backups(self.directory, self.keep)
+        except (sqlite3.Error, OSError) as e:
+            logger.error("Database backup failed: %s", str(e))
+            with self._lock:
+                self._counters["errors"] += 1
+                self._last_error = str(e)
+            return None
+        with self._lock:
+            self._counters["backups"] += 1
+            self._counters["pruned"] += len(pruned)
+            self._last = dict(backup, finished_at=time.time())
+        return backup
+
+    def stats(self) -> dict:
+        with self._lock:
+            return dict(
+                self._counters,
+                running=self._thread is not None and self._thread.is_alive(),
+                interval=self.interval,
+                keep=self.keep,
+                last=self._last,
+                last_error=self._last_error,
+            )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Back up or restore the team tracker database.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    backup = commands.add_parser("backup", help="take a backup now and prune old ones")
+    backup.add_argument("--dir", default=None, help="backup directory (default BACKUP_DIR)")
+    backup.add_argument("--keep", type=int, default=BACKUP_KEEP)
+    commands.add_parser("list", help="list backups, oldest first").add_argument("--dir", default=None)
+    restore = commands.add_parser("restore", help="replace the database with a backup")
+    restore.add_argument("path")
+    args = parser.parse_args()
+
+    if args.command == "backup":
+        print(BackupScheduler(keep=args.keep, directory=args.dir).run_once(force=True))
+    elif args.command == "list":
+        for path in list_backups(args.dir):
+            print(path)
+    else:
+        print(restore_database(args.path))
 
 
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+import logging
+import os
+import threading
+import time
+from typing import Any, Callable, Hashable, Optional
+
+from team_tracker.utils.logger import configure_logger
+from team_tracker.utils.sql_utils import outside_unit_of_work
+
+
+logger = logging.getLogger(__name__)
+configure_logger(logger)
+
+
+# load the group commit settings from the environment with sensible defaults
+WRITE_BATCH_WINDOW_MS = float(os.getenv("WRITE_BATCH_WINDOW_MS", "3"))
+WRITE_BATCH_MAX = int(os.getenv("WRITE_BATCH_MAX", "256"))
+
+
+class _Batch:
+    def __init__(self) -> None:
+        self.changes: dict[Hashable, Any] = {}
+        self.callers = 0
+        self.opened_at = 0.0
+        self.done = threading.Event()
+        self.error: Optional[BaseException] = None
+
+
+class GroupCommitQueue:
+    """
+    Funnel small writes through one writer thread that commits them in batches.
+
+    submit(key, value) queues a change and blocks until the transaction that
+    contains it has committed, or re-raises the error it failed with. The
+    writer waits up to `window_ms` after the first change of a batch (or until
+    `max_batch` keys are pending) and passes every pending change to `apply`,
+    which writes them in one transaction. Changes to the same key coalesce:
+    only the last value submitted before the batch is taken is written.
+
+    A burst of N writes thus costs a handful of commits instead of N, and they
+    no longer compete with each other for SQLite's write lock.
+
+    Callers must not hold a write transaction of their own while submitting,
+    or the writer would wait on them. A caller's unit of work gives its
+    connection back to the pool while it waits, since the writer needs one too.
+    """
+
+    def __init__(self, name: str, apply: Callable[[dict[Hashable, Any]], None],
+                 window_ms: float = WRITE_BATCH_WINDOW_MS, max_batch: int = WRITE_BATCH_MAX) -> None:
+        self.name = name
+        self.apply = apply
+        self.window = window_ms / 1000
+        self.max_batch = max_batch
+        self._cond = threading.Condition()
+        self._batch = _Batch()
+        self._thread: Optional[threading.Thread] = None
+        self._pid: Optional[int] = None
+        self._counters = {
+            "submitted": 0,
+            "coalesced": 0,
+            "commits": 0,
+            "errors": 0,
+            "largest_batch": 0,
+            "commit_ms_total": 0.0,
+        }
+
+    def submit(self, key: Hashable, value: Any) -> None:
+        """
+        Queue a change and wait until it is committed.
+
+        Raises:
+            RuntimeError: If the caller's unit of work has uncommitted writes.
+            Exception: Whatever `apply` raised for the batch the change was in.
+        """
+        with outside_unit_of_work():
+            self._submit(key, value)
+
+    def _submit(self, key: Hashable, value: Any) -> None:
+        with self._cond:
+            self._ensure_writer()
+            batch = self._batch
+            if key in batch.changes:
+                self._counters["coalesced"] += 1
+            elif not batch.changes:
+                batch.opened_at = time.monotonic()
+            batch.changes[key] = value
+            batch.callers += 1
+            self._counters["submitted"] += 1
+            self._cond.notify()
+
+        batch.done.wait()
+        if batch.error is not None:
+            raise batch.error
+
+    def _ensure_writer(self) -> None:
+        # Threads don't survive a fork, so each worker process starts its own writer
+        if self._thread is None or self._pid != os.getpid():
+            self._batch = _Batch()
+            self._pid = os.getpid()
+            self._thread = threading.Thread(target=self._run, name=f"{self.name}-writer", daemon=True)
+            self._thread.start()
+
+    def _next_batch(self) -> _Batch:
+        with self._cond:
+            self._cond.wait_for(lambda: bool(self._batch.changes))
+            deadline = self._batch.opened_at + self.window
+            self._cond.wait_for(lambda: len(self._batch.changes) >= self.max_batch,
+                                timeout=max(deadline - time.monotonic(), 0))
+            batch, self._batch = self._batch, _Batch()
+            return batch
+
+    def _run(self) -> None:
+        while True:
+            batch = self._next_batch()
+            started = time.perf_counter()
+            try:
+                self.apply(batch.changes)
+            except BaseException as e:
+                logger.error("%s batch of %d changes failed: %s", self.name, len(batch.changes), str(e))
+                batch.error = e
+            elapsed_ms = (time.perf_counter() - started) * 1000
+
+            with self._cond:
+                self._counters["errors" if batch.error is not None else "commits"] += 1
+                self._counters["largest_batch"] = max(self._counters["largest_batch"], len(batch.changes))
+                self._counters["commit_ms_total"] += elapsed_ms
+            batch.done.set()
+
+    def stats(self) -> dict:
+        with self._cond:
+            stats = dict(self._counters)
+            stats["pending"] = len(self._batch.changes)
+            stats["window_ms"] = self.window * 1000
+            return stats
@@ -0,0 +1,135 @@
+"""
+What the Flask (app.py) and ASGI (asgi.py) entry points share: the request
+argument helpers, the response cache and builders for the background
+services.
+
+Importing this module starts nothing. Each entry point builds its own
+refresher, backups and health monitor and starts them when it starts
+serving, so importing one entry point never runs the other's services.
+"""
+from datetime import datetime, timezone
+import time
+from typing import Any, Callable, Optional
+
+from team_tracker.clients.espn import get_espn_client
+from team_tracker.models import locker_model
+from team_tracker.models import schedule_model
+from team_tracker.models import user_model
+from team_tracker.utils.disk_cache import get_disk_cache
+from team_tracker.utils.fanout import BULK_MAX_IDS
+from team_tracker.utils.health import (
+    HealthMonitor,
+    cache_check,
+    database_check,
+    database_integrity_check,
+    espn_breakers_check,
+    espn_reachability_check
+)
+from team_tracker.utils.rate_limiter import background_priority
+from team_tracker.utils.response_cache import ResponseCache, CACHE_ROSTER_TTL, CACHE_SCHEDULE_TTL
+from team_tracker.utils.scheduler import TeamRefresher, REFRESH_ROSTER_INTERVAL, REFRESH_SCHEDULE_INTERVAL
+
+
+# Shared cache for the ESPN proxy routes, keyed by (endpoint, nfl_id), backed by
+# the disk cache so a restart or a new worker starts warm
+response_cache = ResponseCache(
+    ttls={"schedule": CACHE_SCHEDULE_TTL, "roster": CACHE_ROSTER_TTL},
+    store=get_disk_cache(),
+    # Stored copies served during an ESPN outage expire by when they were synced
+    synced_at=lambda value: value["synced_at"]
+)
+
+
+def with_staleness(body: dict, synced_at: float, ttl: float) -> dict:
+    """Mark data older than its TTL, i.e. last-known-good data served while ESPN is unavailable."""
+    if time.time() - synced_at >= ttl:
+        body['stale'] = True
+        body['as_of'] = datetime.fromtimestamp(synced_at, timezone.utc).isoformat()
+    return body
+
+
+def page_args(args) -> dict:
+    """Parse the cursor, limit and sort query parameters of a paginated listing."""
+    try:
+        limit = int(args.get('limit', locker_model.TEAMS_PAGE_SIZE))
+    except ValueError:
+        raise ValueError("limit must be an integer")
+    return {'cursor': args.get('cursor'), 'limit': limit, 'sort': args.get('sort', 'id')}
+
+
+def bool_arg(args, name: str):
+    value = args.get(name)
+    if value is None:
+        return None
+    if value.lower() not in ('true', 'false'):
+        raise ValueError(f"{name} must be true or false")
+    return value.lower() == 'true'
+
+
+def parse_team_ids(raw: str) -> list[int]:
+    """Parse a comma-separated list of NFL team ids, dropping duplicates."""
+    ids = list(dict.fromkeys(int(i) for i in raw.split(",") if i.strip()))
+    if not ids:
+        raise ValueError("At least one team id is required")
+    if len(ids) > BULK_MAX_IDS:
+        raise ValueError(f"At most {BULK_MAX_IDS} team ids may be requested at once")
+    return ids
+
+
+def authorize(authorization: Optional[str], username: str) -> Optional[tuple[dict, int]]:
+    """
+    Check that an Authorization header carries a token /api/login issued to username.
+
+    Returns None if it does, otherwise the error body and status to answer with.
+    """
+    scheme, _, token = (authorization or "").partition(" ")
+    if scheme.lower() != "bearer" or not token:
+        return {'error': 'Log in and send the token as Authorization: Bearer <token>'}, 401
+    user = user_model.verify_token(token.strip())
+    if user is None:
+        return {'error': 'Invalid or expired token'}, 401
+    if user != username:
+        return {'error': f"Not allowed to access the favorites of user '{username}'"}, 403
+    return None
+
+
+def _refresh_job(endpoint: str, sync: Callable[[int], Any], get: Callable[[int], Any]) -> Callable[[int], None]:
+    def job(nfl_id: int) -> None:
+        # Refreshes yield ESPN's rate budget to user requests
+        with background_priority():
+            sync(nfl_id)
+        response_cache.put(endpoint, nfl_id, get(nfl_id))
+    return job
+
+
+def build_refresher() -> TeamRefresher:
+    """Build the refresher that keeps every team's schedule and roster warm, so handlers never wait on ESPN."""
+    return TeamRefresher(
+        team_ids=locker_model.get_team_ids,
+        jobs={
+            "schedule": _refresh_job("schedule", schedule_model.sync_schedule, schedule_model.get_schedule),
+            "roster": _refresh_job("roster", schedule_model.sync_roster, schedule_model.get_roster),
+        },
+        intervals={"schedule": REFRESH_SCHEDULE_INTERVAL, "roster": REFRESH_ROSTER_INTERVAL},
+    )
+
+
+def build_health(espn_clients: Callable[[], list]) -> HealthMonitor:
+    """
+    Build the readiness monitor, counting the circuit breakers of the ESPN
+    clients the entry point sends requests through.
+
+    Only the database is critical, since stored data is served while ESPN is down.
+    """
+    return HealthMonitor(
+        checks={
+            "database": database_check,
+            "espn": espn_breakers_check(espn_clients),
+            "caches": cache_check(response_cache, locker_model.teams_cache),
+        },
+        critical={"database"},
+        deep_checks={
+            "database_integrity": database_integrity_check,
+            "espn_reachable": espn_reachability_check(get_espn_client),
+        },
+    )
@@ -0,0 +1,483 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+import importlib
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+from urllib.parse import urlsplit
+
+import pytest
+
+from team_tracker.clients import espn, espn_async
+from team_tracker.clients.espn import EspnClient
+from team_tracker.clients.espn_async import AsyncEspnClient
+from team_tracker.clients.espn_stub import EspnStubServer
+from team_tracker.models import locker_model, schedule_model, user_model
+from team_tracker.utils import disk_cache, scheduler, sql_utils
+from team_tracker.utils.disk_cache import DiskCache
+from team_tracker.utils.rate_limiter import TokenBucket
+
+######################################################
+#
+#    Fixtures
+#
+######################################################
+
+@pytest.fixture(scope="module")
+def entry_points(tmp_path_factory):
+    """Import app.py and asgi.py against a scratch database and disk cache, without the refresher."""
+    tmp = tmp_path_factory.mktemp("entry_points")
+    with pytest.MonkeyPatch.context() as mp:
+        mp.setattr(sql_utils, "DB_PATH", str(tmp / "team_tracker.db"))
+        mp.setattr(disk_cache, "_disk_cache", DiskCache(str(tmp / "http_cache.db")))
+        mp.setattr(scheduler, "REFRESH_ENABLED", False)
+        flask_module = importlib.import_module("app")
+        asgi_module = importlib.import_module("asgi")
+    # Tests refresh the snapshot themselves; the thread would check whichever database a later test uses
+    flask_module.health.stop()
+    return flask_module, asgi_module
+
+
+@pytest.fixture
+def stub():
+    with EspnStubServer() as server:
+        yield server
+
+
+@pytest.fixture
+def setup(entry_points, stub, tmp_path, monkeypatch):
+    """Give each test a fresh database, caches and ESPN clients pointed at the stub."""
+    flask_module, asgi_module = entry_points
+    monkeypatch.setattr(sql_utils, "DB_PATH", str(tmp_path / "team_tracker.db"))
+    sql_utils.initialize_database()
+    monkeypatch.setattr(user_model, "AUTH_SECRET", "test-secret")
+
+    monkeypatch.setattr(flask_module.response_cache, "store", DiskCache(str(tmp_path / "http_cache.db")))
+    flask_module.response_cache.clear()
+
+    # rate=0 turns rate limiting off
+    limiter = TokenBucket(rate=0, state_path=str(tmp_path / "rate_limit.db"))
+    monkeypatch.setattr(espn, "_client", EspnClient(base_url=stub.base_url, max_retries=0, rate_limiter=limiter))
+    monkeypatch.setattr(espn, "_client_pid", os.getpid())
+    monkeypatch.setattr(espn_async, "_client",
+                        AsyncEspnClient(base_url=stub.base_url, max_retries=0, rate_limiter=limiter))
+    monkeypatch.setattr(espn_async, "_client_pid", os.getpid())
+    flask_module.health.refresh()
+    asgi_module.health.refresh()
+    return flask_module, asgi_module
+
+
+def _call_asgi(asgi_app, method, path, body, headers=None):
+    parts = urlsplit(path)
+    scope = {
+        "type": "http",
+        "method": method,
+        "path": parts.path,
+        "query_string": parts.query.encode(),
+        "headers": [(b"content-type", b"application/json")]
+                   + [(name.lower().encode(), value.encode()) for name, value in (headers or {}).items()],
+    }
+    messages = []
+
+    async def receive():
+        return {"type": "http.request", "body": body, "more_body": False}
+
+    async def send(message):
+        messages.append(message)
+
+    asyncio.run(asgi_app(scope, receive, send))
+    status = messages[0]["status"]
+    return status, json.loads(b"".join(m.get("body", b"") for m in messages[1:]))
+
+
+@pytest.fixture(params=["wsgi", "asgi"])
+def api(request, setup):
+    """
+    Call a route through app.py's Flask app or asgi.py's ASGI app; returns
+    (status, json). A token from /api/login is sent as a bearer token.
+    """
+    flask_module, asgi_module = setup
+
+    if request.param == "wsgi":
+        client = flask_module.app.test_client()
+
+        def call(method, path, payload=None, token=None):
+            headers = {} if token is None else {"Authorization": f"Bearer {token}"}
+            response = client.open(path, method=method, json=payload, headers=headers)
+            return response.status_code, response.get_json()
+    else:
+        def call(method, path, payload=None, token=None):
+            headers = {} if token is None else {"Authorization": f"Bearer {token}"}
+            body = b"" if payload is None else json.dumps(payload).encode()
+            return _call_asgi(asgi_module.app, method, path, body, headers)
+    return call
+
+
+def sign_up(api, username):
+    """Create an account and return its login token."""
+    credentials = {"username": username, "password": "secret"}
+    api("POST", "/api/create-account", credentials)
+    return api("POST", "/api/login", credentials)[1]["token"]
+
+######################################################
+#
+#    Both entry points
+#
+######################################################
+
+def test_health(api):
+    """Test the health and database checks."""
+    assert api("GET", "/api/health") == (200, {"status": "healthy"})
+    assert api("GET", "/api/db-check") == (200, {"database_status": "healthy"})
+
+
+def test_readiness(api, setup):
+    """Test that readiness is served from the snapshot, and deep checks run on demand."""
+    status, body = api("GET", "/api/ready")
+    assert status == 200
+    assert body["checks"]["database"]["schema_version"] == body["checks"]["database"]["expected_schema_version"]
+    assert body["checks"]["espn"]["ok"]
+    assert "database_integrity" not in body["checks"]
+
+    status, body = api("GET", "/api/ready?deep=true")
+    assert status == 200
+    assert body["checks"]["database_integrity"]["ok"]
+    assert body["checks"]["espn_reachable"]["ok"]
+
+    assert api("GET", "/api/ready?deep=maybe")[0] == 400
+
+
+def test_not_ready_without_database(api, setup, monkeypatch, tmp_path):
+    """Test that a failing database check makes the instance not ready once the snapshot refreshes."""
+    flask_module, asgi_module = setup
+    monkeypatch.setattr(sql_utils, "DB_PATH", str(tmp_path / "missing" / "team_tracker.db"))
+    flask_module.health.refresh()
+    asgi_module.health.refresh()
+
+    status, body = api("GET", "/api/ready")
+    assert status == 503
+    assert not body["checks"]["database"]["ok"]
+    assert api("GET", "/api/db-check")[0] == 404
+
+
+def test_accounts(api):
+    """Test creating an account, logging in and changing the password."""
+    credentials = {"username": "fan", "password": "secret"}
+    assert api("POST", "/api/create-account", credentials) == (201, {"message": "Account created"})
+    assert api("POST", "/api/create-account", credentials)[0] == 400
+    status, body = api("POST", "/api/login", credentials)
+    assert (status, body["message"]) == (200, "Login successful")
+    assert user_model.verify_token(body["token"]) == "fan"
+    assert api("POST", "/api/login", {"username": "fan", "password": "wrong"}) == (401, {"error": "Invalid credentials"})
+
+    change = {"username": "fan", "old_password": "secret", "new_password": "better"}
+    assert api("POST", "/api/update-password", change) == (200, {"message": "Password updated successfully"})
+    assert api("POST", "/api/update-password", change)[0] == 401
+    assert api("POST", "/api/update-password", {"username": "fan"})[0] == 400
+
+
+def test_login_leaves_the_write_pool_to_writers(api, monkeypatch):
+    """Test that logging in only reads, so it doesn't wait on a busy write pool."""
+    credentials = {"username": "fan", "password": "secret"}
+    api("POST", "/api/create-account", credentials)
+    pool = sql_utils.get_pool()
+    monkeypatch.setattr(pool, "timeout", 0.1)
+    held = [pool.acquire() for _ in range(pool.size)]
+    try:
+        assert api("POST", "/api/login", credentials)[0] == 200
+    finally:
+        for conn in held:
+            pool.release(conn)
+
+
+def test_teams_and_favorites(api):
+    """Test ingesting the teams from ESPN and toggling favorites."""
+    status, body = api("GET", "/api/get-teams")
+    assert status == 200
+    assert body == {"status": "success", "inserted": 32, "updated": 0, "unchanged": 0}
+    # ESPN reports no change the second time round
+    assert api("GET", "/api/get-teams") == (200, {"status": "success"})
+
+    assert api("POST", "/api/add-to-fav", {"nfl_id": 22}) == (200, {"status": "success"})
+    status, body = api("GET", "/api/get-favs")
+    assert status == 200
+    assert [team["nfl_id"] for team in body["favorites"]] == [22]
+
+    assert api("POST", "/api/remove-from-fav", {"nfl_id": 22}) == (200, {"status": "success"})
+    assert api("GET", "/api/get-favs") == (200, {"status": "success", "favorites": [], "next_cursor": None})
+
+
+def test_team_listing_pages(api):
+    """Test keyset pagination, filters and sorting of /api/teams."""
+    api("GET", "/api/get-teams")
+
+    seen, cursor = [], None
+    while True:
+        status, body = api("GET", "/api/teams?limit=10" + (f"&cursor={cursor}" if cursor else ""))
+        assert status == 200
+        assert len(body["teams"]) <= 10
+        seen += [team["id"] for team in body["teams"]]
+        cursor = body["next_cursor"]
+        if cursor is None:
+            break
+    assert seen == sorted(seen) and len(seen) == 32
+
+    status, body = api("GET", "/api/teams?sort=-team&limit=5")
+    names = [team["team"] for team in body["teams"]]
+    assert names == sorted(names, reverse=True)
+    status, body = api("GET", f"/api/teams?sort=-team&limit=5&cursor={body['next_cursor']}")
+    assert body["teams"][0]["team"] < names[-1]
+
+    status, body = api("GET", "/api/teams?loc=Arizona")
+    assert [team["nfl_id"] for team in body["teams"]] == [22]
+
+    api("POST", "/api/add-to-fav", {"nfl_id": 22})
+    status, body = api("GET", "/api/teams?favorite=true")
+    assert [team["nfl_id"] for team in body["teams"]] == [22]
+    status, body = api("GET", "/api/get-favs?limit=1")
+    assert [team["nfl_id"] for team in body["favorites"]] == [22]
+    assert body["next_cursor"] is None
+
+    assert api("GET", "/api/teams?limit=100000")[0] == 400
+    assert api("GET", "/api/teams?cursor=garbage")[0] == 400
+    assert api("GET", "/api/teams?sort=wins")[0] == 400
+    assert api("GET", "/api/teams?favorite=maybe")[0] == 400
+
+
+def test_user_favorites(api):
+    """Test that each user has their own favorites."""
+    api("GET", "/api/get-teams")
+    fan = sign_up(api, "fan")
+    rival = sign_up(api, "rival")
+
+    assert api("POST", "/api/users/fan/favorites", {"nfl_id": 22}, fan) == (200, {"status": "success"})
+    assert api("POST", "/api/users/fan/favorites", {"nfl_id": 1}, fan) == (200, {"status": "success"})
+    assert api("POST", "/api/users/rival/favorites", {"nfl_id": 2}, rival) == (200, {"status": "success"})
+
+    status, body = api("GET", "/api/users/fan/favorites", token=fan)
+    assert status == 200
+    assert sorted(team["nfl_id"] for team in body["favorites"]) == [1, 22]
+
+    assert api("DELETE", "/api/users/fan/favorites/22", token=fan) == (200, {"status": "success"})
+    status, body = api("GET", "/api/users/fan/favorites", token=fan)
+    assert [team["nfl_id"] for team in body["favorites"]] == [1]
+    status, body = api("GET", "/api/users/rival/favorites", token=rival)
+    assert [team["nfl_id"] for team in body["favorites"]] == [2]
+    # The global favorites list is separate
+    assert api("GET", "/api/get-favs") == (200, {"status": "success", "favorites": [], "next_cursor": None})
+
+    assert api("GET", "/api/users/nobody/favorites", token=user_model.issue_token("nobody"))[0] == 404
+    assert api("POST", "/api/users/fan/favorites", {"nfl_id": 999}, fan)[0] == 404
+
+
+def test_user_favorites_require_the_users_token(api):
+    """Test that a user's favorites can only be read or changed with that user's login token."""
+    api("GET", "/api/get-teams")
+    fan = sign_up(api, "fan")
+    rival = sign_up(api, "rival")
+    api("POST", "/api/users/fan/favorites", {"nfl_id": 22}, fan)
+
+    for method, path, payload in [("GET", "/api/users/fan/favorites", None),
+                                  ("POST", "/api/users/fan/favorites", {"nfl_id": 1}),
+                                  ("DELETE", "/api/users/fan/favorites/22", None)]:
+        assert api(method, path, payload)[0] == 401
+        assert api(method, path, payload, "forged." + fan)[0] == 401
+        assert api(method, path, payload, fan[:-1] + ("0" if fan[-1] != "0" else "1"))[0] == 401
+        assert api(method, path, payload, rival)[0] == 403
+
+    status, body = api("GET", "/api/users/fan/favorites", token=fan)
+    assert [team["nfl_id"] for team in body["favorites"]] == [22]
+
+
+def test_concurrent_user_favorites(api, monkeypatch):
+    """Test that concurrent favorite toggles don't starve the writer of a database connection."""
+    api("GET", "/api/get-teams")
+    fan = sign_up(api, "fan")
+    # A longer window lets every request queue up before the writer needs its connection
+    monkeypatch.setattr(locker_model.user_favorites_queue, "window", 0.1)
+    nfl_ids = [1, 2, 3, 4, 22, 25]
+
+    with ThreadPoolExecutor(len(nfl_ids)) as pool:
+        added = list(pool.map(lambda nfl_id: api("POST", "/api/users/fan/favorites", {"nfl_id": nfl_id}, fan),
+                              nfl_ids))
+    assert added == [(200, {"status": "success"})] * len(nfl_ids)
+    status, body = api("GET", "/api/users/fan/favorites", token=fan)
+    assert sorted(team["nfl_id"] for team in body["favorites"]) == nfl_ids
+
+    with ThreadPoolExecutor(len(nfl_ids)) as pool:
+        removed = list(pool.map(lambda nfl_id: api("DELETE", f"/api/users/fan/favorites/{nfl_id}", token=fan),
+                                nfl_ids))
+    assert removed == [(200, {"status": "success"})] * len(nfl_ids)
+    assert api("GET", "/api/users/fan/favorites", token=fan) == (200, {"status": "success", "favorites": []})
+
+
+def test_schedule_and_roster(api):
+    """Test the single-team proxy routes, including an unknown team."""
+    status, body = api("GET", "/team-schedule/22")
+    assert status == 200
+    assert len(body["events"]) == 17
+    assert "stale" not in body
+
+    status, body = api("GET", "/team-roster/22")
+    assert status == 200
+    assert len(body["athletes"]) == 53
+
+    assert api("GET", "/team-schedule/999")[0] == 404
+
+
+def test_sync_resumes_after_outage(api, setup, stub, monkeypatch):
+    """Test that a stale copy served during an ESPN outage isn't cached once ESPN is back."""
+    flask_module, _ = setup
+    monkeypatch.setattr(flask_module.response_cache, "stale_ttl", 0)
+    schedule_model.sync_schedule(22)
+    with sql_utils.get_db_connection() as conn:
+        conn.execute("UPDATE schedules SET synced_at = 0")
+        conn.commit()
+
+    stub.config.error_rate = 1.0
+    status, body = api("GET", "/team-schedule/22")
+    assert status == 200
+    assert body["stale"]
+
+    stub.config.error_rate = 0.0
+    status, body = api("GET", "/team-schedule/22")
+    assert status == 200
+    assert "stale" not in body
+
+
+def test_slow_sync_holds_no_connection(api, stub):
+    """Test that schedule and roster syncs don't keep a pooled connection while waiting on ESPN."""
+    api("GET", "/api/get-teams")
+    stub.config.latency_ms = 500
+    fetches = [threading.Thread(target=api, args=("GET", path)) for path in ("/team-schedule/22", "/team-roster/1")]
+    for fetch in fetches:
+        fetch.start()
+    time.sleep(0.2)
+
+    assert sql_utils.get_pool().stats()["in_use"] == 0
+    assert sql_utils.get_read_pool().stats()["in_use"] == 0
+    for fetch in fetches:
+        fetch.join()
+    status, body = api("GET", "/team-schedule/22")
+    assert status == 200
+    assert len(body["events"]) == 17
+
+
+def test_standings(api):
+    """Test that syncing schedules records the completed games in the standings."""
+    api("GET", "/api/get-teams")
+    status, body = api("GET", "/api/standings")
+    assert status == 200
+    # Every team is listed at 0-0 before any schedule is synced
+    assert len(body["standings"]) == 32
+    assert all(team["games"] == 0 for team in body["standings"])
+
+    for nfl_id in (2, 22):
+        api("GET", f"/team-schedule/{nfl_id}")
+
+    status, body = api("GET", "/api/standings?conference=NFC&division=West")
+    assert status == 200
+    cardinals = next(team for team in body["standings"] if team["nfl_id"] == 22)
+    # The stub's first 10 weeks are played
+    assert cardinals["games"] == 10
+    assert cardinals["wins"] + cardinals["losses"] + cardinals["ties"] == 10
+
+    assert api("GET", "/api/standings?division=Central")[0] == 400
+
+
+def test_bulk_routes(api):
+    """Test the bulk proxy routes report each team separately."""
+    status, body = api("GET", "/team-schedules?ids=1,22,999")
+    assert status == 200
+    assert body["teams"]["1"]["status"] == 200
+    assert len(body["teams"]["22"]["events"]) == 17
+    assert body["teams"]["999"]["status"] == 404
+
+    status, body = api("GET", "/team-rosters?ids=22")
+    assert status == 200
+    assert len(body["teams"]["22"]["athletes"]) == 53
+
+    assert api("GET", "/team-rosters?ids=")[0] == 400
+
+
+def test_operations(api):
+    """Test the operations routes answer with the same sections."""
+    status, body = api("GET", "/api/metrics")
+    assert status == 200
+    assert set(body) == {"response_cache", "disk_cache", "db_pool", "favorites_writes", "user_favorites_writes",
+                         "teams_read_cache", "espn_single_flight", "espn_unchanged", "espn_rate_limit",
+                         "backups"}
+
+    status, body = api("GET", "/api/espn-status")
+    assert status == 200
+    assert set(body["breakers"]) == {"teams", "schedule", "roster"}
+
+    assert api("GET", "/api/refresh-status")[0] == 200
+
+    status, body = api("GET", "/api/sql-stats?limit=5")
+    assert status == 200
+    assert len(body["statements"]) <= 5
+
+######################################################
+#
+#    ASGI only
+#
+######################################################
+
+def test_asgi_unknown_route(setup):
+    """Test that unknown paths and methods are answered with JSON errors."""
+    _, asgi_module = setup
+    assert _call_asgi(asgi_module.app, "GET", "/nope", b"")[0] == 404
+    assert _call_asgi(asgi_module.app, "POST", "/api/health", b"")[0] == 405
+    assert _call_asgi(asgi_module.app, "POST", "/api/login", b"not json")[0] == 400
+
+
+def test_asgi_bulk_concurrency_is_bounded(setup, monkeypatch):
+    """Test that the ASGI bulk routes load at most BULK_CONCURRENCY teams at a time."""
+    _, asgi_module = setup
+    monkeypatch.setattr(asgi_module, "BULK_CONCURRENCY", 2)
+    in_flight = []
+    peak = []
+
+    async def load(nfl_id):
+        in_flight.append(nfl_id)
+        peak.append(len(in_flight))
+        await asyncio.sleep(0.01)
+        in_flight.remove(nfl_id)
+        return {"events": [], "synced_at": time.time()}
+
+    monkeypatch.setattr(asgi_module, "cached_schedule", load)
+    status, body = _call_asgi(asgi_module.app, "GET", "/team-schedules?ids=1,2,3,4,5,6", b"")
+    assert status == 200
+    assert len(body["teams"]) == 6
+    assert max(peak) == 2
+
+
+def test_asgi_import_starts_nothing(tmp_path):
+    """Test that importing asgi.py neither imports app.py nor starts any background thread."""
+    env = dict(os.environ, DB_PATH=str(tmp_path / "team_tracker.db"), DISK_CACHE_PATH=str(tmp_path / "http_cache.db"),
+               REFRESH_ENABLED="true", BACKUP_ENABLED="true", BACKUP_DIR=str(tmp_path / "backups"))
+    code = "import sys, threading; import asgi; print('app' in sys.modules, threading.active_count())"
+    result = subprocess.run([sys.executable, "-c", code], cwd=os.path.dirname(os.path.dirname(__file__)),
+                            env=env, capture_output=True, text=True, timeout=60)
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.split() == ["False", "1"]
+
+
+def test_asgi_lifespan(setup):
+    """Test that the ASGI app completes startup and shutdown."""
+    _, asgi_module = setup
+    incoming = [{"type": "lifespan.startup"}, {"type": "lifespan.shutdown"}]
+    sent = []
+
+    async def receive():
+        return incoming.pop(0)
+
+    async def send(message):
+        sent.append(message["type"])
+
+    asyncio.run(asgi_module.app({"type": "lifespan"}, receive, send))
+    assert sent == ["lifespan.startup.complete", "lifespan.shutdown.complete"]
@@ -0,0 +1,106 @@
+import pytest
+
+from team_tracker.utils.circuit_breaker import CircuitBreaker, CircuitOpenError, CLOSED, HALF_OPEN, OPEN
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+@pytest.fixture
+def breaker(clock):
+    return CircuitBreaker("roster", window=4, min_calls=4, failure_rate=0.5, slow_call_seconds=2,
+                          slow_call_rate=0.75, open_seconds=30, clock=clock)
+
+
+def fail():
+    raise RuntimeError("Request to ESPN failed")
+
+
+def trip(breaker):
+    for _ in range(4):
+        with pytest.raises(RuntimeError):
+            breaker.call(fail)
+
+
+def test_opens_on_failure_rate(breaker):
+    """Test that the circuit opens once the failure rate crosses the threshold."""
+    breaker.call(lambda: "ok")
+    breaker.call(lambda: "ok")
+    with pytest.raises(RuntimeError):
+        breaker.call(fail)
+    assert breaker.state == CLOSED
+
+    with pytest.raises(RuntimeError):
+        breaker.call(fail)
+    assert breaker.state == OPEN
+
+
+def test_open_circuit_rejects_without_calling(breaker, mocker):
+    """Test that an open circuit fails fast without calling upstream."""
+    trip(breaker)
+    fn = mocker.Mock()
+
+    with pytest.raises(CircuitOpenError):
+        breaker.call(fn)
+
+    fn.assert_not_called()
+    assert breaker.status()["rejected"] == 1
+
+
+def test_opens_on_slow_calls(breaker, clock):
+    """Test that calls slower than the latency threshold open the circuit."""
+    def slow():
+        clock.now += 3
+        return "ok"
+
+    for _ in range(3):
+        breaker.call(slow)
+    breaker.call(lambda: "ok")
+
+    assert breaker.state == OPEN
+
+
+def test_not_found_does_not_trip(breaker):
+    """Test that unknown-team errors are not counted as failures."""
+    def not_found():
+        raise ValueError("ESPN resource not found")
+
+    for _ in range(4):
+        with pytest.raises(ValueError):
+            breaker.call(not_found)
+
+    assert breaker.state == CLOSED
+
+
+def test_half_open_probe_closes(breaker, clock):
+    """Test that a successful probe after the open period closes the circuit."""
+    trip(breaker)
+    clock.now = 31
+
+    assert breaker.call(lambda: "ok") == "ok"
+    assert breaker.state == CLOSED
+    assert [t["to"] for t in breaker.status()["transitions"]] == [OPEN, HALF_OPEN, CLOSED]
+
+
+def test_half_open_probe_failure_reopens(breaker, clock):
+    """Test that a failed probe reopens the circuit for another open period."""
+    trip(breaker)
+    clock.now = 31
+
+    with pytest.raises(RuntimeError):
+        breaker.call(fail)
+    assert breaker.state == OPEN
+
+    clock.now = 40
+    with pytest.raises(CircuitOpenError):
+        breaker.call(lambda: "ok")
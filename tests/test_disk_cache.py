@@ -0,0 +1,75 @@
+import time
+
+import pytest
+
+from team_tracker.utils.disk_cache import DiskCache, RawEntry
+
+
+@pytest.fixture
+def path(tmp_path):
+    return str(tmp_path / "http_cache.db")
+
+
+def raw(body: bytes = b'{"events": []}') -> RawEntry:
+    return RawEntry(body=body, etag='"abc"', last_modified=None, content_hash="hash", fetched_at=time.time())
+
+
+def test_raw_round_trip_across_instances(path):
+    """Test that a raw response written by one worker is read back by another."""
+    DiskCache(path).put_raw("http://espn.test/nfl/teams", raw())
+
+    entry = DiskCache(path).get_raw("http://espn.test/nfl/teams")
+    assert entry.body == b'{"events": []}'
+    assert entry.etag == '"abc"'
+    assert entry.content_hash == "hash"
+
+
+def test_projected_keeps_key_type_and_expiry(path):
+    """Test that projected entries come back with their key and only until they expire."""
+    cache = DiskCache(path)
+    cache.put_projected("schedule", 22, {"synced_at": 1.0, "events": []}, ttl=100)
+    cache.put_projected("roster", 22, {"synced_at": 1.0, "athletes": []}, ttl=-1)
+
+    value, expires_at = cache.get_projected("schedule", 22)
+    assert value == {"synced_at": 1.0, "events": []}
+    assert expires_at > time.time()
+    assert cache.get_projected("schedule", 1) is None
+
+    assert [e[:3] for e in cache.load_projected(time.time())] == [("schedule", 22, {"synced_at": 1.0, "events": []})]
+
+
+def test_size_bounded_eviction(path):
+    """Test that least recently used entries are evicted once the file holds more than max_bytes."""
+    cache = DiskCache(path, max_bytes=250, touch_interval=0)
+    cache.put_raw("a", raw(b"x" * 100))
+    cache.put_raw("b", raw(b"x" * 100))
+    cache.get_raw("a")  # a is now more recently used than b
+    cache.put_raw("c", raw(b"x" * 100))
+
+    assert cache.get_raw("b") is None
+    assert cache.get_raw("a") is not None
+    assert cache.get_raw("c") is not None
+
+    stats = cache.stats()
+    assert stats["evictions"] == 1
+    assert stats["raw_entries"] == 2
+    assert stats["bytes"] == 200
+
+
+def test_reads_and_size_total_avoid_writes_and_scans(path):
+    """Test that recent reads don't write, and the running size total follows replaces and deletes."""
+    cache = DiskCache(path)
+    cache.put_raw("a", raw(b"x" * 100))
+    cache.put_projected("schedule", 22, {"events": []}, ttl=100)
+    conn = cache._connection()
+    changes = conn.total_changes
+
+    assert cache.get_raw("a") is not None
+    assert cache.get_projected("schedule", 22) is not None
+    assert conn.total_changes == changes, "Reads within the touch interval shouldn't write"
+
+    cache.put_raw("a", raw(b"x" * 40))
+    cache.delete_raw("a")
+    cache.put_raw("b", raw(b"x" * 30))
+    assert cache.stats()["bytes"] == 30 + len('{"events": []}')
+    assert DiskCache(path).stats()["bytes"] == 30 + len('{"events": []}')
@@ -0,0 +1,229 @@
+import pytest
+import requests
+
+from team_tracker.clients.espn import EspnClient
+from team_tracker.utils.circuit_breaker import CircuitOpenError
+from team_tracker.utils.disk_cache import DiskCache
+
+
+######################################################
+#
+#    Fixtures
+#
+######################################################
+
+TEAMS_PAYLOAD = {
+    "sports": [{"leagues": [{"teams": [
+        {"team": {"id": "22", "name": "Cardinals", "location": "Arizona"}},
+        {"team": {"id": "1", "name": "Falcons", "location": "Atlanta"}},
+    ]}]}]
+}
+
+SCHEDULE_PAYLOAD = {
+    "events": [
+        {"week": {"text": "Week 1"}, "date": "2024-09-08T17:00Z", "name": "Arizona Cardinals at Buffalo Bills"},
+    ]
+}
+
+ROSTER_PAYLOAD = {
+    "athletes": [
+        {"position": "offense", "items": [{"displayName": "Isaiah Adams", "age": 24}]},
+        {"position": "defense", "items": [{"displayName": "Jackson Barton", "age": 29}]},
+    ]
+}
+
+
+@pytest.fixture
+def client():
+    return EspnClient(base_url="http://espn.test/nfl")
+
+
+@pytest.fixture
+def mock_get(mocker, client):
+    """Patch the shared session so no real HTTP requests are made."""
+    response = mocker.Mock()
+    response.status_code = 200
+    response.content = b"{}"
+    response.headers = {}
+    response.raise_for_status.return_value = None
+    mock_get = mocker.patch.object(client.session, "get", return_value=response)
+    return mock_get
+
+
+######################################################
+#
+#    Session setup
+#
+######################################################
+
+def test_session_is_pooled_with_retries(client):
+    """Test that the shared session mounts a pooled adapter with a retry policy."""
+    adapter = client.session.get_adapter("https://site.api.espn.com")
+    assert adapter._pool_maxsize == 10
+    assert adapter.max_retries.total == 3
+    assert 503 in adapter.max_retries.status_forcelist
+
+
+######################################################
+#
+#    Typed fetches
+#
+######################################################
+
+def test_teams(client, mock_get):
+    """Test that teams are projected to {nfl_id, team, loc}."""
+    mock_get.return_value.json.return_value = TEAMS_PAYLOAD
+
+    teams = client.teams()
+
+    assert teams == [
+        {"nfl_id": "22", "team": "Cardinals", "loc": "Arizona"},
+        {"nfl_id": "1", "team": "Falcons", "loc": "Atlanta"},
+    ]
+    assert mock_get.call_args[0][0] == "http://espn.test/nfl/teams"
+    assert mock_get.call_args[1]["timeout"] == client.timeout
+
+
+def test_schedule(client, mock_get):
+    """Test that schedule events are projected to {week, date, name}."""
+    mock_get.return_value.json.return_value = SCHEDULE_PAYLOAD
+
+    events = client.schedule(22)
+
+    assert events == [{"week": "Week 1", "date": "2024-09-08T17:00Z", "name": "Arizona Cardinals at Buffalo Bills"}]
+    assert mock_get.call_args[0][0] == "http://espn.test/nfl/teams/22/schedule"
+
+
+def test_schedule_with_results(client, mock_get):
+    """Test that completed games carry their final score and upcoming ones don't."""
+    def event(event_id, completed):
+        return {
+            "id": event_id, "week": {"number": 1, "text": "Week 1"}, "date": "2024-09-08T17:00Z",
+            "name": "Arizona Cardinals at Buffalo Bills",
+            "competitions": [{
+                "competitors": [
+                    {"homeAway": "home", "team": {"id": "2"}, "score": {"value": 34.0}},
+                    {"homeAway": "away", "team": {"id": "22"}, "score": {"value": 28.0}},
+                ],
+                "status": {"type": {"completed": completed}},
+            }],
+        }
+    mock_get.return_value.json.return_value = {"events": [event("401", True), event("402", False)]}
+
+    played, upcoming = client.schedule(22)
+
+    assert played["result"] == {"event_id": "401", "week": 1, "home_id": 2, "away_id": 22,
+                                "home_score": 34, "away_score": 28}
+    assert "result" not in upcoming
+
+
+def test_roster(client, mock_get):
+    """Test that roster athletes are flattened to {name, age, position}."""
+    mock_get.return_value.json.return_value = ROSTER_PAYLOAD
+
+    athletes = client.roster(22)
+
+    assert athletes == [
+        {"name": "Isaiah Adams", "age": 24, "position": "offense"},
+        {"name": "Jackson Barton", "age": 29, "position": "defense"},
+    ]
+
+
+def test_unknown_team(client, mock_get):
+    """Test that an unknown team id raises a ValueError."""
+    mock_get.return_value.status_code = 404
+
+    with pytest.raises(ValueError, match="ESPN resource not found"):
+        client.roster(999)
+
+
+def test_timeout(client, mock_get):
+    """Test that a timeout is surfaced as a RuntimeError."""
+    mock_get.side_effect = requests.exceptions.Timeout
+
+    with pytest.raises(RuntimeError, match="timed out"):
+        client.teams()
+
+
+######################################################
+#
+#    Conditional fetches
+#
+######################################################
+
+def test_not_modified(client, mock_get):
+    """Test that stored validators are sent and a 304 skips parsing."""
+    mock_get.return_value.headers = {"ETag": '"abc"', "Last-Modified": "Wed, 20 Nov 2024 17:00:00 GMT"}
+    mock_get.return_value.json.return_value = ROSTER_PAYLOAD
+    client.roster(22)
+
+    mock_get.return_value.status_code = 304
+    mock_get.return_value.json.reset_mock()
+
+    assert client.roster(22, only_if_changed=True) is None
+    headers = mock_get.call_args[1]["headers"]
+    assert headers == {"If-None-Match": '"abc"', "If-Modified-Since": "Wed, 20 Nov 2024 17:00:00 GMT"}
+    mock_get.return_value.json.assert_not_called()
+
+
+def test_unchanged_content_hash(client, mock_get):
+    """Test that an identical body is reported unchanged when ESPN sends no validators."""
+    mock_get.return_value.content = b'{"events": []}'
+    mock_get.return_value.json.return_value = {"events": []}
+
+    assert client.schedule(22, only_if_changed=True) == []
+    assert mock_get.call_args[1]["headers"] == {}
+    assert client.schedule(22, only_if_changed=True) is None
+    assert client.schedule(22) == [], "Unconditional fetches always return data"
+
+    stats = client.change_stats()["http://espn.test/nfl/teams/22/schedule"]
+    assert stats == {"fetches": 3, "unchanged": 2, "unchanged_ratio": 2 / 3}
+
+
+def test_forget_after_failed_save(mocker, tmp_path):
+    """Test that a forgotten schedule is returned in full by the next conditional fetch."""
+    disk_cache = DiskCache(str(tmp_path / "http_cache.db"))
+    client = EspnClient(base_url="http://espn.test/nfl", disk_cache=disk_cache)
+    response = mocker.Mock(status_code=200, content=b'{"events": []}', headers={"ETag": '"abc"'})
+    response.json.return_value = {"events": []}
+    mock_get = mocker.patch.object(client.session, "get", return_value=response)
+    assert client.schedule(22, only_if_changed=True) == []
+
+    client.forget_schedule(22)
+
+    assert disk_cache.get_raw("http://espn.test/nfl/teams/22/schedule") is None
+    assert client.schedule(22, only_if_changed=True) == []
+    assert mock_get.call_args[1]["headers"] == {}
+
+
+def test_open_breaker_fails_fast(client, mock_get):
+    """Test that an open roster circuit rejects calls without touching the network."""
+    mock_get.side_effect = requests.exceptions.ConnectionError("connection refused")
+    for _ in range(5):
+        with pytest.raises(RuntimeError):
+            client.roster(22)
+    mock_get.reset_mock()
+
+    with pytest.raises(CircuitOpenError):
+        client.roster(22)
+    mock_get.assert_not_called()
+
+    assert client.breaker_status()["roster"]["state"] == "open"
+    assert client.breaker_status()["schedule"]["state"] == "closed"
+
+
+def test_disk_cache_survives_restart(mocker, tmp_path):
+    """Test that a new client revalidates against the disk cache and answers a 304 from it."""
+    disk_cache = DiskCache(str(tmp_path / "http_cache.db"))
+    response = mocker.Mock(status_code=200, content=b'{"events": []}', headers={"ETag": '"abc"'})
+    response.json.return_value = {"events": []}
+
+    first = EspnClient(base_url="http://espn.test/nfl", disk_cache=disk_cache)
+    mocker.patch.object(first.session, "get", return_value=response)
+    assert first.schedule(22) == []
+
+    restarted = EspnClient(base_url="http://espn.test/nfl", disk_cache=disk_cache)
+    mock_get = mocker.patch.object(restarted.session, "get", return_value=mocker.Mock(status_code=304))
+    assert restarted.schedule(22) == [], "The body comes from disk"
+    assert mock_get.call_args[1]["headers"] == {"If-None-Match": '"abc"'}
+    assert restarted.schedule(22, only_if_changed=True) is None
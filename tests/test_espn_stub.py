@@ -0,0 +1,152 @@
+import asyncio
+import time
+
+import pytest
+
+from team_tracker.clients.espn import EspnClient
+from team_tracker.clients.async_http import AsyncHttpClient, AsyncResponse, HttpTimeout, _Connection
+from team_tracker.clients.espn_async import AsyncEspnClient
+from team_tracker.clients.espn_stub import EspnStubServer, StubConfig, generate_payloads
+
+
+@pytest.fixture
+def stub():
+    with EspnStubServer() as server:
+        yield server
+
+
+@pytest.fixture
+def client(stub):
+    return EspnClient(base_url=stub.base_url, max_retries=0)
+
+
+def test_serves_all_teams(client):
+    """Test that the stub serves every team with schedules and rosters the client can parse."""
+    teams = client.teams()
+
+    assert len(teams) == 32
+    for t in teams:
+        assert len(client.schedule(t["nfl_id"])) == 17
+    assert len(client.roster(22)) == 53
+
+
+def test_unknown_team(client):
+    """Test that unknown teams are rejected like ESPN does."""
+    with pytest.raises(ValueError):
+        client.schedule(999)
+
+
+def test_not_modified(client, stub):
+    """Test that conditional requests are answered with a 304 until the payload changes."""
+    assert client.roster(22, only_if_changed=True) is not None
+    assert client.roster(22, only_if_changed=True) is None
+    assert stub.stats()["roster"] == {"ok": 1, "not_modified": 1}
+
+    payloads = generate_payloads()
+    payloads["teams/22/roster"]["athletes"][0]["items"].pop()
+    stub.set_payloads(payloads)
+
+    assert len(client.roster(22, only_if_changed=True)) == 52
+
+
+def test_error_rate():
+    """Test that injected errors surface as upstream failures."""
+    with EspnStubServer(config=StubConfig(error_rate=1.0)) as stub:
+        with pytest.raises(RuntimeError):
+            EspnClient(base_url=stub.base_url, max_retries=0).teams()
+        assert stub.stats()["teams"] == {"errors": 1}
+
+
+def test_latency_injection():
+    """Test that configured latency is added to every request."""
+    with EspnStubServer(config=StubConfig(latency_ms=50)) as stub:
+        client = EspnClient(base_url=stub.base_url, max_retries=0)
+        started = time.monotonic()
+        client.teams()
+        assert time.monotonic() - started >= 0.05
+
+
+def test_latency_distributions():
+    """Test that sampled latencies follow the configured mean."""
+    for distribution in ("uniform", "exponential", "lognormal"):
+        stub = EspnStubServer(config=StubConfig(latency_ms=100, latency_jitter_ms=50,
+                                                latency_distribution=distribution))
+        samples = [stub.sample_latency() for _ in range(2000)]
+        stub.server_close()
+        assert 0.08 < sum(samples) / len(samples) < 0.12, distribution
+        assert min(samples) >= 0
+
+
+def test_async_client(stub):
+    """Test that the asyncio client parses the stub's payloads, 304s and errors like EspnClient."""
+    client = AsyncEspnClient(base_url=stub.base_url, max_retries=0)
+
+    async def main():
+        teams = await client.teams()
+        schedules = await asyncio.gather(*(client.schedule(t["nfl_id"]) for t in teams))
+        first = await client.roster(22, only_if_changed=True)
+        second = await client.roster(22, only_if_changed=True)
+        unknown = False
+        try:
+            await client.schedule(999)
+        except ValueError:
+            unknown = True
+        await client.close()
+        return teams, schedules, first, second, unknown
+
+    teams, schedules, first, second, unknown = asyncio.run(main())
+    assert len(teams) == 32
+    assert all(len(events) == 17 for events in schedules)
+    assert len(first) == 53
+    assert second is None
+    assert unknown
+
+
+def test_async_http_cancelled_request_closes_connection(stub, mocker):
+    """Test that a request cancelled mid-exchange closes its connection rather than leaking it."""
+    client = AsyncHttpClient(max_retries=0)
+    close = mocker.spy(_Connection, "close")
+    stub.config.latency_ms = 500
+
+    async def main():
+        request = asyncio.create_task(client.get(f"{stub.base_url}/teams"))
+        await asyncio.sleep(0.1)
+        request.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await request
+        return sum(len(conns) for conns in client._idle.values())
+
+    assert asyncio.run(main()) == 0
+    close.assert_called_once()
+
+
+def test_async_http_reused_connection_timeout_is_not_retried(stub, mocker):
+    """Test that a timeout on a kept-alive connection fails at once instead of trying a fresh one."""
+    client = AsyncHttpClient(read_timeout=0.2, max_retries=0)
+    checkout = mocker.spy(client, "_checkout")
+
+    async def main():
+        await client.get(f"{stub.base_url}/teams")
+        stub.config.latency_ms = 500
+        with pytest.raises(HttpTimeout):
+            await client.get(f"{stub.base_url}/teams")
+        await client.close()
+
+    asyncio.run(main())
+    assert checkout.call_count == 2
+
+
+def test_async_client_malformed_body(mocker):
+    """Test that a 200 with a body that isn't JSON is an upstream failure, not an unknown team."""
+    client = AsyncEspnClient(base_url="http://espn.test/nfl", max_retries=0)
+    mocker.patch.object(client.http, "get", return_value=AsyncResponse(200, {}, b"<html>oops</html>"))
+
+    async def fetch():
+        return await client.schedule(22, only_if_changed=True)
+
+    for _ in range(2):
+        with pytest.raises(RuntimeError, match="invalid JSON"):
+            asyncio.run(fetch())
+    # Counted against the circuit, and not remembered as the body to compare the next one with
+    status = client.breakers["schedule"].status()
+    assert (status["calls"], status["failure_rate"]) == (2, 1.0)
@@ -0,0 +1,46 @@
+import threading
+import time
+
+from team_tracker.utils.fanout import fan_out_blocking
+
+
+def test_results_per_key():
+    """Test that every key maps to its own result or exception."""
+    def load(nfl_id):
+        if nfl_id == 999:
+            raise ValueError("ESPN resource not found")
+        return [nfl_id]
+
+    results = fan_out_blocking([1, 999, 22], load)
+
+    assert results[1] == [1]
+    assert results[22] == [22]
+    assert isinstance(results[999], ValueError)
+    assert list(results) == [1, 999, 22]
+
+
+def test_runs_concurrently():
+    """Test that wall-clock time approaches the slowest call rather than the sum."""
+    started = time.monotonic()
+    fan_out_blocking(range(5), lambda _: time.sleep(0.2), max_concurrency=5)
+
+    assert time.monotonic() - started < 0.6
+
+
+def test_concurrency_is_bounded():
+    """Test that no more than max_concurrency calls run at once."""
+    lock = threading.Lock()
+    running = []
+    peak = []
+
+    def load(_):
+        with lock:
+            running.append(1)
+            peak.append(len(running))
+        time.sleep(0.05)
+        with lock:
+            running.pop()
+
+    fan_out_blocking(range(10), load, max_concurrency=3)
+
+    assert max(peak) <= 3
@@ -0,0 +1,59 @@
+import time
+
+from team_tracker.utils.health import HealthMonitor
+
+
+def failing():
+    raise RuntimeError("database is locked")
+
+
+def test_starting_until_first_refresh():
+    """Test that an instance isn't ready before its first snapshot."""
+    monitor = HealthMonitor({"database": lambda: {"ok": True}}, critical={"database"})
+    assert monitor.snapshot() == {"ready": False, "reason": "starting", "checks": {}}
+
+    monitor.refresh()
+    assert monitor.snapshot()["ready"]
+
+
+def test_only_critical_checks_decide_readiness():
+    """Test that failing non-critical checks are reported without making the instance unready."""
+    checks = {"database": lambda: {"ok": True}, "espn": lambda: {"ok": False}, "caches": failing}
+    monitor = HealthMonitor(checks, critical={"database"})
+    monitor.refresh()
+
+    snapshot = monitor.snapshot()
+    assert snapshot["ready"]
+    assert snapshot["checks"]["caches"] == {"ok": False, "error": "database is locked",
+                                            "ms": snapshot["checks"]["caches"]["ms"]}
+
+    monitor.checks["database"] = failing
+    monitor.refresh()
+    assert not monitor.snapshot()["ready"]
+
+
+def test_probes_read_the_snapshot():
+    """Test that probes don't run the checks, and that an old snapshot is not trusted."""
+    calls = []
+    monitor = HealthMonitor({"database": lambda: calls.append(1) or {"ok": True}}, critical={"database"},
+                            stale_after=0.05)
+    monitor.refresh()
+    for _ in range(100):
+        monitor.snapshot()
+    assert len(calls) == 1
+
+    time.sleep(0.1)
+    snapshot = monitor.snapshot()
+    assert not snapshot["ready"]
+    assert snapshot["reason"] == "stale"
+
+
+def test_deep_check_runs_everything():
+    """Test that a deep check runs the deep checks too, without touching the snapshot."""
+    monitor = HealthMonitor({"database": lambda: {"ok": True}}, critical={"database"},
+                            deep_checks={"database_integrity": lambda: {"ok": True, "result": "ok"}})
+
+    result = monitor.deep_check()
+    assert result["ready"]
+    assert set(result["checks"]) == {"database", "database_integrity"}
+    assert monitor.snapshot()["reason"] == "starting"
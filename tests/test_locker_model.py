@@ -7,9 +7,15 @@ import pytest
 from team_tracker.models.locker_model import (
     Team,
     create_team,
+    bulk_upsert_teams,
+    get_team_ids,
     add_to_favorites,
     remove_from_favorites,
-    get_favorites
+    get_favorites,
+    list_teams,
+    add_user_favorite,
+    remove_user_favorite,
+    get_user_favorites
 )
 
 ######################################################
@@ -29,16 +35,19 @@ def mock_cursor(mocker):
 
     # Mock the connection's cursor
     mock_conn.cursor.return_value = mock_cursor
+    mock_cursor.connection = mock_conn  # Like sqlite3.Cursor.connection
     mock_cursor.fetchone.return_value = None  # Default return for queries
     mock_cursor.fetchall.return_value = []
     mock_conn.commit.return_value = None
 
     # Mock the get_db_connection context manager from sql_utils
     @contextmanager
-    def mock_get_db_connection():
+    def mock_get_db_connection(read_only=False):
         yield mock_conn  # Yield the mocked connection object
 
     mocker.patch("team_tracker.models.locker_model.get_db_connection", mock_get_db_connection)
+    # Every call should reach the mocked connection
+    mocker.patch("team_tracker.models.locker_model.teams_cache.enabled", False)
 
     return mock_cursor  # Return the mock cursor so we can set expectations per test
 
@@ -55,8 +64,8 @@ def test_create_team(mock_cursor):
     create_team(team="Patriots", nfl_id="14", loc="New England")
 
     expected_query = normalize_whitespace("""
-        INSERT INTO teams (team, nfl_id, loc)
-        VALUES (?, ?, ?)
+        INSERT INTO teams (team, nfl_id, loc, conference, division)
+        VALUES (?, ?, ?, ?, ?)
     """)
 
     actual_query = normalize_whitespace(mock_cursor.execute.call_args[0][0])
@@ -68,7 +77,7 @@ def test_create_team(mock_cursor):
     actual_arguments = mock_cursor.execute.call_args[0][1]
 
     # Assert that the SQL query was executed with the correct arguments
-    expected_arguments = ("Patriots", "14", "New England")
+    expected_arguments = ("Patriots", "14", "New England", "NFC", "West")
     assert actual_arguments == expected_arguments, f"The SQL query arguments did not match. Expected {expected_arguments}, got {actual_arguments}."
 
 def test_create_team_duplicate(mock_cursor):
@@ -81,6 +90,35 @@ def test_create_team_duplicate(mock_cursor):
     with pytest.raises(ValueError, match="Team with name 'Patriots' already exists"):
         create_team(team="Patriots", nfl_id="14", loc="New England")
 
+def test_bulk_upsert_teams(mock_cursor):
+    """Test upserting every team in one transaction and counting what changed."""
+
+    # 30 teams before, 31 after: one insert; two rows written, so one update
+    mock_cursor.fetchone.side_effect = [(30,), (31,)]
+    mock_cursor.rowcount = 2
+    mock_cursor.connection.in_transaction = False
+
+    counts = bulk_upsert_teams([
+        {"nfl_id": "22", "team": "Cardinals", "loc": "Arizona"},
+        {"nfl_id": "1", "team": "Falcons", "loc": "Atlanta"},
+        {"nfl_id": "2", "team": "Bills", "loc": "Buffalo"},
+    ])
+    assert counts == {"inserted": 1, "updated": 1, "unchanged": 1}
+    mock_cursor.connection.execute.assert_called_once_with("BEGIN IMMEDIATE")
+
+    expected_query = normalize_whitespace("""
+        INSERT INTO teams (team, nfl_id, loc, conference, division)
+        VALUES (?, ?, ?, ?, ?)
+        ON CONFLICT(nfl_id) DO UPDATE SET team = excluded.team, loc = excluded.loc
+        WHERE teams.team IS NOT excluded.team OR teams.loc IS NOT excluded.loc
+    """)
+    actual_query = normalize_whitespace(mock_cursor.executemany.call_args[0][0])
+    assert actual_query == expected_query, "The SQL query did not match the expected structure."
+
+    expected_arguments = [("Cardinals", 22, "Arizona", "NFC", "West"), ("Falcons", 1, "Atlanta", "NFC", "South"),
+                          ("Bills", 2, "Buffalo", "AFC", "East")]
+    assert mock_cursor.executemany.call_args[0][1] == expected_arguments
+
 def test_add_to_favorites(mock_cursor):
     """Test adding team to favorites."""
 
@@ -138,14 +176,14 @@ def test_remove_from_favorites(mock_cursor):
     assert actual_arguments == expected_arguments, f"The SQL query arguments did not match. Expected {expected_arguments}, got {actual_arguments}."
 
 def test_get_favorites(mock_cursor):
-    """Test getting all teams marked favorite."""
+    """Test getting the first page of teams marked favorite."""
 
-    # Call the add_to_favorites function with a sample NFL team ID
     get_favorites()
 
     # Normalize the expected SQL query
     expected_query = normalize_whitespace("""
         SELECT id, team, nfl_id, loc FROM teams WHERE favorite = TRUE
+        ORDER BY id ASC LIMIT ?
     """)
 
     # Ensure the SQL query was executed correctly
@@ -154,3 +192,94 @@ def test_get_favorites(mock_cursor):
     # Assert that the SQL query was correct
     assert actual_query == expected_query, "The SQL query did not match the expected structure."
 
+def test_list_teams_keyset(mock_cursor):
+    """Test that later pages seek past the previous page's last sort key, and one extra row is read."""
+
+    rows = [(i, f"Team {i}", i, "Loc") for i in range(1, 4)]
+    mock_cursor.fetchone.side_effect = rows + [None]
+
+    teams, next_cursor = list_teams(limit=2, loc="Loc", sort="-team")
+    assert [t["id"] for t in teams] == [1, 2]
+    assert mock_cursor.execute.call_args[0][1] == ("Loc", 3)
+
+    mock_cursor.fetchone.side_effect = [None]
+    list_teams(cursor=next_cursor, limit=2, sort="-team")
+    expected_query = normalize_whitespace("""
+        SELECT id, team, nfl_id, loc FROM teams WHERE team < ?
+        ORDER BY team DESC LIMIT ?
+    """)
+    assert normalize_whitespace(mock_cursor.execute.call_args[0][0]) == expected_query
+    assert mock_cursor.execute.call_args[0][1] == ("Team 2", 3)
+
+def test_list_teams_rejects_bad_input(mock_cursor):
+    """Test that invalid sorts, limits and cursors are rejected."""
+    with pytest.raises(ValueError):
+        list_teams(sort="wins")
+    with pytest.raises(ValueError):
+        list_teams(limit=0)
+    with pytest.raises(ValueError):
+        list_teams(cursor="not a cursor")
+    # A cursor from a sort=team listing
+    with pytest.raises(ValueError, match="different sort order"):
+        list_teams(cursor="WyJ0ZWFtIiwgIkEiXQ==", sort="id")
+
+def test_get_team_ids(mock_cursor):
+    """Test listing the NFL ids of every team."""
+
+    mock_cursor.fetchall.return_value = [(1,), (22,)]
+
+    assert get_team_ids() == [1, 22]
+
+    expected_query = normalize_whitespace("""
+        SELECT nfl_id FROM teams ORDER BY nfl_id
+    """)
+    actual_query = normalize_whitespace(mock_cursor.execute.call_args[0][0])
+    assert actual_query == expected_query, "The SQL query did not match the expected structure."
+
+######################################################
+#
+#    Per-user favorites
+#
+######################################################
+
+def test_add_and_remove_user_favorite(mock_cursor):
+    """Test that per-user favorites are written by team id, looked up from the NFL id."""
+
+    # teams.id of the team with nfl_id 22
+    mock_cursor.fetchone.return_value = (5,)
+
+    add_user_favorite(7, 22)
+    queries = [normalize_whitespace(c[0][0]) for c in mock_cursor.execute.call_args_list]
+    assert queries[0] == "SELECT id FROM teams WHERE nfl_id = ?"
+    assert queries[1] == normalize_whitespace("""
+        INSERT OR IGNORE INTO user_favorites (user_id, team_id, created_at)
+        VALUES (?, ?, ?)
+    """)
+    assert mock_cursor.execute.call_args_list[1][0][1][:2] == (7, 5)
+
+    remove_user_favorite(7, 22)
+    assert mock_cursor.execute.call_args == (
+        ("DELETE FROM user_favorites WHERE user_id = ? AND team_id = ?", (7, 5)),)
+
+def test_user_favorite_unknown_team(mock_cursor):
+    """Test that favoriting an unknown team is rejected before anything is written."""
+    mock_cursor.fetchone.return_value = None
+
+    with pytest.raises(ValueError, match="Team 999 not found"):
+        add_user_favorite(7, 999)
+    assert mock_cursor.execute.call_count == 1
+
+def test_get_user_favorites(mock_cursor):
+    """Test listing a user's favorites through the user_favorites primary key."""
+    mock_cursor.fetchall.return_value = [(5, "Cardinals", 22, "Arizona")]
+
+    assert get_user_favorites(7) == [{'id': 5, 'team': "Cardinals", 'nfl_id': 22, 'loc': "Arizona"}]
+
+    expected_query = normalize_whitespace("""
+        SELECT t.id, t.team, t.nfl_id, t.loc
+        FROM user_favorites f JOIN teams t ON t.id = f.team_id
+        WHERE f.user_id = ?
+        ORDER BY f.team_id
+    """)
+    assert normalize_whitespace(mock_cursor.execute.call_args[0][0]) == expected_query
+    assert mock_cursor.execute.call_args[0][1] == (7,)
@@ -0,0 +1,183 @@
+import sqlite3
+
+import pytest
+
+from team_tracker.utils import migrations
+from team_tracker.utils.migrations import MIGRATIONS, apply_migrations
+
+
+@pytest.fixture
+def conn(tmp_path):
+    conn = sqlite3.connect(str(tmp_path / "app.db"))
+    yield conn
+    conn.close()
+
+
+def columns(conn, table):
+    return [row[1] for row in conn.execute(f"PRAGMA table_info({table})")]
+
+
+def test_fresh_database(conn):
+    """Test that a fresh database gets the full schema and its version recorded."""
+    assert apply_migrations(conn) == [version for version, _, _ in MIGRATIONS]
+
+    assert columns(conn, "teams") == [
+        "id", "team", "nfl_id", "loc", "games", "wins", "favorite",
+        "losses", "ties", "division_wins", "division_losses", "division_ties",
+        "conference_wins", "conference_losses", "conference_ties",
+        "points_for", "points_against", "point_diff", "win_pct", "conference", "division",
+    ]
+    versions = conn.execute("SELECT version, name FROM schema_version").fetchall()
+    assert versions == [(1, "initial"), (2, "user_favorites"), (3, "teams_listing_indexes"),
+                        (4, "table_versions"), (5, "standings"), (6, "teams_sorted_listing_indexes"),
+                        (7, "pending_results")]
+
+
+def test_pending_only(conn):
+    """Test that a second run applies nothing."""
+    apply_migrations(conn)
+    assert apply_migrations(conn) == []
+
+
+def test_keeps_existing_teams(conn):
+    """Test that a database created from the old SQL script keeps its teams and favorites."""
+    conn.executescript("""
+        CREATE TABLE teams (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            team TEXT NOT NULL UNIQUE,
+            nfl_id INTEGER NOT NULL,
+            loc TEXT NOT NULL,
+            games INTEGER DEFAULT 0,
+            wins INTEGER DEFAULT 0,
+            favorite BOOLEAN DEFAULT FALSE
+        );
+        INSERT INTO teams (team, nfl_id, loc, favorite) VALUES ('Cardinals', 22, 'Arizona', TRUE);
+    """)
+
+    apply_migrations(conn)
+
+    assert conn.execute("SELECT team, nfl_id, favorite FROM teams").fetchall() == [("Cardinals", 22, 1)]
+    assert conn.execute("SELECT conference, division FROM teams").fetchall() == [("NFC", "West")]
+    with pytest.raises(sqlite3.IntegrityError):
+        conn.execute("INSERT INTO teams (team, nfl_id, loc) VALUES ('Cards', 22, 'Arizona')")
+
+
+def test_renames_unused_teams_table(conn):
+    """Test that the old teams(team, city, sport, league) table is kept aside, not dropped."""
+    conn.executescript("""
+        CREATE TABLE teams (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            team TEXT UNIQUE NOT NULL,
+            city TEXT NOT NULL,
+            sport TEXT NOT NULL,
+            league TEXT NOT NULL
+        );
+        INSERT INTO teams (team, city, sport, league) VALUES ('Cardinals', 'Arizona', 'football', 'NFL');
+    """)
+
+    apply_migrations(conn)
+
+    assert "nfl_id" in columns(conn, "teams")
+    assert conn.execute("SELECT team, city FROM teams_legacy").fetchall() == [("Cardinals", "Arizona")]
+
+
+def test_favorite_lookups_use_indexes(conn):
+    """Test that favorites toggles and listing no longer scan the teams table."""
+    apply_migrations(conn)
+
+    def plan(query):
+        return " ".join(row[3] for row in conn.execute(f"EXPLAIN QUERY PLAN {query}"))
+
+    assert "idx_teams_nfl_id" in plan("UPDATE teams SET favorite = TRUE WHERE nfl_id = 22")
+    assert "idx_teams_favorite_id" in plan("SELECT id, team, nfl_id, loc FROM teams WHERE favorite = TRUE")
+
+
+def test_user_favorites_use_primary_key(conn):
+    """Test that listing a user's favorites is a range scan over the primary key, with no sort."""
+    apply_migrations(conn)
+
+    plan = " ".join(row[3] for row in conn.execute("""
+        EXPLAIN QUERY PLAN
+        SELECT t.id, t.team, t.nfl_id, t.loc
+        FROM user_favorites f JOIN teams t ON t.id = f.team_id
+        WHERE f.user_id = 7
+        ORDER BY f.team_id
+    """))
+    assert "SEARCH f USING PRIMARY KEY (user_id=?)" in plan
+    assert "TEMP B-TREE" not in plan
+
+
+def test_team_listing_pages_use_indexes(conn):
+    """Test that every sort and filter of the team listing seeks an index past the cursor."""
+    apply_migrations(conn)
+
+    def plan(where, order):
+        query = f"SELECT id, team, nfl_id, loc FROM teams WHERE {where} ORDER BY {order} LIMIT 51"
+        return " ".join(row[3] for row in conn.execute(f"EXPLAIN QUERY PLAN {query}", (1,) * where.count("?")))
+
+    assert "INTEGER PRIMARY KEY (rowid>?)" in plan("id > ?", "id ASC")
+    assert "sqlite_autoindex_teams_1 (team<?)" in plan("team < ?", "team DESC")
+    assert "idx_teams_nfl_id (nfl_id>?)" in plan("nfl_id > ?", "nfl_id ASC")
+    assert "idx_teams_loc (loc=? AND rowid>?)" in plan("loc = ? AND id > ?", "id ASC")
+    for column in ("team", "nfl_id"):
+        for op, order in ((">", "ASC"), ("<", "DESC")):
+            query_plan = plan(f"loc = ? AND {column} {op} ?", f"{column} {order}")
+            assert f"idx_teams_loc_{column} (loc=? AND {column}{op}?)" in query_plan
+            assert "TEMP B-TREE" not in query_plan
+    assert "idx_teams_favorite_id (id>?)" in plan("favorite = TRUE AND id > ?", "id ASC")
+    assert "TEMP B-TREE" not in plan("favorite = TRUE AND id > ?", "id ASC")
+
+
+def test_standings_use_index(conn):
+    """Test that the standings, whole or by division, are read in index order without a sort."""
+    apply_migrations(conn)
+
+    def plan(where):
+        query = f"""
+            SELECT nfl_id, wins FROM teams WHERE {where}
+            ORDER BY conference, division, win_pct DESC, point_diff DESC
+        """
+        return " ".join(row[3] for row in conn.execute(f"EXPLAIN QUERY PLAN {query}"))
+
+    assert "idx_teams_standings" in plan("conference IS NOT NULL")
+    assert "idx_teams_standings (conference=? AND division=?)" in plan("conference = 'AFC' AND division = 'East'")
+    assert "TEMP B-TREE" not in plan("conference IS NOT NULL")
+
+
+def test_teams_writes_bump_version(conn):
+    """Test that every kind of write to teams bumps its table version."""
+    apply_migrations(conn)
+
+    def version():
+        return conn.execute("SELECT version FROM table_versions WHERE name = 'teams'").fetchone()[0]
+
+    conn.execute("INSERT INTO teams (team, nfl_id, loc) VALUES ('Cardinals', 22, 'Arizona')")
+    assert version() == 1
+    conn.execute("UPDATE teams SET favorite = TRUE WHERE nfl_id = 22")
+    assert version() == 2
+    conn.execute("DELETE FROM teams")
+    assert version() == 3
+
+
+def test_failed_migration_applies_nothing(conn, monkeypatch):
+    """Test that pending migrations are applied all together or not at all."""
+    def broken(cursor):
+        cursor.execute("CREATE TABLE half_done (x INTEGER);")
+        raise sqlite3.OperationalError("boom")
+
+    monkeypatch.setattr(migrations, "MIGRATIONS", MIGRATIONS + [(MIGRATIONS[-1][0] + 1, "broken", broken)])
+
+    with pytest.raises(sqlite3.OperationalError):
+        apply_migrations(conn)
+
+    tables = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+    assert "teams" not in tables
+    assert "half_done" not in tables
+
+
+def test_redundant_favorite_index_is_dropped(conn):
+    """Test that the partial favorite index on nfl_id is gone once idx_teams_favorite_id covers listing."""
+    apply_migrations(conn)
+    indexes = [row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'index'")]
+    assert "idx_teams_favorite" not in indexes
+    assert "idx_teams_favorite_id" in indexes
@@ -0,0 +1,110 @@
+import asyncio
+import sqlite3
+import threading
+import time
+
+import pytest
+
+from team_tracker.utils.rate_limiter import (
+    TokenBucket,
+    BACKGROUND,
+    INTERACTIVE,
+    background_priority,
+    current_priority
+)
+
+
+@pytest.fixture
+def state_path(tmp_path):
+    return str(tmp_path / "rate_limit.db")
+
+
+def test_burst_then_refill(state_path):
+    """Test that the burst is served immediately and later calls wait for a refill."""
+    bucket = TokenBucket(rate=20, burst=3, background_reserve=0, state_path=state_path)
+
+    assert all(bucket.acquire() < 0.02 for _ in range(3))
+    assert bucket.acquire() >= 0.03
+
+    stats = bucket.stats()[INTERACTIVE]
+    assert stats["acquired"] == 4
+    assert stats["wait_ms_max"] >= 30
+
+
+def test_state_is_shared_across_processes(state_path):
+    """Test that buckets on the same state file (one per worker process) share a budget."""
+    worker_a = TokenBucket(rate=1, burst=2, background_reserve=0, max_wait=0.1, state_path=state_path)
+    worker_b = TokenBucket(rate=1, burst=2, background_reserve=0, max_wait=0.1, state_path=state_path)
+
+    worker_a.acquire()
+    worker_b.acquire()
+
+    with pytest.raises(RuntimeError, match="rate limit exceeded"):
+        worker_a.acquire()
+    assert worker_a.stats()[INTERACTIVE]["rejected"] == 1
+
+
+def test_background_leaves_reserve(state_path):
+    """Test that background traffic leaves reserved tokens for interactive requests."""
+    bucket = TokenBucket(rate=5, burst=3, background_reserve=2, max_wait=0.05, state_path=state_path)
+
+    bucket.acquire(BACKGROUND)
+    background_waited = []
+    t = threading.Thread(target=lambda: background_waited.append(bucket.acquire(BACKGROUND)))
+    t.start()
+
+    # The two remaining tokens are still available to interactive callers
+    assert bucket.acquire(INTERACTIVE) < 0.05
+    assert bucket.acquire(INTERACTIVE) < 0.05
+    t.join()
+    assert background_waited[0] >= 0.2
+
+
+def test_interactive_preempts_waiting_background(state_path):
+    """Test that a waiting interactive caller is served before background callers."""
+    bucket = TokenBucket(rate=20, burst=1, background_reserve=0, max_wait=1, state_path=state_path)
+    bucket.acquire()
+    order = []
+
+    def call(priority):
+        bucket.acquire(priority)
+        order.append(priority)
+
+    background = [threading.Thread(target=call, args=(BACKGROUND,)) for _ in range(3)]
+    for t in background:
+        t.start()
+    time.sleep(0.01)
+    interactive = threading.Thread(target=call, args=(INTERACTIVE,))
+    interactive.start()
+    for t in background + [interactive]:
+        t.join()
+
+    assert order.index(INTERACTIVE) <= 1
+
+
+def test_acquire_async_does_not_block_the_event_loop(state_path):
+    """Test that waiting on another process's lock on the bucket leaves the event loop running."""
+    bucket = TokenBucket(rate=20, burst=3, background_reserve=0, state_path=state_path)
+    other_process = sqlite3.connect(state_path, isolation_level=None)
+    other_process.execute("BEGIN IMMEDIATE")
+
+    async def main():
+        # Only runs if the loop isn't stuck in SQLite's busy handler
+        asyncio.get_running_loop().call_later(0.2, other_process.execute, "COMMIT")
+        return await bucket.acquire_async()
+
+    assert 0.15 < asyncio.run(main()) < 2
+
+
+def test_background_priority_context():
+    """Test that the background_priority block only tags calls made inside it."""
+    assert current_priority.get() == INTERACTIVE
+    with background_priority():
+        assert current_priority.get() == BACKGROUND
+    assert current_priority.get() == INTERACTIVE
+
+
+def test_disabled(state_path):
+    """Test that a zero rate disables limiting."""
+    bucket = TokenBucket(rate=0, burst=1, state_path=state_path)
+    assert all(bucket.acquire() == 0 for _ in range(100))
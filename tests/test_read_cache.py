@@ -0,0 +1,97 @@
+import sqlite3
+
+import pytest
+
+from team_tracker.utils import sql_utils
+from team_tracker.utils.migrations import apply_migrations
+from team_tracker.utils.read_cache import VersionedReadCache
+
+
+@pytest.fixture
+def db(tmp_path, monkeypatch):
+    path = str(tmp_path / "app.db")
+    monkeypatch.setattr(sql_utils, "DB_PATH", path)
+    conn = sqlite3.connect(path)
+    conn.execute("PRAGMA journal_mode = WAL;")
+    apply_migrations(conn)
+    conn.execute("INSERT INTO teams (team, nfl_id, loc) VALUES ('Cardinals', 22, 'Arizona')")
+    conn.commit()
+    yield conn
+    conn.close()
+
+
+def favorites(conn):
+    return [row[0] for row in conn.execute("SELECT nfl_id FROM teams WHERE favorite = TRUE")]
+
+
+def test_hits_until_the_table_changes(db):
+    """Test that results are reused until a write to the table is committed, from any connection."""
+    cache = VersionedReadCache("teams")
+    calls = []
+
+    def load():
+        calls.append(1)
+        return favorites(db)
+
+    assert cache.get_or_load("favorites", load) == []
+    assert cache.get_or_load("favorites", load) == []
+    assert len(calls) == 1
+
+    # Another connection (e.g. another worker process) commits a write
+    other = sqlite3.connect(sql_utils.DB_PATH)
+    other.execute("UPDATE teams SET favorite = TRUE WHERE nfl_id = 22")
+    other.commit()
+    other.close()
+
+    assert cache.get_or_load("favorites", load) == [22]
+    assert len(calls) == 2
+
+    stats = cache.stats()
+    assert stats["hits"] == 1
+    assert stats["misses"] == 2
+    assert stats["remote_invalidations"] == 1
+
+
+def test_ignores_writes_to_other_tables(db):
+    """Test that commits which don't touch the table keep the cache."""
+    cache = VersionedReadCache("teams")
+    cache.get_or_load("favorites", lambda: favorites(db))
+
+    db.execute("INSERT INTO schedules (nfl_id, synced_at) VALUES (22, 0)")
+    db.commit()
+
+    assert cache.get_or_load("favorites", lambda: pytest.fail("should be cached")) == []
+    assert cache.stats()["version_checks"] == 2
+
+
+def test_local_invalidation(db):
+    """Test that invalidate() drops entries immediately."""
+    cache = VersionedReadCache("teams")
+    cache.get_or_load("favorites", lambda: ["old"])
+    cache.invalidate()
+
+    assert cache.get_or_load("favorites", lambda: ["new"]) == ["new"]
+    assert cache.stats()["local_invalidations"] == 1
+
+
+def test_bypassed_with_uncommitted_writes(db):
+    """Test that a unit of work with uncommitted writes reads around the cache."""
+    cache = VersionedReadCache("teams")
+    cache.get_or_load("favorites", lambda: ["cached"])
+
+    with sql_utils.unit_of_work() as uow:
+        with sql_utils.get_db_connection() as conn:
+            conn.execute("UPDATE teams SET favorite = TRUE WHERE nfl_id = 22")
+        assert uow.in_transaction
+        assert cache.get_or_load("favorites", lambda: ["fresh"]) == ["fresh"]
+    assert cache.stats()["bypassed"] == 1
+
+
+def test_unusable_database_is_not_cached(tmp_path, monkeypatch):
+    """Test that without a readable table_versions every lookup goes to the loader."""
+    monkeypatch.setattr(sql_utils, "DB_PATH", str(tmp_path / "missing.db"))
+    cache = VersionedReadCache("teams")
+
+    assert cache.get_or_load("favorites", lambda: [1]) == [1]
+    assert cache.get_or_load("favorites", lambda: [2]) == [2]
+    assert cache.stats()["version_errors"] == 2
@@ -0,0 +1,166 @@
+import time
+
+import pytest
+
+from team_tracker.utils.disk_cache import DiskCache
+from team_tracker.utils.response_cache import ResponseCache
+
+
+######################################################
+#
+#    Fixtures
+#
+######################################################
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+@pytest.fixture
+def background():
+    """Collect background refreshes so tests can run them explicitly."""
+    pending = []
+    return pending
+
+
+@pytest.fixture
+def cache(clock, background):
+    return ResponseCache(ttls={"schedule": 100, "roster": 10}, max_entries=2,
+                         negative_ttl=5, max_stale=50, clock=clock, background=background.append)
+
+
+######################################################
+#
+#    Hits, misses and eviction
+#
+######################################################
+
+def test_hit_after_miss(cache, mocker):
+    """Test that a second lookup is served from the cache."""
+    loader = mocker.Mock(return_value=["game"])
+
+    assert cache.get_or_load("schedule", 22, loader) == ["game"]
+    assert cache.get_or_load("schedule", 22, loader) == ["game"]
+
+    loader.assert_called_once()
+    stats = cache.stats()
+    assert stats["hits"] == 1
+    assert stats["misses"] == 1
+
+
+def test_lru_eviction(cache, mocker):
+    """Test that the least recently used entry is evicted past max_entries."""
+    cache.get_or_load("schedule", 1, mocker.Mock(return_value=1))
+    cache.get_or_load("schedule", 2, mocker.Mock(return_value=2))
+    cache.get_or_load("schedule", 1, mocker.Mock(return_value=1))  # touch 1 so 2 is oldest
+    cache.get_or_load("schedule", 3, mocker.Mock(return_value=3))
+
+    assert cache.stats()["evictions"] == 1
+    loader = mocker.Mock(return_value=2)
+    cache.get_or_load("schedule", 2, loader)
+    loader.assert_called_once()
+
+
+######################################################
+#
+#    Stale-while-revalidate and negative caching
+#
+######################################################
+
+def test_stale_while_revalidate(cache, clock, background, mocker):
+    """Test that an expired entry is served while one background refresh runs."""
+    cache.get_or_load("roster", 22, mocker.Mock(return_value="old"))
+    clock.now = 15  # past the roster TTL but inside max_stale
+
+    loader = mocker.Mock(return_value="new")
+    assert cache.get_or_load("roster", 22, loader) == "old"
+    assert cache.get_or_load("roster", 22, loader) == "old"
+    assert len(background) == 1, "Only one refresh should be scheduled per key"
+
+    background.pop()()
+    assert cache.get_or_load("roster", 22, loader) == "new"
+    assert cache.stats()["refreshes"] == 1
+
+
+def test_refresh_failure_keeps_stale_value(cache, clock, background, mocker):
+    """Test that a failed refresh keeps serving the stale value."""
+    cache.get_or_load("roster", 22, mocker.Mock(return_value="old"))
+    clock.now = 15
+
+    cache.get_or_load("roster", 22, mocker.Mock(side_effect=RuntimeError("ESPN down")))
+    background.pop()()
+
+    assert cache.get_or_load("roster", 22, mocker.Mock()) == "old"
+    assert cache.stats()["refresh_errors"] == 1
+
+
+def test_negative_caching(cache, clock, mocker):
+    """Test that unknown ids are cached negatively until the negative TTL passes."""
+    loader = mocker.Mock(side_effect=ValueError("ESPN resource not found"))
+
+    with pytest.raises(ValueError):
+        cache.get_or_load("roster", 999, loader)
+    with pytest.raises(ValueError):
+        cache.get_or_load("roster", 999, loader)
+    loader.assert_called_once()
+
+    clock.now = 6
+    with pytest.raises(ValueError):
+        cache.get_or_load("roster", 999, loader)
+    assert loader.call_count == 2
+    assert cache.stats()["negative_hits"] == 1
+
+
+def test_outdated_values_expire_quickly(clock, background, tmp_path, mocker):
+    """Test that a value already past its TTL is kept briefly, not shared, and never served stale."""
+    store = DiskCache(str(tmp_path / "http_cache.db"))
+    cache = ResponseCache(ttls={"schedule": 100}, max_stale=50, clock=clock, background=background.append,
+                          store=store, synced_at=lambda value: value["synced_at"], stale_ttl=5)
+    outdated = {"synced_at": time.time() - 200}
+    loader = mocker.Mock(return_value=outdated)
+
+    assert cache.get_or_load("schedule", 22, loader) == outdated
+    assert cache.get_or_load("schedule", 22, loader) == outdated
+    loader.assert_called_once()
+    assert store.get_projected("schedule", 22) is None
+
+    clock.now = 6
+    fresh = {"synced_at": time.time()}
+    loader.return_value = fresh
+    assert cache.get_or_load("schedule", 22, loader) == fresh
+    assert not background, "An outdated value should be reloaded, not refreshed in the background"
+    assert store.get_projected("schedule", 22) is not None
+    assert cache.stats()["outdated_loads"] == 1
+
+
+######################################################
+#
+#    Disk cache
+#
+######################################################
+
+def test_warm_load_and_shared_misses(clock, tmp_path, mocker):
+    """Test that a restarted cache starts warm and a miss reuses what another worker loaded."""
+    store = DiskCache(str(tmp_path / "http_cache.db"))
+    first = ResponseCache(ttls={"schedule": 100}, clock=clock, store=store)
+    first.get_or_load("schedule", 22, mocker.Mock(return_value={"events": []}))
+
+    restarted = ResponseCache(ttls={"schedule": 100}, clock=clock, store=store)
+    assert restarted.warm_load() == 1
+    loader = mocker.Mock()
+    assert restarted.get_or_load("schedule", 22, loader) == {"events": []}
+    assert restarted.stats()["hits"] == 1
+
+    other = ResponseCache(ttls={"schedule": 100}, clock=clock, store=store)
+    assert other.get_or_load("schedule", 22, loader) == {"events": []}
+    assert other.stats()["disk_hits"] == 1
+    loader.assert_not_called()
@@ -0,0 +1,180 @@
+from contextlib import contextmanager
+import re
+import sqlite3
+import time
+
+import pytest
+
+from team_tracker.models.schedule_model import (
+    save_schedule,
+    get_schedule,
+    save_roster,
+    get_roster,
+    load_schedule,
+    load_roster,
+    sync_schedule,
+    sync_roster
+)
+from team_tracker.utils.circuit_breaker import CircuitOpenError
+
+######################################################
+#
+#    Fixtures
+#
+######################################################
+
+def normalize_whitespace(sql_query: str) -> str:
+    return re.sub(r'\s+', ' ', sql_query).strip()
+
+EVENTS = [{"week": "Week 1", "date": "2024-09-08T17:00Z", "name": "Arizona Cardinals at Buffalo Bills"}]
+ATHLETES = [{"name": "Isaiah Adams", "age": 24, "position": "offense"}]
+
+@pytest.fixture
+def mock_cursor(mocker):
+    mock_conn = mocker.Mock()
+    mock_cursor = mocker.Mock()
+
+    mock_conn.cursor.return_value = mock_cursor
+    mock_cursor.fetchone.return_value = None
+    mock_cursor.fetchall.return_value = []
+    mock_conn.commit.return_value = None
+
+    @contextmanager
+    def mock_get_db_connection(read_only=False):
+        yield mock_conn
+
+    mocker.patch("team_tracker.models.schedule_model.get_db_connection", mock_get_db_connection)
+
+    return mock_cursor
+
+@pytest.fixture
+def mock_client(mocker):
+    client = mocker.Mock()
+    client.schedule.return_value = EVENTS
+    client.roster.return_value = ATHLETES
+    mocker.patch("team_tracker.models.schedule_model.get_espn_client", return_value=client)
+    return client
+
+######################################################
+#
+#    Store
+#
+######################################################
+
+def test_save_schedule(mock_cursor):
+    """Test that a schedule replaces the team's games in one batch."""
+    save_schedule(22, EVENTS)
+
+    queries = [normalize_whitespace(c[0][0]) for c in mock_cursor.execute.call_args_list]
+    assert queries[0].startswith("INSERT INTO schedules (nfl_id, synced_at)")
+    assert queries[1] == "DELETE FROM games WHERE nfl_id = ?"
+
+    insert, rows = mock_cursor.executemany.call_args[0]
+    assert normalize_whitespace(insert) == "INSERT INTO games (nfl_id, week, date, name) VALUES (?, ?, ?, ?)"
+    assert rows == [(22, "Week 1", "2024-09-08T17:00Z", "Arizona Cardinals at Buffalo Bills")]
+
+def test_get_schedule_never_synced(mock_cursor):
+    """Test that an unsynced team returns None."""
+    assert get_schedule(22) is None
+
+def test_get_schedule(mock_cursor):
+    """Test that stored games are returned with the sync time."""
+    mock_cursor.fetchone.return_value = (1700000000.0,)
+    mock_cursor.fetchall.return_value = [("Week 1", "2024-09-08T17:00Z", "Arizona Cardinals at Buffalo Bills")]
+
+    assert get_schedule(22) == {"synced_at": 1700000000.0, "events": EVENTS}
+
+def test_save_and_get_roster(mock_cursor):
+    """Test that a roster is stored and read back as athletes."""
+    save_roster(22, ATHLETES)
+    _, rows = mock_cursor.executemany.call_args[0]
+    assert rows == [(22, "Isaiah Adams", 24, "offense")]
+
+    mock_cursor.fetchone.return_value = (1700000000.0,)
+    mock_cursor.fetchall.return_value = [("Isaiah Adams", 24, "offense")]
+    assert get_roster(22) == {"synced_at": 1700000000.0, "athletes": ATHLETES}
+
+######################################################
+#
+#    Load: local store first, ESPN as a fallback
+#
+######################################################
+
+def test_load_schedule_from_store(mocker, mock_client):
+    """Test that a fresh stored schedule is served without calling ESPN."""
+    stored = {"synced_at": time.time(), "events": EVENTS}
+    mocker.patch("team_tracker.models.schedule_model.get_schedule", return_value=stored)
+
+    assert load_schedule(22, max_age=60) == stored
+    mock_client.schedule.assert_not_called()
+
+def test_load_schedule_syncs_when_missing(mocker, mock_client):
+    """Test that a missing schedule is fetched from ESPN and stored."""
+    synced = {"synced_at": time.time(), "events": EVENTS}
+    mocker.patch("team_tracker.models.schedule_model.get_schedule", side_effect=[None, synced])
+    save = mocker.patch("team_tracker.models.schedule_model.save_schedule")
+
+    assert load_schedule(22, max_age=60) == synced
+    save.assert_called_once_with(22, EVENTS)
+
+def test_load_roster_falls_back_to_stale_store(mocker, mock_client):
+    """Test that a stale stored roster is served when ESPN is down."""
+    stored = {"synced_at": 0.0, "athletes": ATHLETES}
+    mocker.patch("team_tracker.models.schedule_model.get_roster", return_value=stored)
+    mock_client.roster.side_effect = CircuitOpenError("ESPN roster circuit is open")
+
+    assert load_roster(22, max_age=60) == stored
+
+def test_load_roster_without_store_raises(mocker, mock_client):
+    """Test that an ESPN failure is raised when nothing is stored."""
+    mocker.patch("team_tracker.models.schedule_model.get_roster", return_value=None)
+    mock_client.roster.side_effect = RuntimeError("Request to ESPN failed")
+
+    with pytest.raises(RuntimeError):
+        load_roster(22, max_age=60)
+
+def test_load_schedule_unchanged_upstream(mocker, mock_client):
+    """Test that a stale schedule ESPN reports unchanged is served from the store."""
+    synced = {"synced_at": time.time(), "events": EVENTS}
+    mocker.patch("team_tracker.models.schedule_model.get_schedule",
+                 side_effect=[{"synced_at": 0.0, "events": EVENTS}, synced])
+    mocker.patch("team_tracker.models.schedule_model.mark_schedule_synced", return_value=True)
+    mock_client.schedule.return_value = None
+
+    assert load_schedule(22, max_age=60) == synced
+
+######################################################
+#
+#    Sync
+#
+######################################################
+
+def test_sync_schedule_unchanged_skips_writes(mocker, mock_cursor, mock_client):
+    """Test that an unchanged schedule only bumps the sync time."""
+    mock_client.schedule.return_value = None
+    mock_cursor.rowcount = 1
+
+    assert sync_schedule(22) is None
+
+    mock_client.schedule.assert_called_once_with(22, only_if_changed=True)
+    query = normalize_whitespace(mock_cursor.execute.call_args[0][0])
+    assert query == "UPDATE schedules SET synced_at = ? WHERE nfl_id = ?"
+    mock_cursor.executemany.assert_not_called()
+
+def test_sync_roster_unchanged_without_local_copy(mocker, mock_cursor, mock_client):
+    """Test that an unchanged roster with nothing stored is fetched in full."""
+    mock_client.roster.side_effect = [None, ATHLETES]
+    mock_cursor.rowcount = 0
+
+    assert sync_roster(22) == ATHLETES
+    _, rows = mock_cursor.executemany.call_args[0]
+    assert rows == [(22, "Isaiah Adams", 24, "offense")]
+
+def test_sync_schedule_forgets_validators_when_save_fails(mocker, mock_client):
+    """Test that a schedule that failed to save is fetched again, not reported unchanged."""
+    mocker.patch("team_tracker.models.schedule_model.save_schedule_and_results",
+                 side_effect=sqlite3.OperationalError("database is locked"))
+
+    with pytest.raises(sqlite3.OperationalError):
+        sync_schedule(22)
+    mock_client.forget_schedule.assert_called_once_with(22)
@@ -0,0 +1,121 @@
+import time
+
+import pytest
+
+from team_tracker.utils.scheduler import TeamRefresher
+
+
+@pytest.fixture
+def refreshed():
+    return []
+
+
+@pytest.fixture
+def lock_path(tmp_path):
+    return str(tmp_path / "refresher.lock")
+
+
+@pytest.fixture
+def refresher(refreshed, lock_path):
+    def roster(nfl_id):
+        if nfl_id == 3:
+            raise RuntimeError("Request to ESPN failed")
+        refreshed.append(("roster", nfl_id))
+
+    return TeamRefresher(
+        team_ids=lambda: [1, 2, 3],
+        jobs={"schedule": lambda nfl_id: refreshed.append(("schedule", nfl_id)), "roster": roster},
+        intervals={"schedule": 60, "roster": 60},
+        jitter=0.1,
+        max_workers=2,
+        lock_path=lock_path,
+    )
+
+
+def wait_for(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return condition()
+
+
+def test_run_once_refreshes_every_team(refresher, refreshed):
+    """Test that one cycle refreshes the job for every team in the table."""
+    refresher.run_once("schedule")
+
+    assert sorted(refreshed) == [("schedule", 1), ("schedule", 2), ("schedule", 3)]
+    status = refresher.status()["jobs"]["schedule"]
+    assert status["last_cycle"]["teams"] == 3
+    assert status["last_cycle"]["errors"] == 0
+    assert status["teams"]["1"]["last_error"] is None
+    assert status["teams"]["1"]["last_refresh"] is not None
+
+
+def test_run_once_records_errors_per_team(refresher):
+    """Test that a failing team is reported without stopping the others."""
+    refresher.run_once("roster")
+
+    status = refresher.status()["jobs"]["roster"]
+    assert status["last_cycle"]["errors"] == 1
+    assert status["teams"]["3"]["last_error"] == "Request to ESPN failed"
+    assert status["teams"]["3"]["last_refresh"] is None
+    assert status["teams"]["2"]["last_error"] is None
+
+
+def test_team_listing_failure(refreshed):
+    """Test that a failure to list teams is recorded for the cycle."""
+    def team_ids():
+        raise RuntimeError("no such table: teams")
+
+    refresher = TeamRefresher(team_ids, {"schedule": refreshed.append}, {"schedule": 60})
+    refresher.run_once("schedule")
+
+    assert refresher.status()["jobs"]["schedule"]["last_cycle"]["error"] == "no such table: teams"
+    assert refreshed == []
+
+
+def test_start_warms_immediately(refresher, refreshed):
+    """Test that starting the refresher runs every job right away."""
+    refresher.start()
+    wait_for(lambda: len(refreshed) >= 5)
+    refresher.stop(timeout=5)
+
+    assert len(refreshed) == 5
+    assert refresher.status()["running"] is False
+
+
+def test_jitter_bounds(refresher):
+    """Test that the jittered delay stays within the configured fraction."""
+    delays = [refresher._next_delay("schedule") for _ in range(100)]
+    assert all(54 <= d <= 66 for d in delays)
+
+
+def test_only_one_process_refreshes(refresher, refreshed, lock_path):
+    """Test that a second refresher on the same lock stands by until the first one stops."""
+    standby_runs = []
+    standby = TeamRefresher(lambda: [1], {"schedule": standby_runs.append}, {"schedule": 60},
+                            lock_path=lock_path, new_teams_interval=0.05)
+    refresher.start()
+    assert wait_for(lambda: refresher.status()["leader"])
+    standby.start()
+    time.sleep(0.2)
+    assert standby_runs == [] and not standby.status()["leader"]
+
+    refresher.stop(timeout=5)
+    assert wait_for(lambda: standby_runs == [1])
+    standby.stop(timeout=5)
+
+
+def test_wake_refreshes_new_teams(refreshed, lock_path):
+    """Test that teams stored after a cycle are refreshed on wake(), without redoing the others."""
+    teams = [1]
+    refresher = TeamRefresher(lambda: list(teams), {"schedule": refreshed.append}, {"schedule": 60},
+                              lock_path=lock_path, new_teams_interval=60)
+    refresher.start()
+    assert wait_for(lambda: refreshed == [1])
+
+    teams.append(2)
+    refresher.wake()
+    assert wait_for(lambda: refreshed == [1, 2])
+    refresher.stop(timeout=5)
+    assert refresher.status()["jobs"]["schedule"]["last_cycle"]["teams"] == 1
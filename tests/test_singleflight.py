@@ -0,0 +1,105 @@
+import asyncio
+import threading
+
+import pytest
+
+from team_tracker.utils.singleflight import AsyncSingleFlight, SingleFlight
+
+
+def _run_concurrently(n, target):
+    threads = [threading.Thread(target=target) for _ in range(n)]
+    for t in threads:
+        t.start()
+    return threads
+
+
+def test_concurrent_calls_share_one_execution():
+    """Test that concurrent callers for the same key wait on a single call."""
+    flight = SingleFlight()
+    release = threading.Event()
+    calls = []
+    results = []
+
+    def fetch():
+        calls.append(1)
+        release.wait(timeout=5)
+        return {"athletes": []}
+
+    threads = _run_concurrently(10, lambda: results.append(flight.do("roster/22", fetch)))
+    while flight.stats()["shared"] < 9:
+        pass
+    release.set()
+    for t in threads:
+        t.join()
+
+    assert len(calls) == 1
+    assert len(results) == 10
+    assert all(r is results[0] for r in results), "All callers should share the same parsed result"
+    assert flight.stats() == {"executions": 1, "shared": 9, "in_flight": 0}
+
+
+def test_failure_is_shared():
+    """Test that waiting callers receive the in-flight call's exception."""
+    flight = SingleFlight()
+    release = threading.Event()
+    errors = []
+
+    def fetch():
+        release.wait(timeout=5)
+        raise RuntimeError("Request to ESPN failed")
+
+    def call():
+        try:
+            flight.do("roster/22", fetch)
+        except RuntimeError as e:
+            errors.append(e)
+
+    threads = _run_concurrently(5, call)
+    while flight.stats()["shared"] < 4:
+        pass
+    release.set()
+    for t in threads:
+        t.join()
+
+    assert len(errors) == 5
+
+
+def test_sequential_calls_are_not_coalesced():
+    """Test that a finished call is not reused by later callers."""
+    flight = SingleFlight()
+
+    assert flight.do("teams", lambda: 1) == 1
+    assert flight.do("teams", lambda: 2) == 2
+
+    def fail():
+        raise ValueError("ESPN resource not found")
+
+    with pytest.raises(ValueError):
+        flight.do("teams", fail)
+    assert flight.stats()["executions"] == 3
+
+
+def test_async_concurrent_calls_share_one_execution():
+    """Test that coroutines awaiting the same key share one execution and its errors."""
+    flight = AsyncSingleFlight()
+    calls = []
+
+    async def fetch():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return {"teams": []}
+
+    async def fail():
+        await asyncio.sleep(0.01)
+        raise RuntimeError("ESPN unavailable")
+
+    async def main():
+        results = await asyncio.gather(*(flight.do("teams", fetch) for _ in range(5)))
+        errors = await asyncio.gather(*(flight.do("roster/22", fail) for _ in range(3)), return_exceptions=True)
+        return results, errors
+
+    results, errors = asyncio.run(main())
+    assert results == [{"teams": []}] * 5
+    assert len(calls) == 1
+    assert all(isinstance(e, RuntimeError) for e in errors)
+    assert flight.stats() == {"executions": 2, "shared": 6, "in_flight": 0}
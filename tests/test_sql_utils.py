@@ -0,0 +1,344 @@
+import sqlite3
+import threading
+
+import pytest
+
+from team_tracker.utils import sql_utils
+from team_tracker.utils.sql_utils import ConnectionPool, get_db_connection
+
+
+@pytest.fixture
+def pool(tmp_path):
+    pool = ConnectionPool(str(tmp_path / "pool.db"), size=2, timeout=0.1)
+    yield pool
+    pool.close()
+
+
+def test_connections_are_reused(pool):
+    """Test that a released connection is handed out again instead of reopened."""
+    conn = pool.acquire()
+    pool.release(conn)
+
+    assert pool.acquire() is conn
+    assert pool.stats()["created"] == 1
+    assert pool.stats()["checkouts"] == 2
+
+
+def test_pragma_profile(pool):
+    """Test that new connections get the PRAGMA profile."""
+    conn = pool.acquire()
+
+    assert conn.execute("PRAGMA journal_mode;").fetchone()[0] == "wal"
+    assert conn.execute("PRAGMA synchronous;").fetchone()[0] == 1  # NORMAL
+    assert conn.execute("PRAGMA busy_timeout;").fetchone()[0] == sql_utils.DB_PRAGMAS["busy_timeout"]
+    assert conn.execute("PRAGMA temp_store;").fetchone()[0] == 2  # MEMORY
+
+
+def test_invalid_connection_is_replaced(pool):
+    """Test that a connection failing validation on checkout is discarded."""
+    conn = pool.acquire()
+    pool.release(conn)
+    conn.close()
+
+    replacement = pool.acquire()
+    assert replacement is not conn
+    assert replacement.execute("SELECT 1;").fetchone() == (1,)
+    assert pool.stats()["invalidated"] == 1
+
+
+def test_uncommitted_transaction_is_rolled_back(pool):
+    """Test that a write left uncommitted does not leak into the next checkout."""
+    conn = pool.acquire()
+    conn.execute("CREATE TABLE t (x INTEGER);")
+    conn.execute("INSERT INTO t VALUES (1);")
+    pool.release(conn)
+
+    conn = pool.acquire()
+    assert conn.execute("SELECT COUNT(*) FROM t;").fetchone()[0] == 0
+    assert pool.stats()["rollbacks"] == 1
+
+
+def test_exhausted_pool_waits_then_fails(pool):
+    """Test that callers wait for a free connection and give up after the timeout."""
+    first, second = pool.acquire(), pool.acquire()
+
+    with pytest.raises(sqlite3.OperationalError, match="No database connection available"):
+        pool.acquire()
+
+    threading.Timer(0.02, pool.release, args=(first,)).start()
+    assert pool.acquire() is first
+    assert pool.stats()["waits"] == 1
+    assert pool.stats()["in_use"] == 2
+
+
+def test_get_db_connection_uses_pool(tmp_path, monkeypatch):
+    """Test that the context manager returns connections to the pool instead of closing them."""
+    monkeypatch.setattr(sql_utils, "DB_PATH", str(tmp_path / "app.db"))
+
+    with get_db_connection() as conn:
+        conn.execute("SELECT 1;")
+    with get_db_connection() as again:
+        assert again is conn
+
+    stats = sql_utils.get_pool().stats()
+    assert stats["created"] == 1
+    assert stats["idle"] == 1
+
+
+def test_unit_of_work_shares_one_transaction(tmp_path, monkeypatch):
+    """Test that model calls in a unit of work share a connection and commit once at the end."""
+    monkeypatch.setattr(sql_utils, "DB_PATH", str(tmp_path / "app.db"))
+    with get_db_connection() as conn:
+        conn.execute("CREATE TABLE t (x INTEGER);")
+
+    with sql_utils.unit_of_work():
+        with get_db_connection() as first:
+            first.execute("INSERT INTO t VALUES (1);")
+            first.commit()  # deferred to the end of the unit of work
+        with get_db_connection() as second:
+            assert second.in_transaction
+            second.execute("INSERT INTO t VALUES (2);")
+        assert sql_utils.get_pool().stats()["in_use"] == 1
+
+    with get_db_connection() as conn:
+        assert conn.execute("SELECT COUNT(*) FROM t;").fetchone()[0] == 2
+
+
+def test_unit_of_work_rolls_back_on_error(tmp_path, monkeypatch):
+    """Test that a failing unit of work discards every write made in it."""
+    monkeypatch.setattr(sql_utils, "DB_PATH", str(tmp_path / "app.db"))
+    with get_db_connection() as conn:
+        conn.execute("CREATE TABLE t (x INTEGER);")
+
+    with pytest.raises(RuntimeError):
+        with sql_utils.unit_of_work():
+            with get_db_connection() as conn:
+                conn.execute("INSERT INTO t VALUES (1);")
+            raise RuntimeError("request failed")
+
+    with get_db_connection() as conn:
+        assert conn.execute("SELECT COUNT(*) FROM t;").fetchone()[0] == 0
+    assert sql_utils.current_unit_of_work() is None
+
+
+def test_nested_unit_of_work_joins_the_outer_one(tmp_path, monkeypatch):
+    """Test that a nested unit of work shares the outer transaction, and a failure in it rolls back both."""
+    monkeypatch.setattr(sql_utils, "DB_PATH", str(tmp_path / "app.db"))
+    with get_db_connection() as conn:
+        conn.execute("CREATE TABLE t (x INTEGER);")
+
+    with sql_utils.unit_of_work() as outer:
+        with get_db_connection() as conn:
+            conn.execute("INSERT INTO t VALUES (1);")
+        with pytest.raises(RuntimeError):
+            with sql_utils.unit_of_work() as inner:
+                assert inner is outer
+                raise RuntimeError("save failed")
+
+    with get_db_connection() as conn:
+        assert conn.execute("SELECT COUNT(*) FROM t;").fetchone()[0] == 0
+
+
+def test_outside_unit_of_work_releases_its_connection(tmp_path, monkeypatch):
+    """Test that a block outside the unit of work neither holds nor joins its connection."""
+    monkeypatch.setattr(sql_utils, "DB_PATH", str(tmp_path / "app.db"))
+    with get_db_connection() as conn:
+        conn.execute("CREATE TABLE t (x INTEGER);")
+
+    with sql_utils.unit_of_work():
+        with get_db_connection() as conn:
+            conn.execute("SELECT COUNT(*) FROM t;")
+        with sql_utils.outside_unit_of_work():
+            assert sql_utils.get_pool().stats()["in_use"] == 0
+            with get_db_connection() as conn:
+                conn.execute("INSERT INTO t VALUES (1);")
+                conn.commit()
+        with get_db_connection() as conn:
+            conn.execute("INSERT INTO t VALUES (2);")
+            # Uncommitted writes would leave the block's connections waiting on the lock
+            with pytest.raises(RuntimeError):
+                with sql_utils.outside_unit_of_work():
+                    pass
+
+    with get_db_connection() as conn:
+        assert conn.execute("SELECT COUNT(*) FROM t;").fetchone()[0] == 2
+
+
+def test_read_pool_is_read_only(tmp_path):
+    """Test that read pool connections cannot write."""
+    path = str(tmp_path / "app.db")
+    writer = ConnectionPool(path, size=1)
+    with_table = writer.acquire()
+    with_table.execute("CREATE TABLE t (x INTEGER);")
+    writer.release(with_table)
+
+    readers = ConnectionPool(path, size=2, read_only=True)
+    conn = readers.acquire()
+    assert conn.execute("PRAGMA query_only;").fetchone()[0] == 1
+    with pytest.raises(sqlite3.OperationalError, match="readonly"):
+        conn.execute("INSERT INTO t VALUES (1);")
+
+
+def test_readers_do_not_wait_on_writer(tmp_path):
+    """Test that under WAL a reader sees committed data while a write transaction is open."""
+    path = str(tmp_path / "app.db")
+    writer = ConnectionPool(path, size=1, timeout=0.1)
+    conn = writer.acquire()
+    conn.execute("CREATE TABLE t (x INTEGER);")
+    conn.execute("INSERT INTO t VALUES (1);")
+    conn.commit()
+    conn.execute("BEGIN IMMEDIATE")
+    conn.execute("INSERT INTO t VALUES (2);")
+
+    readers = ConnectionPool(path, size=1, read_only=True, pragmas=dict(sql_utils.DB_PRAGMAS, busy_timeout=0))
+    assert readers.acquire().execute("SELECT COUNT(*) FROM t;").fetchone()[0] == 1
+
+
+def test_read_only_unit_of_work_uses_read_pool(tmp_path, monkeypatch):
+    """Test that a read-only unit of work (a GET request) is served from the read pool."""
+    monkeypatch.setattr(sql_utils, "DB_PATH", str(tmp_path / "app.db"))
+    with get_db_connection() as conn:
+        conn.execute("CREATE TABLE t (x INTEGER);")
+
+    with sql_utils.unit_of_work(read_only=True):
+        with get_db_connection() as conn:
+            assert conn.execute("PRAGMA query_only;").fetchone()[0] == 1
+
+    assert sql_utils.get_read_pool().stats()["checkouts"] == 1
+
+
+def test_reads_outside_unit_of_work_leave_write_pool_alone(tmp_path, monkeypatch):
+    """Test that read_only callers use the read pool, unless a unit of work holds their writes."""
+    monkeypatch.setattr(sql_utils, "DB_PATH", str(tmp_path / "app.db"))
+    with get_db_connection() as conn:
+        conn.execute("CREATE TABLE t (x INTEGER);")
+
+    with get_db_connection(read_only=True) as conn:
+        assert conn.execute("PRAGMA query_only;").fetchone()[0] == 1
+    assert sql_utils.get_pool().stats()["checkouts"] == 1
+
+    with sql_utils.unit_of_work():
+        with get_db_connection() as conn:
+            conn.execute("INSERT INTO t VALUES (1);")
+        with get_db_connection(read_only=True) as conn:
+            assert conn.execute("SELECT COUNT(*) FROM t;").fetchone()[0] == 1
+
+
+@pytest.fixture
+def live_db(tmp_path, monkeypatch):
+    monkeypatch.setattr(sql_utils, "DB_PATH", str(tmp_path / "live.db"))
+    conn = sqlite3.connect(sql_utils.DB_PATH)
+    conn.execute("PRAGMA journal_mode = WAL;")
+    conn.execute("CREATE TABLE t (x INTEGER);")
+    conn.executemany("INSERT INTO t VALUES (?);", [(i,) for i in range(1000)])
+    conn.commit()
+    yield conn
+    conn.close()
+
+
+@pytest.mark.parametrize("compress", [True, False])
+def test_backup_and_restore(live_db, tmp_path, compress):
+    """Test that a backup taken in steps restores the database as it was."""
+    backup = sql_utils.backup_database(str(tmp_path / "backups"), compress=compress, pages=2, sleep_ms=0)
+    assert backup["path"].endswith(".db.gz" if compress else ".db")
+    assert backup["steps"] > 1
+    assert backup["pages_per_s"] > 0
+
+    live_db.execute("DELETE FROM t;")
+    live_db.commit()
+
+    sql_utils.restore_database(backup["path"])
+    assert live_db.execute("SELECT COUNT(*) FROM t;").fetchone()[0] == 1000
+
+
+def test_backup_does_not_block_writers(live_db, tmp_path):
+    """Test that writes commit while a slow, stepped backup is in progress."""
+    done = threading.Event()
+    backup = threading.Thread(target=lambda: (
+        sql_utils.backup_database(str(tmp_path / "backups"), pages=1, sleep_ms=20), done.set()))
+    backup.start()
+
+    writer = sqlite3.connect(sql_utils.DB_PATH, timeout=0.05)
+    writer.execute("INSERT INTO t VALUES (-1);")
+    writer.commit()
+    assert not done.is_set()
+    writer.close()
+    backup.join()
+
+
+def test_restore_rejects_missing_backup(live_db, tmp_path):
+    """Test that restoring from a missing file leaves the database alone."""
+    with pytest.raises(FileNotFoundError):
+        sql_utils.restore_database(str(tmp_path / "nope.db"))
+    assert live_db.execute("SELECT COUNT(*) FROM t;").fetchone()[0] == 1000
+
+
+def test_scheduler_prunes_and_skips(live_db, tmp_path):
+    """Test that scheduled backups keep only the newest ones and skip when one is recent."""
+    scheduler = sql_utils.BackupScheduler(interval=3600, keep=2, directory=str(tmp_path / "backups"))
+    for _ in range(3):
+        assert scheduler.run_once(force=True) is not None
+    assert scheduler.run_once() is None
+
+    assert len(sql_utils.list_backups(str(tmp_path / "backups"))) == 2
+    stats = scheduler.stats()
+    assert (stats["backups"], stats["pruned"], stats["skipped"]) == (3, 1, 1)
+    assert stats["last"]["pages"] > 0
+
+
+def test_normalize_sql():
+    """Test that statements differing only in literals, whitespace or IN list length share a key."""
+    assert sql_utils.normalize_sql("SELECT *\n  FROM t WHERE a = 'x''y' AND b IN (?,?, ?) LIMIT 51;") == \
+        "SELECT * FROM t WHERE a = ? AND b IN (?, ...) LIMIT ?"
+    assert sql_utils.normalize_sql("SELECT * FROM t WHERE b IN (?, ?)") == \
+        sql_utils.normalize_sql("SELECT * FROM t WHERE b IN (?, ?, ?, ?)")
+
+
+@pytest.fixture
+def tracer(monkeypatch):
+    tracer = sql_utils.SqlTracer(enabled=True, sample_rate=1.0, slow_ms=1000, explain=True)
+    monkeypatch.setattr(sql_utils, "sql_tracer", tracer)
+    return tracer
+
+
+def _traced_query(pool):
+    conn = pool.acquire()
+    try:
+        conn.execute("CREATE TABLE IF NOT EXISTS t (x INTEGER PRIMARY KEY);")
+        conn.executemany("INSERT OR IGNORE INTO t VALUES (?);", [(1,), (2,), (3,)])
+        cursor = conn.cursor()
+        cursor.execute("SELECT x FROM t WHERE x > ?;", (1,))
+        return cursor.fetchall()
+    finally:
+        pool.release(conn)
+
+
+def test_statements_are_traced(pool, tracer):
+    """Test that statements on pooled connections are aggregated with rows, histogram and caller."""
+    assert _traced_query(pool) == [(2,), (3,)]
+
+    stats = {s["sql"]: s for s in tracer.stats()["statements"]}
+    select = stats["SELECT x FROM t WHERE x > ?"]
+    assert (select["count"], select["rows"]) == (1, 2)
+    assert sum(select["histogram"].values()) == 1
+    assert list(select["callers"]) == [f"{__name__}._traced_query"]
+    assert stats["INSERT OR IGNORE INTO t VALUES (?)"]["rows"] == 3
+    # The pool's PRAGMAs and checkout validation are not traced
+    assert not any(sql.startswith(("PRAGMA", "SELECT ?")) for sql in stats)
+
+
+def test_slow_queries_are_logged_with_plan(pool, tracer):
+    """Test that statements over the threshold are logged once with their query plan."""
+    tracer.slow_ms = 0
+    _traced_query(pool)
+
+    slow = [entry for entry in tracer.stats()["slow"] if entry["sql"] == "SELECT x FROM t WHERE x > ?"]
+    assert len(slow) == 1
+    assert "SEARCH t USING INTEGER PRIMARY KEY (rowid>?)" in slow[0]["plan"]
+
+
+def test_unsampled_statements_are_not_recorded(pool, tracer):
+    """Test that a zero sample rate records nothing."""
+    tracer.sample_rate = 0.0
+    _traced_query(pool)
+    assert tracer.stats()["distinct_statements"] == 0
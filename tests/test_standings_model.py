@@ -0,0 +1,162 @@
+import sqlite3
+
+import pytest
+
+from team_tracker.models.locker_model import bulk_upsert_teams
+from team_tracker.models.schedule_model import save_schedule_and_results
+from team_tracker.models.standings_model import (
+    get_standings,
+    rebuild_standings,
+    record_pending_results,
+    record_results
+)
+from team_tracker.utils import sql_utils
+from team_tracker.utils.migrations import apply_migrations
+
+######################################################
+#
+#    Fixtures
+#
+######################################################
+
+# Bills (AFC East), Dolphins (AFC East), Chiefs (AFC West), Cardinals (NFC West)
+TEAMS = [("Bills", 2, "Buffalo"), ("Dolphins", 15, "Miami"), ("Chiefs", 12, "Kansas City"),
+         ("Cardinals", 22, "Arizona")]
+
+
+def game(event_id, home_id, away_id, home_score, away_score, week=1):
+    return {"event_id": event_id, "week": week, "home_id": home_id, "away_id": away_id,
+            "home_score": home_score, "away_score": away_score}
+
+
+@pytest.fixture
+def db(tmp_path, monkeypatch):
+    path = str(tmp_path / "app.db")
+    monkeypatch.setattr(sql_utils, "DB_PATH", path)
+    conn = sqlite3.connect(path)
+    conn.execute("PRAGMA journal_mode = WAL;")
+    apply_migrations(conn)
+    bulk_upsert_teams([{"team": team, "nfl_id": nfl_id, "loc": loc} for team, nfl_id, loc in TEAMS])
+    yield conn
+    conn.close()
+
+
+def standing(nfl_id):
+    return next(team for team in get_standings() if team["nfl_id"] == nfl_id)
+
+######################################################
+#
+#    Recording results
+#
+######################################################
+
+def test_records_and_splits(db):
+    """Test that a result updates both teams' records, including division and conference splits."""
+    counts = record_results([game("1", 2, 15, 24, 17), game("2", 12, 22, 10, 10)])
+    assert counts == {"new": 2, "corrected": 0, "unchanged": 0, "skipped": 0}
+
+    bills = standing(2)
+    assert (bills["games"], bills["wins"], bills["losses"], bills["ties"]) == (1, 1, 0, 0)
+    assert bills["division_record"] == {"wins": 1, "losses": 0, "ties": 0}
+    assert bills["conference_record"] == {"wins": 1, "losses": 0, "ties": 0}
+    assert (bills["points_for"], bills["points_against"], bills["point_diff"]) == (24, 17, 7)
+    assert bills["win_pct"] == 1.0
+
+    chiefs = standing(12)
+    assert chiefs["ties"] == 1
+    assert chiefs["win_pct"] == 0.5
+    # Cardinals are NFC, so neither split counts an interconference game
+    assert chiefs["conference_record"] == {"wins": 0, "losses": 0, "ties": 0}
+
+
+def test_repeated_results_are_unchanged(db):
+    """Test that a game seen again, e.g. in the opponent's schedule, is only counted once."""
+    record_results([game("1", 2, 15, 24, 17)])
+    counts = record_results([game("1", 2, 15, 24, 17)])
+
+    assert counts["unchanged"] == 1
+    assert standing(2)["games"] == 1
+
+
+def test_score_corrections_apply_the_difference(db):
+    """Test that a corrected score replaces the recorded one rather than adding a game."""
+    record_results([game("1", 2, 15, 24, 17)])
+    counts = record_results([game("1", 2, 15, 17, 24)])
+    assert counts["corrected"] == 1
+
+    bills, dolphins = standing(2), standing(15)
+    assert (bills["games"], bills["wins"], bills["losses"], bills["point_diff"]) == (1, 0, 1, -7)
+    assert (dolphins["wins"], dolphins["division_record"]["wins"]) == (1, 1)
+
+
+def test_unknown_teams_are_skipped(db):
+    """Test that a game against a team that isn't stored yet is kept pending."""
+    counts = record_results([game("1", 2, 33, 24, 17)])
+
+    assert counts["skipped"] == 1
+    assert standing(2)["games"] == 0
+    assert db.execute("SELECT COUNT(*) FROM game_results").fetchone()[0] == 0
+    assert db.execute("SELECT COUNT(*) FROM pending_results").fetchone()[0] == 1
+
+
+def test_pending_results_recorded_once_teams_are_stored(db):
+    """Test that a pending game is recorded once its team is stored, without another schedule sync."""
+    record_results([game("1", 2, 33, 24, 17), game("2", 15, 34, 10, 13)])
+    bulk_upsert_teams([{"team": "Ravens", "nfl_id": 33, "loc": "Baltimore"}])
+
+    counts = record_pending_results()
+
+    assert counts == {"new": 1, "corrected": 0, "unchanged": 0, "skipped": 0}
+    assert (standing(2)["wins"], standing(33)["losses"]) == (1, 1)
+    # The Texans aren't stored yet, so their game stays pending
+    assert db.execute("SELECT event_id FROM pending_results").fetchall() == [("2",)]
+
+
+def test_incremental_matches_rebuild(db):
+    """Test that records kept incrementally equal a recount from game_results."""
+    record_results([game("1", 2, 15, 24, 17), game("2", 12, 22, 31, 3)])
+    record_results([game("3", 15, 12, 20, 20, week=2), game("1", 2, 15, 21, 27)])
+    incremental = get_standings()
+
+    rebuild_standings()
+
+    assert get_standings() == incremental
+
+def test_schedule_and_results_commit_together(db, mocker):
+    """Test that a schedule whose results fail to record is not stored either."""
+    events = [{"week": "Week 1", "date": "2024-09-08T17:00Z", "name": "Miami Dolphins at Buffalo Bills",
+               "result": game("1", 2, 15, 24, 17)}]
+    mocker.patch("team_tracker.models.schedule_model.record_results",
+                 side_effect=sqlite3.OperationalError("database is locked"))
+
+    with pytest.raises(sqlite3.OperationalError):
+        save_schedule_and_results(2, events)
+    assert db.execute("SELECT COUNT(*) FROM games").fetchone()[0] == 0
+
+    mocker.stopall()
+    save_schedule_and_results(2, events)
+    assert db.execute("SELECT COUNT(*) FROM games").fetchone()[0] == 1
+    assert standing(2)["wins"] == 1
+
+######################################################
+#
+#    Reading the standings
+#
+######################################################
+
+def test_teams_listed_before_playing(db):
+    """Test that every stored team is in the standings at 0-0 before any game is recorded."""
+    assert [(t["nfl_id"], t["games"], t["win_pct"]) for t in get_standings()] == [
+        (2, 0, 0), (15, 0, 0), (12, 0, 0), (22, 0, 0)]
+
+
+def test_order_and_filters(db):
+    """Test that standings are ordered within each division and can be filtered."""
+    record_results([game("1", 15, 2, 30, 3), game("2", 12, 22, 31, 3)])
+
+    assert [(t["conference"], t["division"], t["nfl_id"]) for t in get_standings()] == [
+        ("AFC", "East", 15), ("AFC", "East", 2), ("AFC", "West", 12), ("NFC", "West", 22)]
+    assert [t["nfl_id"] for t in get_standings(conference="AFC", division="East")] == [15, 2]
+
+    with pytest.raises(ValueError):
+        get_standings(conference="XFL")
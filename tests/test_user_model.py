@@ -7,8 +7,12 @@ from team_tracker.models.user_model import (
     hash_password,
     create_user,
     verify_user,
-    update_password
+    update_password,
+    get_user_id,
+    issue_token,
+    verify_token
 )
+from team_tracker.models import user_model
 
 @pytest.fixture
 def user_data():
@@ -108,4 +112,60 @@ def test_update_password_wrong_old_password(user_data, mock_db):
         "wrongoldpassword",
         "newpassword123"
     )
-    assert result is False
\ No newline at end of file
+    assert result is False
+
+
+def test_update_password_single_transaction(user_data, mock_db):
+    """Test that the password is verified and updated in one write transaction."""
+    mock_conn, mock_cursor = mock_db
+    mock_conn.in_transaction = False
+    test_hash = hash_password(user_data['password'], user_data['salt'])
+    mock_cursor.fetchone.return_value = (test_hash, user_data['salt'])
+
+    result = update_password(user_data['username'], user_data['password'], "newpassword123")
+    assert result is True
+
+    mock_conn.execute.assert_called_once_with("BEGIN IMMEDIATE")
+    queries = [c[0][0] for c in mock_cursor.execute.call_args_list]
+    assert "SELECT password_hash, salt FROM users" in queries[0]
+    assert "UPDATE users" in queries[1]
+    mock_conn.commit.assert_called_once()
+
+def test_get_user_id(mock_db):
+    """Test looking up a user's id, and an unknown user."""
+    mock_conn, mock_cursor = mock_db
+    mock_cursor.fetchone.return_value = (7,)
+    assert get_user_id("testuser") == 7
+    mock_cursor.execute.assert_called_once_with("SELECT id FROM users WHERE username = ?", ("testuser",))
+
+    mock_cursor.fetchone.return_value = None
+    with pytest.raises(ValueError, match="User 'nobody' not found"):
+        get_user_id("nobody")
+
+def test_login_tokens(monkeypatch):
+    """Test that a login token names its user until it expires, and can't be forged."""
+    monkeypatch.setattr(user_model, "AUTH_SECRET", "test-secret")
+    token = issue_token("test.user")
+    assert verify_token(token) == "test.user"
+
+    encoded, expires, signature = token.split(".")
+    other = issue_token("other").split(".")[0]
+    assert verify_token(f"{other}.{expires}.{signature}") is None
+    assert verify_token("not a token") is None
+
+    monkeypatch.setattr(user_model, "AUTH_SECRET", "another-secret")
+    assert verify_token(token) is None
+
+    monkeypatch.setattr(user_model, "AUTH_TOKEN_TTL", -1)
+    assert verify_token(issue_token("test.user")) is None
+
+def test_auth_secret_file_is_shared(tmp_path, monkeypatch):
+    """Test that without AUTH_SECRET, every worker signs with the key kept in AUTH_SECRET_PATH."""
+    monkeypatch.setattr(user_model, "AUTH_SECRET", "")
+    monkeypatch.setattr(user_model, "AUTH_SECRET_PATH", str(tmp_path / "auth_secret"))
+    monkeypatch.setattr(user_model, "_file_secret", None)
+    token = issue_token("testuser")
+
+    monkeypatch.setattr(user_model, "_file_secret", None)  # as in another worker
+    assert verify_token(token) == "testuser"
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["auth_secret"]
@@ -0,0 +1,105 @@
+import threading
+import time
+
+import pytest
+
+from team_tracker.utils.write_queue import GroupCommitQueue
+
+
+def _submit_concurrently(queue, changes):
+    errors = []
+
+    def submit(key, value):
+        try:
+            queue.submit(key, value)
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=submit, args=change) for change in changes]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return errors
+
+
+def test_batches_and_coalesces():
+    """Test that writes arriving within the window share one commit, last value per key winning."""
+    batches = []
+    queue = GroupCommitQueue("test", lambda changes: batches.append(dict(changes)), window_ms=200)
+
+    errors = _submit_concurrently(queue, [(22, True), (1, True), (2, True)])
+    assert errors == []
+    assert batches == [{22: True, 1: True, 2: True}]
+
+    # A write after the batch committed starts a new one
+    queue.submit(22, False)
+    assert batches[-1] == {22: False}
+
+    stats = queue.stats()
+    assert stats["submitted"] == 4
+    assert stats["commits"] == 2
+    assert stats["largest_batch"] == 3
+    assert stats["pending"] == 0
+
+
+def test_repeated_toggles_coalesce():
+    """Test that toggling the same team repeatedly in one batch writes it once."""
+    batches = []
+    release = threading.Event()
+
+    def apply(changes):
+        batches.append(dict(changes))
+        release.wait(1)
+
+    queue = GroupCommitQueue("test", apply, window_ms=0)
+    blocker = threading.Thread(target=queue.submit, args=(99, True))
+    blocker.start()
+    while not batches:
+        time.sleep(0.001)
+
+    # These queue up while the writer is busy with the first batch
+    threads = [threading.Thread(target=queue.submit, args=(22, i % 2 == 0)) for i in range(5)]
+    for t in threads:
+        t.start()
+    while queue.stats()["submitted"] < 6:
+        time.sleep(0.001)
+    release.set()
+    for t in threads + [blocker]:
+        t.join()
+
+    assert len(batches) == 2
+    assert list(batches[1]) == [22]
+    assert queue.stats()["coalesced"] == 4
+
+
+def test_flushes_when_full():
+    """Test that a full batch is written without waiting for the window."""
+    queue = GroupCommitQueue("test", lambda changes: None, window_ms=5000, max_batch=2)
+
+    started = time.monotonic()
+    assert _submit_concurrently(queue, [(1, True), (2, True)]) == []
+    assert time.monotonic() - started < 1
+
+
+def test_errors_reach_every_caller():
+    """Test that every caller in a failed batch gets the error, and later batches still commit."""
+    failing = [True]
+
+    def apply(changes):
+        if failing[0]:
+            raise RuntimeError("database is locked")
+
+    queue = GroupCommitQueue("test", apply, window_ms=100)
+    errors = _submit_concurrently(queue, [(1, True), (2, False)])
+    assert len(errors) == 2
+    assert all(isinstance(e, RuntimeError) for e in errors)
+
+    failing[0] = False
+    queue.submit(1, True)
+    assert queue.stats()["errors"] == 1
+    assert queue.stats()["commits"] == 1
+
+    with pytest.raises(RuntimeError):
+        failing[0] = True
+        queue.submit(3, True)